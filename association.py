@@ -0,0 +1,254 @@
+import numpy as np
+from typing import List, Optional, Tuple
+
+from utils import estimate_camera_matrix
+
+
+def pose_arrays(camera_poses: List, image_sizes: np.ndarray,
+                fov_degrees: float = 60) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Матрицы K, R, t всех камер.
+
+    Поза - объект Camera (K, R, t) или матрица [R | t] 3×4 / 4×4 (мир -> камера);
+    для матриц K оценивается по размеру изображения.
+
+    Args:
+        image_sizes: (P, 2) высота и ширина изображения каждого фото
+
+    Returns:
+        K (P, 3, 3), R (P, 3, 3), t (P, 3)
+    """
+    Ks, Rs, ts = [], [], []
+    for pose, (height, width) in zip(camera_poses, image_sizes):
+        if hasattr(pose, 'R'):
+            K, R, t = pose.K, pose.R, pose.t
+        else:
+            pose = np.asarray(pose, dtype=np.float64)
+            K = estimate_camera_matrix((int(height), int(width)), fov_degrees)
+            R, t = pose[:3, :3], pose[:3, 3]
+        Ks.append(K)
+        Rs.append(R)
+        ts.append(np.asarray(t, dtype=np.float64).reshape(3))
+    return np.array(Ks, dtype=np.float64), np.array(Rs, dtype=np.float64), np.array(ts)
+
+
+class DetectionAssociator:
+    """
+    Сопоставление детекций одного объекта на разных фото.
+
+    Точка опоры детекции (середина нижней кромки прямоугольника) переводится
+    гомографией камеры на горизонтальную плоскость (пол или плоскость
+    подоконника) - все детекции одной матричной операцией. Полученные 3D точки кластеризуются через
+    пространственный хэш: детекция присоединяется к ближайшему кластеру
+    того же ключа в соседних ячейках, если в нём ещё нет её фото, - почти
+    линейно по числу детекций.
+    """
+
+    def __init__(self, floor_normal=(0.0, 1.0, 0.0), floor_offset: float = -1.5,
+                 radius: float = 0.5, fov_degrees: float = 60, room_transform=None):
+        """
+        Args:
+            floor_normal, floor_offset: плоскость пола n·X + offset = 0 в мировых
+                координатах; по умолчанию - пол на 1.5 ед. ниже первой камеры
+                (ось Y OpenCV направлена вниз)
+            radius: максимальное расстояние точки до центра кластера
+            fov_degrees: угол обзора для поз без матрицы K
+            room_transform: матрица 3×3 из координат плоскости пола (a, b)
+                в координаты комнаты (x, z), метры; None - привязка к комнате
+                неизвестна (см. fit_room_transform), room_coordinates даёт NaN
+        """
+        normal = np.asarray(floor_normal, dtype=np.float64)
+        norm = np.linalg.norm(normal)
+        self.floor_normal = normal / norm
+        self.floor_offset = floor_offset / norm
+        self.radius = radius
+        self.fov_degrees = fov_degrees
+        self.room_transform = (None if room_transform is None
+                               else np.asarray(room_transform, dtype=np.float64))
+
+        # Базис плоскости: e1 - проекция мировой оси X (или Z), e2 = e1 × n.
+        # Для пола с нормалью по Y координаты плоскости совпадают с (X, Z)
+        n = self.floor_normal
+        axis = np.array([1.0, 0.0, 0.0]) if abs(n[0]) < 0.9 else np.array([0.0, 0.0, 1.0])
+        e1 = axis - (axis @ n) * n
+        self.plane_axes = np.stack([e1 / np.linalg.norm(e1), np.cross(e1 / np.linalg.norm(e1), n)])
+
+    def plane_origin(self, height: float = 0.0) -> np.ndarray:
+        """Начало координат плоскости, поднятой на height над полом (нормаль - вниз)."""
+        return -(self.floor_offset + height) * self.floor_normal
+
+    def floor_homographies(self, camera_poses: List, image_sizes: np.ndarray,
+                           height: float = 0.0) -> np.ndarray:
+        """
+        Гомографии изображение -> плоскость для всех камер.
+
+        Точка плоскости X = O + a·e1 + b·e2 проецируется в пиксель
+        K [R e1 | R e2 | R O + t] (a, b, 1); обратная матрица переводит
+        пиксели в координаты (a, b).
+
+        Returns:
+            (P, 3, 3)
+        """
+        return self._homographies(*pose_arrays(camera_poses, image_sizes, self.fov_degrees), height)
+
+    def _homographies(self, K, R, t, height):
+        origin = self.plane_origin(height)
+        columns = np.stack([R @ self.plane_axes[0], R @ self.plane_axes[1], R @ origin + t], axis=2)
+        return np.linalg.inv(K @ columns)
+
+    def plane_coordinates(self, table, camera_poses: List,
+                          height: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Нижние кромки всех детекций в координатах плоскости одной операцией.
+
+        Returns:
+            coords: (N, 2) координаты (a, b) на плоскости
+            valid: (N,) точка лежит перед камерой
+        """
+        n = len(table)
+        if n == 0:
+            return np.zeros((0, 2)), np.zeros(0, dtype=bool)
+
+        photos = table['photo']
+        sizes = np.zeros((len(camera_poses), 2))
+        sizes[photos] = np.stack([table['img_height'], table['img_width']], axis=1)
+        K, R, t = pose_arrays(camera_poses, sizes, self.fov_degrees)
+        H = self._homographies(K, R, t, height)
+
+        pixels = np.stack([table['x'] + table['width'] / 2.0,
+                           (table['y'] + table['height']).astype(np.float64),
+                           np.ones(n)], axis=1)
+        projected = np.einsum('nij,nj->ni', H[photos], pixels)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coords = projected[:, :2] / projected[:, 2:3]
+
+        # Луч должен пересекать плоскость перед камерой
+        points = self.plane_origin(height) + coords @ self.plane_axes
+        depth = np.einsum('nj,nj->n', R[photos][:, 2], points) + t[photos][:, 2]
+        valid = np.all(np.isfinite(coords), axis=1) & (depth > 0)
+        return np.where(valid[:, None], coords, 0.0), valid
+
+    def plane_points(self, table, camera_poses: List,
+                     height: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Пересечение лучей через нижние кромки детекций с плоскостью.
+
+        Args:
+            table: DetectionTable
+            height: высота плоскости над полом (0 - пол)
+
+        Returns:
+            points: (N, 3) мировые координаты
+            valid: (N,) луч пересекает плоскость перед камерой
+        """
+        coords, valid = self.plane_coordinates(table, camera_poses, height)
+        return self.plane_origin(height) + coords @ self.plane_axes, valid
+
+    def fit_room_transform(self, corner_pixels: np.ndarray, camera_pose, image_size,
+                           room_dims) -> np.ndarray:
+        """
+        room_transform по углам пола комнаты на одном фото.
+
+        Углы переводятся гомографией пола этой камеры в координаты
+        плоскости (a, b) и сопоставляются углам прямоугольника комнаты
+        room_dims - масштаб реконструкции приводится к метрам.
+
+        Args:
+            corner_pixels: (4, 2) пиксели углов пола в порядке углов комнаты
+                (0, 0), (width, 0), (width, length), (0, length)
+            camera_pose: поза камеры фото (Camera или [R | t])
+            image_size: (высота, ширина) фото
+
+        Returns:
+            Матрица 3×3 (также сохраняется в self.room_transform)
+        """
+        H = self.floor_homographies([camera_pose], np.array([image_size[:2]]))[0]
+        pixels = np.hstack([np.asarray(corner_pixels, dtype=np.float64).reshape(4, 2), np.ones((4, 1))])
+        projected = pixels @ H.T
+        plane = projected[:, :2] / projected[:, 2:3]
+        room = np.array([[0.0, 0.0], [room_dims.width, 0.0],
+                         [room_dims.width, room_dims.length], [0.0, room_dims.length]])
+        self.room_transform = _homography(plane, room)
+        return self.room_transform
+
+    def room_coordinates(self, points: np.ndarray) -> np.ndarray:
+        """Мировые точки пола (N, 3) -> координаты комнаты (N, 2); NaN без room_transform."""
+        if self.room_transform is None:
+            return np.full((len(points), 2), np.nan)
+        coords = (np.asarray(points) - self.plane_origin()) @ self.plane_axes.T
+        mapped = np.hstack([coords, np.ones((len(coords), 1))]) @ self.room_transform.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return mapped[:, :2] / mapped[:, 2:3]
+
+    def cluster(self, points: np.ndarray, valid: np.ndarray, photos: np.ndarray,
+                confidence: np.ndarray, keys: Optional[np.ndarray] = None
+                ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Кластеризация точек в порядке убывания уверенности.
+
+        Returns:
+            labels: (N,) номер кластера в порядке основания
+            centroids: (C, 3) центры кластеров (NaN для точек без опоры)
+        """
+        n = len(points)
+        keys = np.zeros(n, dtype=np.int64) if keys is None else np.asarray(keys)
+        cells = np.floor(points / self.radius).astype(np.int64)
+        labels = np.full(n, -1, dtype=np.int64)
+
+        grid = {}
+        sums, counts, members, cluster_keys, cluster_cells = [], [], [], [], []
+        offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+        for i in np.argsort(-confidence, kind='stable'):
+            best, best_dist = -1, self.radius
+            if valid[i]:
+                cx, cy, cz = cells[i]
+                for dx, dy, dz in offsets:
+                    for c in grid.get((cx + dx, cy + dy, cz + dz), ()):
+                        if cluster_keys[c] != keys[i] or photos[i] in members[c]:
+                            continue
+                        dist = np.linalg.norm(points[i] - sums[c] / counts[c])
+                        if dist <= best_dist:
+                            best, best_dist = c, dist
+
+            if best < 0:
+                best = len(sums)
+                sums.append(points[i].copy() if valid[i] else np.full(3, np.nan))
+                counts.append(1)
+                members.append({photos[i]})
+                cluster_keys.append(keys[i])
+                cluster_cells.append(None)
+            else:
+                sums[best] = sums[best] + points[i]
+                counts[best] += 1
+                members[best].add(photos[i])
+
+            labels[i] = best
+            if valid[i]:
+                # Центр кластера мог перейти в другую ячейку
+                cell = tuple(np.floor(sums[best] / counts[best] / self.radius).astype(np.int64))
+                if cell != cluster_cells[best]:
+                    if cluster_cells[best] is not None:
+                        grid[cluster_cells[best]].remove(best)
+                    grid.setdefault(cell, []).append(best)
+                    cluster_cells[best] = cell
+
+        centroids = np.array([s / c for s, c in zip(sums, counts)]).reshape(-1, 3)
+        return labels, centroids
+
+    def associate(self, table, camera_poses: List, keys: Optional[np.ndarray] = None,
+                  height: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Точки опоры и их кластеры: (labels (N,), centroids (C, 3))."""
+        points, valid = self.plane_points(table, camera_poses, height)
+        return self.cluster(points, valid, table['photo'], table['confidence'], keys)
+
+
+def _homography(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Гомография 3×3 по четырём (и более) парам точек (DLT)."""
+    rows = []
+    for (x, y), (u, v) in zip(src, dst):
+        rows.append([x, y, 1, 0, 0, 0, -u * x, -u * y, -u])
+        rows.append([0, 0, 0, x, y, 1, -v * x, -v * y, -v])
+    _, _, vt = np.linalg.svd(np.array(rows, dtype=np.float64))
+    H = vt[-1].reshape(3, 3)
+    return H / H[2, 2]
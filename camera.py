@@ -1,13 +1,26 @@
+import json
+from pathlib import Path
+
 import numpy as np
 import cv2
 
+from utils import estimate_camera_matrix
+
+# EXIF теги (PIL.ExifTags)
+EXIF_MAKE = 0x010F
+EXIF_MODEL = 0x0110
+EXIF_IFD = 0x8769
+EXIF_FOCAL_LENGTH = 0x920A
+EXIF_FOCAL_35MM = 0xA405
+
 
 class Camera:
     """Камера с внутренними и внешними параметрами."""
 
-    def __init__(self, K, dist_coeffs=None):
+    def __init__(self, K, dist_coeffs=None, model=None):
         self.K = K
         self.dist_coeffs = dist_coeffs if dist_coeffs is not None else np.zeros(5)
+        self.model = model  # CameraModel, из которого получены K и dist_coeffs
         self.R = np.eye(3)
         self.t = np.zeros((3, 1))
 
@@ -76,3 +89,172 @@ def triangulate_points(cam1, cam2, pts1, pts2):
     pts3d = (pts4d[:3] / pts4d[3]).T
 
     return pts3d
+
+
+def read_exif_intrinsics(image_path):
+    """
+    Чтение параметров камеры из EXIF.
+
+    Returns:
+        Словарь с ключами make, model, focal_mm, focal_35mm (пустой, если EXIF нет
+        или PIL не установлен)
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return {}
+
+    try:
+        with Image.open(image_path) as img:
+            exif = img.getexif()
+            sub_ifd = exif.get_ifd(EXIF_IFD)
+    except (OSError, AttributeError):
+        return {}
+
+    info = {}
+    make = exif.get(EXIF_MAKE)
+    model = exif.get(EXIF_MODEL)
+    if make or model:
+        info['make'] = str(make or '').strip('\x00 ')
+        info['model'] = str(model or '').strip('\x00 ')
+
+    focal = sub_ifd.get(EXIF_FOCAL_LENGTH)
+    if focal:
+        info['focal_mm'] = float(focal)
+
+    focal_35mm = sub_ifd.get(EXIF_FOCAL_35MM)
+    if focal_35mm:
+        info['focal_35mm'] = float(focal_35mm)
+
+    return info
+
+
+class CameraModel:
+    """Внутренние параметры одной модели камеры (телефона)."""
+
+    def __init__(self, name, K, dist_coeffs=None, image_size=None):
+        self.name = name
+        self.K = np.asarray(K, dtype=np.float64)
+        self.dist_coeffs = (np.asarray(dist_coeffs, dtype=np.float64)
+                            if dist_coeffs is not None else np.zeros(5))
+        self.image_size = tuple(image_size) if image_size is not None else None  # (w, h)
+
+    def matrix_for(self, image_shape):
+        """
+        Матрица K под разрешение изображения.
+
+        Кадр другой ориентации (портрет при калибровке в ландшафте) - оси
+        K меняются местами. Затем масштаб один по обеим осям (пиксели
+        остаются квадратными): по стороне, заполняющей сенсор, а главная
+        точка сдвигается на обрезанную часть другой стороны (кадр другого
+        соотношения сторон - центральный вырез сенсора).
+        """
+        h, w = image_shape[:2]
+        if self.image_size is None or self.image_size == (w, h):
+            return self.K
+
+        K = self.K.copy()
+        size_w, size_h = self.image_size
+        if (w > h) != (size_w > size_h) and w != h and size_w != size_h:
+            K = K[[1, 0, 2]][:, [1, 0, 2]]
+            size_w, size_h = size_h, size_w
+
+        scale = max(w / size_w, h / size_h)
+        K[:2] *= scale
+        K[0, 2] -= (size_w * scale - w) / 2
+        K[1, 2] -= (size_h * scale - h) / 2
+        return K
+
+    @property
+    def has_distortion(self):
+        return bool(np.any(self.dist_coeffs))
+
+
+class CameraRegistry:
+    """
+    Реестр моделей камер.
+
+    Параметры берутся из файла калибровки или из EXIF (35 мм эквивалент),
+    карты устранения дисторсии строятся один раз на модель и разрешение.
+    """
+
+    def __init__(self, fov_degrees=60):
+        self.fov_degrees = fov_degrees
+        self.models = {}
+        self._maps = {}
+
+    def register(self, model):
+        """Добавление модели камеры."""
+        self.models[model.name] = model
+        # Старые карты для этой модели больше не актуальны
+        self._maps = {k: v for k, v in self._maps.items() if k[0] != model.name}
+        return model
+
+    def load_calibration(self, path):
+        """
+        Загрузка калибровки из JSON.
+
+        Формат: объект или список объектов
+        {"model": "...", "K": [[...], [...], [...]], "dist_coeffs": [...], "image_size": [w, h]}
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        entries = data if isinstance(data, list) else [data]
+        for entry in entries:
+            self.register(CameraModel(
+                name=entry['model'],
+                K=entry['K'],
+                dist_coeffs=entry.get('dist_coeffs'),
+                image_size=entry.get('image_size')
+            ))
+        print(f"  Загружено моделей камер: {len(entries)} ({Path(path).name})")
+
+    def model_for_image(self, image_path, image_shape):
+        """Модель камеры для изображения: калибровка -> EXIF -> угол обзора."""
+        exif = read_exif_intrinsics(image_path) if image_path else {}
+        name = ' '.join(p for p in (exif.get('make'), exif.get('model')) if p) or 'unknown'
+
+        if name in self.models:
+            return self.models[name]
+
+        h, w = image_shape[:2]
+        K = estimate_camera_matrix(image_shape, self.fov_degrees, exif.get('focal_35mm'))
+        key = f"{name}@{exif['focal_35mm']:.0f}mm" if 'focal_35mm' in exif else name
+        if key not in self.models:
+            self.register(CameraModel(key, K, image_size=(w, h)))
+        return self.models[key]
+
+    def undistort_maps(self, model, image_shape):
+        """Карты remap для модели и разрешения (строятся один раз)."""
+        h, w = image_shape[:2]
+        key = (model.name, w, h)
+        if key not in self._maps:
+            K = model.matrix_for(image_shape)
+            self._maps[key] = cv2.initUndistortRectifyMap(
+                K, model.dist_coeffs, None, K, (w, h), cv2.CV_16SC2
+            )
+        return self._maps[key]
+
+    def undistort(self, image, model):
+        """Устранение дисторсии одним вызовом remap с кэшированными картами."""
+        if not model.has_distortion:
+            return image
+        map1, map2 = self.undistort_maps(model, image.shape)
+        return cv2.remap(image, map1, map2, cv2.INTER_LINEAR)
+
+    def prepare(self, image_paths, images):
+        """
+        Исправленные изображения и камеры для набора фотографий.
+
+        Returns:
+            images: изображения без дисторсии
+            cameras: Camera с K выбранной модели (дисторсия уже устранена)
+        """
+        undistorted = []
+        cameras = []
+        for path, img in zip(image_paths, images):
+            model = self.model_for_image(path, img.shape)
+            undistorted.append(self.undistort(img, model))
+            cameras.append(Camera(model.matrix_for(img.shape), model=model))
+        return undistorted, cameras
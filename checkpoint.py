@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+
+class CheckpointStore:
+    """
+    Чекпоинты этапов реконструкции.
+
+    Каждый этап хранится в своей папке как набор .npy файлов (их можно открыть
+    через np.load(mmap_mode='r') без разбора), а manifest.json описывает ключи и
+    массивы этапов. Архивы .npz не используются: numpy не умеет отображать их в память.
+    """
+
+    STAGES = ('features', 'matches', 'tracks', 'poses', 'points')
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        path = self.directory / self.MANIFEST
+        if not path.exists():
+            return {'stages': {}}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'stages': {}}
+
+    def _write_manifest(self):
+        tmp = self.directory / (self.MANIFEST + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.directory / self.MANIFEST)
+
+    def is_valid(self, stage, key):
+        """Этап сохранён с тем же ключом и все его файлы на месте."""
+        entry = self.manifest['stages'].get(stage)
+        if entry is None or entry['key'] != key:
+            return False
+        stage_dir = self.directory / stage
+        return all((stage_dir / f"{name}.npy").exists() for name in entry['arrays'])
+
+    def save(self, stage, key, arrays, meta=None):
+        """Сохранение массивов этапа; последующие этапы становятся недействительными."""
+        self.invalidate_from(stage)
+
+        stage_dir = self.directory / stage
+        stage_dir.mkdir(exist_ok=True)
+        for name, arr in arrays.items():
+            # Через временный файл: старый .npy может быть открыт как memory map
+            path = stage_dir / f"{name}.npy"
+            tmp = stage_dir / f"{name}.npy.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, np.asarray(arr))
+            os.replace(tmp, path)
+
+        self.manifest['stages'][stage] = {
+            'key': key,
+            'arrays': {name: list(np.shape(arr)) for name, arr in arrays.items()},
+            'meta': meta or {}
+        }
+        self._write_manifest()
+
+    def load(self, stage, mmap=True):
+        """Загрузка массивов этапа (по умолчанию через memory map)."""
+        entry = self.manifest['stages'][stage]
+        stage_dir = self.directory / stage
+        mode = 'r' if mmap else None
+        arrays = {name: np.load(stage_dir / f"{name}.npy", mmap_mode=mode)
+                  for name in entry['arrays']}
+        return arrays, entry['meta']
+
+    def invalidate_from(self, stage):
+        """Удаление записи этапа и всех последующих из манифеста."""
+        idx = self.STAGES.index(stage)
+        for later in self.STAGES[idx:]:
+            self.manifest['stages'].pop(later, None)
+
+    def last_valid_stage(self, keys):
+        """Последний этап, для которого все предыдущие этапы действительны."""
+        last = None
+        for stage in self.STAGES:
+            if stage not in keys or not self.is_valid(stage, keys[stage]):
+                break
+            last = stage
+        return last
+
+
+def stage_key(*parts):
+    """Ключ этапа - хэш параметров и ключа предыдущего этапа."""
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(np.ascontiguousarray(part).data)
+        else:
+            h.update(repr(part).encode('utf-8'))
+    return h.hexdigest()
+
+
+def keypoints_to_array(keypoints):
+    """cv2.KeyPoint -> массив (N, 7): x, y, size, angle, response, octave, class_id."""
+    return np.array([(kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response, kp.octave, kp.class_id)
+                     for kp in keypoints], dtype=np.float64).reshape(-1, 7)
+
+
+def array_to_keypoints(arr):
+    """Обратное преобразование массива (N, 7) в список cv2.KeyPoint."""
+    return [cv2.KeyPoint(float(x), float(y), float(size), float(angle), float(resp),
+                         int(octave), int(class_id))
+            for x, y, size, angle, resp, octave, class_id in np.asarray(arr)]
@@ -0,0 +1,227 @@
+import numpy as np
+import cv2
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class ColorZone:
+    """Зона кадра и параметры подсчёта её цветов."""
+    box: Callable[[int, int], Tuple[int, int, int, int]]  # (h, w) -> y0, y1, x0, x1
+    size: int = 30  # Сторона уменьшенной копии зоны
+    brightness: Tuple[int, int] = (40, 215)  # Учитываются пиксели строго между границами
+    step: int = 25  # Шаг квантования; цвет ячейки - её середина
+
+
+# Зоны фото для цветов 3D модели: боковые четверти и центр - стены,
+# нижняя и верхняя трети - пол и потолок
+COLOR_ZONES = {
+    'left': ColorZone(lambda h, w: (0, h, 0, w // 4)),
+    'center': ColorZone(lambda h, w: (0, h, w // 4, 3 * w // 4)),
+    'right': ColorZone(lambda h, w: (0, h, 3 * w // 4, w)),
+    'floor': ColorZone(lambda h, w: (2 * h // 3, h, 0, w)),
+    'ceiling': ColorZone(lambda h, w: (0, h // 3, 0, w)),
+}
+
+# Края фото (1/8 ширины) для цвета стен на планировке
+WALL_EDGE_ZONES = {
+    'edge_left': ColorZone(lambda h, w: (0, h, 0, w // 8), 50, (50, 200), 30),
+    'edge_right': ColorZone(lambda h, w: (0, h, w - w // 8, w), 50, (50, 200), 30),
+    'edge_top': ColorZone(lambda h, w: (0, w // 8, 0, w), 50, (50, 200), 30),
+}
+
+# Края изображения планировки: стены (1/10 ширины) и пол (нижняя 1/6)
+PLAN_EDGE_ZONES = {
+    'left': ColorZone(lambda h, w: (0, h, 0, w // 10), 50, (30, 225), 30),
+    'right': ColorZone(lambda h, w: (0, h, w - w // 10, w), 50, (30, 225), 30),
+    'top': ColorZone(lambda h, w: (0, w // 10, 0, w), 50, (30, 225), 30),
+    'floor': ColorZone(lambda h, w: (h - h // 6, h, 0, w), 50, (30, 225), 30),
+}
+
+# Квантованный цвет упаковывается в одно число по основанию LEVELS
+# (наименьший шаг квантования - 25)
+LEVELS = 256 // 25 + 1
+BINS = LEVELS ** 3
+
+
+def pack_colors(pixels: np.ndarray, step) -> np.ndarray:
+    """Квантованные цвета (N, 3) -> номера ячеек гистограммы (N,)."""
+    q = pixels.astype(np.int64) // np.reshape(step, (-1, 1))
+    return (q[:, 0] * LEVELS + q[:, 1]) * LEVELS + q[:, 2]
+
+
+def unpack_colors(codes: np.ndarray, step: int) -> np.ndarray:
+    """Номера ячеек -> цвета (K, 3) 0..255 (середины ячеек)."""
+    codes = np.asarray(codes, dtype=np.int64)
+    q = np.stack([codes // (LEVELS * LEVELS), codes // LEVELS % LEVELS, codes % LEVELS], axis=1)
+    return q * step + step // 2
+
+
+def most_common_color(colors: Sequence[Tuple[float, float, float]],
+                      decimals: int = 1) -> Optional[Tuple[float, float, float]]:
+    """
+    Самый частый цвет (0..1) после округления до decimals знаков;
+    при равенстве - встретившийся первым.
+    """
+    if len(colors) == 0:
+        return None
+    scale = 10 ** decimals
+    q = np.rint(np.asarray(colors, dtype=np.float64) * scale).astype(np.int64)
+    base = scale + 1
+    codes = (q[:, 0] * base + q[:, 1]) * base + q[:, 2]
+    _, first, counts = np.unique(codes, return_index=True, return_counts=True)
+    best = first[np.lexsort((first, -counts))[0]]
+    return tuple(float(c) for c in q[best] / scale)
+
+
+class ZoneColors:
+    """
+    Доминирующие цвета зон всех фото за один проход.
+
+    Каждая зона каждого фото уменьшается (cv2.resize), пиксели всех зон
+    складываются в один массив; отбор по яркости, квантование и упаковка
+    RGB в число - одной операцией над всеми пикселями, гистограммы всех
+    зон - один np.bincount по ключу (фото, зона, ячейка). Запросы по
+    любому набору зон и фото складывают готовые гистограммы; при равной
+    частоте выигрывает цвет, встретившийся раньше (как Counter.most_common).
+
+    method='kmeans' вместо гистограммы кластеризует пиксели запроса в Lab
+    (с прореживанием до max_samples) - центры крупнейших кластеров
+    устойчивее к границам ячеек квантования.
+    """
+
+    def __init__(self, images: Sequence[np.ndarray], zones: Dict[str, ColorZone],
+                 bgr: bool = True, method: str = 'histogram', clusters: int = 4,
+                 max_samples: int = 2000):
+        """
+        Args:
+            images: изображения (None пропускаются)
+            zones: имя -> ColorZone
+            bgr: изображения в порядке BGR (OpenCV), иначе RGB (PIL)
+            method: 'histogram' или 'kmeans'
+            clusters: число кластеров k-means
+            max_samples: предел пикселей для k-means
+        """
+        if method not in ('histogram', 'kmeans'):
+            raise ValueError(f"Неизвестный метод анализа цветов: {method}")
+        self.zone_names = list(zones)
+        self.zones = dict(zones)
+        self.n_photos = len(images)
+        self.method = method
+        self.clusters = clusters
+        self.max_samples = max_samples
+
+        parts, groups = [], []
+        n_zones = len(self.zone_names)
+        for p, img in enumerate(images):
+            if img is None:
+                continue
+            h, w = img.shape[:2]
+            for z, name in enumerate(self.zone_names):
+                zone = self.zones[name]
+                y0, y1, x0, x1 = zone.box(h, w)
+                crop = img[y0:y1, x0:x1]
+                if crop.size == 0:
+                    continue
+                small = cv2.resize(crop, (zone.size, zone.size)).reshape(zone.size * zone.size, -1)
+                if small.shape[1] == 1:
+                    small = np.repeat(small, 3, axis=1)
+                parts.append(small[:, 2::-1] if bgr else small[:, :3])
+                groups.append(np.full(zone.size * zone.size, p * n_zones + z, dtype=np.int64))
+
+        pixels = np.concatenate(parts) if parts else np.zeros((0, 3), dtype=np.uint8)
+        group = np.concatenate(groups) if groups else np.zeros(0, dtype=np.int64)
+
+        # Отбор по яркости: среднее строго между границами (в целых - сумма против 3 * граница)
+        zone_of = group % max(n_zones, 1)
+        low = np.array([self.zones[n].brightness[0] for n in self.zone_names], dtype=np.int64)
+        high = np.array([self.zones[n].brightness[1] for n in self.zone_names], dtype=np.int64)
+        steps = np.array([self.zones[n].step for n in self.zone_names], dtype=np.int64)
+        total = pixels.sum(axis=1, dtype=np.int64)
+        valid = (total > 3 * low[zone_of]) & (total < 3 * high[zone_of])
+
+        self.pixels = np.ascontiguousarray(pixels[valid])
+        self.group = group[valid]
+        keys = self.group * BINS + pack_colors(self.pixels, steps[zone_of[valid]])
+
+        n_groups = self.n_photos * n_zones
+        self.counts = np.bincount(keys, minlength=n_groups * BINS).reshape(n_groups, BINS)
+        # Первое появление ячейки в общем порядке пикселей (фото, зона, пиксель)
+        first = np.full(n_groups * BINS, len(keys), dtype=np.int64)
+        np.minimum.at(first, keys, np.arange(len(keys)))
+        self.first = first.reshape(n_groups, BINS)
+
+    def _groups(self, zones: Sequence[str], photos: Optional[Sequence[int]]) -> np.ndarray:
+        photos = range(self.n_photos) if photos is None else photos
+        z = [self.zone_names.index(name) for name in zones]
+        return np.array([p * len(self.zone_names) + i for p in photos for i in z], dtype=np.int64)
+
+    def dominant(self, zones: Sequence[str], photos: Optional[Sequence[int]] = None,
+                 n_colors: int = 1) -> List[Tuple[int, int, int]]:
+        """
+        Самые частые цвета (0..255) по объединению зон и фото.
+
+        Args:
+            zones: имена зон (с одинаковым шагом квантования)
+            photos: номера фото (по умолчанию все)
+
+        Returns:
+            до n_colors цветов по убыванию частоты; пусто, если пикселей нет
+        """
+        steps = {self.zones[name].step for name in zones}
+        if len(steps) > 1:
+            raise ValueError("Зоны с разным шагом квантования нельзя объединять")
+        groups = self._groups(zones, photos)
+        if self.method == 'kmeans':
+            return self._kmeans(np.isin(self.group, groups), n_colors)
+
+        counts = self.counts[groups].sum(axis=0)
+        first = self.first[groups].min(axis=0)
+        present = np.flatnonzero(counts)
+        top = present[np.lexsort((first[present], -counts[present]))[:n_colors]]
+        return [tuple(int(c) for c in color) for color in unpack_colors(top, steps.pop())]
+
+    def _kmeans(self, mask: np.ndarray, n_colors: int) -> List[Tuple[int, int, int]]:
+        pixels = self.pixels[mask]
+        if len(pixels) == 0:
+            return []
+        if len(pixels) > self.max_samples:
+            pixels = pixels[np.linspace(0, len(pixels) - 1, self.max_samples).astype(np.intp)]
+
+        lab = cv2.cvtColor(pixels.reshape(-1, 1, 3), cv2.COLOR_RGB2LAB).reshape(-1, 3).astype(np.float32)
+        k = min(self.clusters, len(lab))
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+        cv2.setRNGSeed(0)
+        _, labels, centers = cv2.kmeans(lab, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+
+        sizes = np.bincount(labels.ravel(), minlength=k)
+        order = np.argsort(-sizes, kind='stable')[:n_colors]
+        centers = np.clip(np.rint(centers[order]), 0, 255).astype(np.uint8)
+        rgb = cv2.cvtColor(centers.reshape(-1, 1, 3), cv2.COLOR_LAB2RGB).reshape(-1, 3)
+        return [tuple(int(c) for c in color) for color in rgb]
+
+
+# Последние результаты по наборам фото: этап планировки и этап 3D модели
+# получают одни и те же массивы изображений и считают зоны один раз
+_CACHE: 'OrderedDict[tuple, Tuple[Sequence[np.ndarray], ZoneColors]]' = OrderedDict()
+_CACHE_SIZE = 4
+
+
+def photo_colors(images: Sequence[np.ndarray], method: str = 'histogram') -> ZoneColors:
+    """
+    Цвета зон COLOR_ZONES и WALL_EDGE_ZONES для набора фото (BGR) с кэшем.
+
+    Ключ кэша - сами объекты изображений: запись хранит ссылки на них,
+    поэтому id не переиспользуются, пока запись жива.
+    """
+    key = (method,) + tuple(id(img) for img in images)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key][1]
+
+    colors = ZoneColors(images, {**COLOR_ZONES, **WALL_EDGE_ZONES}, method=method)
+    _CACHE[key] = (list(images), colors)
+    if len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return colors
@@ -0,0 +1,235 @@
+import numpy as np
+from typing import List, Dict, Optional, Sequence
+
+
+# Положение на фото (порядок кодов = порядок вывода стен в отчётах)
+WALL_POSITIONS = ('left', 'right', 'center')
+
+# Битовые флаги детекции
+FLAG_VALID = 1
+FLAG_GLASS = 2
+FLAG_OPEN = 4
+FLAG_VERIFIED = 8
+
+DETECTION_DTYPE = np.dtype([
+    ('photo', np.int32),       # Индекс фото
+    ('x', np.int32),           # Прямоугольник на изображении, пиксели
+    ('y', np.int32),
+    ('width', np.int32),
+    ('height', np.int32),
+    ('img_width', np.int32),   # Размер исходного изображения
+    ('img_height', np.int32),
+    ('confidence', np.float64),
+    ('depth', np.float64),     # Относительная глубина (мебель)
+    ('type_code', np.int8),    # Индекс в labels таблицы (мебель), иначе -1
+    ('position', np.int8),     # Индекс в WALL_POSITIONS, иначе -1
+    ('flags', np.uint8),
+    ('support', np.int32),     # Сколько детекций объединено в строку
+    ('floor', np.float64, (3,)),  # Точка опоры в мировых координатах (NaN - неизвестна)
+    ('room', np.float64, (2,)),   # Та же точка в координатах комнаты (x, z)
+])
+
+
+def pairwise_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    IoU всех пар прямоугольников (x, y, width, height).
+
+    Returns:
+        Матрица (N, M)
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+
+    ix = (np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2]) -
+          np.maximum(a[:, None, 0], b[None, :, 0]))
+    iy = (np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3]) -
+          np.maximum(a[:, None, 1], b[None, :, 1]))
+    intersection = np.clip(ix, 0, None) * np.clip(iy, 0, None)
+
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersection
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(union > 0, intersection / np.where(union > 0, union, 1), 0.0)
+
+
+def nms_keep(boxes: np.ndarray, iou_threshold: float,
+             order: Optional[np.ndarray] = None,
+             groups: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Жадное подавление немаксимумов по матрице IoU.
+
+    Args:
+        boxes: (N, 4) прямоугольники (x, y, width, height)
+        iou_threshold: подавляются пары с IoU строго больше порога
+        order: порядок приоритета (по умолчанию - исходный)
+        groups: метки групп (например, фото); между группами подавления нет
+
+    Returns:
+        Индексы оставленных прямоугольников в порядке приоритета
+    """
+    n = len(boxes)
+    order = np.arange(n) if order is None else np.asarray(order)
+    if n <= 1:
+        return order
+
+    overlaps = pairwise_iou(boxes, boxes) > iou_threshold
+    if groups is not None:
+        groups = np.asarray(groups)
+        overlaps &= groups[:, None] == groups[None, :]
+
+    suppressed = np.zeros(n, dtype=bool)
+    keep = []
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= overlaps[i]
+    return np.array(keep, dtype=np.intp)
+
+
+class DetectionTable:
+    """
+    Колоночная таблица детекций (структурированный массив NumPy).
+
+    Одна строка - один прямоугольник с одного фото. Фильтрация, NMS и
+    группировка работают над колонками целиком; в словари старого формата
+    таблица переводится только на границе с main.py (to_legacy).
+    """
+
+    KINDS = ('window', 'door', 'furniture')
+
+    def __init__(self, data: Optional[np.ndarray] = None, kind: str = 'furniture',
+                 labels: Sequence = ()):
+        """
+        Args:
+            data: структурированный массив DETECTION_DTYPE
+            kind: 'window', 'door' или 'furniture'
+            labels: значения type_code (для мебели - элементы FurnitureType)
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Неизвестный тип детекций: {kind}")
+        self.data = np.zeros(0, dtype=DETECTION_DTYPE) if data is None else data
+        self.kind = kind
+        self.labels = tuple(labels)
+
+    @classmethod
+    def from_detections(cls, detections: List, photo_idx: int, image_shape,
+                        kind: str = 'furniture', labels: Sequence = ()) -> 'DetectionTable':
+        """Таблица из списка DetectedWindow / DetectedDoor / DetectedFurniture одного фото."""
+        labels = tuple(labels)
+        data = np.zeros(len(detections), dtype=DETECTION_DTYPE)
+        data['photo'] = photo_idx
+        data['img_height'], data['img_width'] = image_shape[:2]
+        data['type_code'] = -1
+        data['position'] = -1
+        data['support'] = 1
+        data['floor'] = np.nan
+        data['room'] = np.nan
+
+        for row, det in zip(data, detections):
+            row['x'], row['y'], row['width'], row['height'] = det.x, det.y, det.width, det.height
+            row['confidence'] = det.confidence
+            flags = FLAG_VALID if det.is_valid else 0
+            if getattr(det, 'has_glass', False):
+                flags |= FLAG_GLASS
+            if getattr(det, 'is_open', False):
+                flags |= FLAG_OPEN
+            row['flags'] = flags
+            if hasattr(det, 'wall_position'):
+                row['position'] = WALL_POSITIONS.index(det.wall_position)
+            if hasattr(det, 'furniture_type'):
+                row['type_code'] = labels.index(det.furniture_type)
+                row['depth'] = det.depth_estimate
+
+        return cls(data, kind, labels)
+
+    @classmethod
+    def concat(cls, tables: List['DetectionTable'], kind: str = 'furniture',
+               labels: Sequence = ()) -> 'DetectionTable':
+        if not tables:
+            return cls(kind=kind, labels=labels)
+        return cls(np.concatenate([t.data for t in tables]), kind, tables[0].labels or labels)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        """Колонка по имени или подтаблица по маске / индексам."""
+        if isinstance(key, str):
+            return self.data[key]
+        return DetectionTable(self.data[key], self.kind, self.labels)
+
+    @property
+    def boxes(self) -> np.ndarray:
+        """(N, 4) прямоугольники (x, y, width, height)."""
+        return np.stack([self.data['x'], self.data['y'],
+                         self.data['width'], self.data['height']], axis=1)
+
+    def has_flag(self, flag: int) -> np.ndarray:
+        return (self.data['flags'] & flag) != 0
+
+    def threshold(self, min_confidence: float) -> 'DetectionTable':
+        """Строки с уверенностью строго выше порога."""
+        return self[self.data['confidence'] > min_confidence]
+
+    def sort_by_confidence(self) -> 'DetectionTable':
+        """Сортировка по убыванию уверенности (устойчивая)."""
+        return self[np.argsort(-self.data['confidence'], kind='stable')]
+
+    def nms(self, iou_threshold: float, by_confidence: bool = True) -> 'DetectionTable':
+        """NMS внутри каждого фото; порядок результата - порядок приоритета."""
+        order = np.argsort(-self.data['confidence'], kind='stable') if by_confidence else None
+        return self[nms_keep(self.boxes, iou_threshold, order, self.data['photo'])]
+
+    def group_best(self, keys: np.ndarray):
+        """
+        Лучшая (по уверенности, при равенстве - первая) строка каждой группы.
+
+        Args:
+            keys: метка группы для каждой строки; группы упорядочены по метке
+
+        Returns:
+            best: индексы лучших строк (G,)
+            counts: размеры групп (G,)
+            first: индексы первых строк групп (G,)
+        """
+        keys = np.asarray(keys)
+        if len(keys) == 0:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty, empty
+        _, first, inverse, counts = np.unique(keys, return_index=True,
+                                              return_inverse=True, return_counts=True)
+        order = np.lexsort((np.arange(len(keys)), -self.data['confidence'], inverse))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        return order[starts], counts, first
+
+    def to_legacy(self) -> List[Dict]:
+        """Агрегированные строки в словари прежнего формата analyze_multiple_images."""
+        result = []
+        for row in self.data:
+            verified = bool(row['flags'] & FLAG_VERIFIED)
+            confidence = float(row['confidence'])
+            if self.kind == 'furniture':
+                result.append({
+                    'type': self.labels[row['type_code']],
+                    'confidence': confidence,
+                    'dimensions_2d': (int(row['width']), int(row['height'])),
+                    'depth_estimate': float(row['depth']),
+                    'verified': verified
+                })
+                if np.all(np.isfinite(row['floor'])):
+                    result[-1]['position_3d'] = row['floor'].copy()
+                if np.all(np.isfinite(row['room'])):
+                    result[-1]['floor_position'] = (float(row['room'][0]), float(row['room'][1]))
+                continue
+
+            item = {
+                'position': WALL_POSITIONS[row['position']],
+                'confidence': confidence,
+                'aspect_ratio': int(row['height']) / int(row['width']),
+                'verified': verified
+            }
+            if self.kind == 'door':
+                item['has_glass'] = bool(row['flags'] & FLAG_GLASS)
+                item['is_open'] = bool(row['flags'] & FLAG_OPEN)
+            result.append(item)
+        return result
@@ -1,8 +1,11 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+from association import DetectionAssociator
+from detections import DetectionTable, WALL_POSITIONS, FLAG_VERIFIED, nms_keep
+
 
 @dataclass
 class DetectedDoor:
@@ -39,6 +42,9 @@ class DoorDetectorCV:
             'wall_margin': 0.1  # Отступ от края стены
         }
 
+        # Сопоставление дверей между фото по точке касания пола
+        self.associator = DetectionAssociator()
+
     def detect_doors(self, image: np.ndarray) -> List[DetectedDoor]:
         """
         Обнаружение дверей на изображении.
@@ -221,80 +227,60 @@ class DoorDetectorCV:
         if len(doors) <= 1:
             return doors
 
-        keep = []
-        for d1 in doors:
-            overlap = False
-            for d2 in keep:
-                if self._iou(d1, d2) > iou_threshold:
-                    overlap = True
-                    break
-            if not overlap:
-                keep.append(d1)
-        return keep
-
-    def _iou(self, d1: DetectedDoor, d2: DetectedDoor) -> float:
-        """Вычисление IoU (Intersection over Union) для двух дверей."""
-        x1 = max(d1.x, d2.x)
-        y1 = max(d1.y, d2.y)
-        x2 = min(d1.x + d1.width, d2.x + d2.width)
-        y2 = min(d1.y + d1.height, d2.y + d2.height)
-
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        area1 = d1.width * d1.height
-        area2 = d2.width * d2.height
-        union = area1 + area2 - intersection
-
-        return intersection / union if union > 0 else 0
-
-    def analyze_multiple_images(self, images: List[np.ndarray]) -> List[Dict]:
+        boxes = np.array([(d.x, d.y, d.width, d.height) for d in doors])
+        return [doors[i] for i in nms_keep(boxes, iou_threshold)]
+
+    def analyze_table(self, images: List[np.ndarray],
+                      camera_poses: Optional[List] = None) -> DetectionTable:
         """
         Анализ нескольких изображений для поиска дверей.
 
         Returns:
-            Список обнаруженных дверей с агрегированной информацией
+            Таблица агрегированных дверей (по строке на дверь)
         """
-        all_candidates = []
+        tables = []
 
         for i, img in enumerate(images):
             detected = self.detect_doors(img)
             print(f"  Фото {i + 1}: найдено {len(detected)} кандидатов на дверь")
+            tables.append(DetectionTable.from_detections(detected, i, img.shape, kind='door'))
 
-            for door in detected:
-                all_candidates.append({
-                    'photo_idx': i,
-                    'door': door,
-                    'relative_x': (door.x + door.width / 2) / img.shape[1],
-                    'relative_y': (door.y + door.height / 2) / img.shape[0],
-                    'is_valid': door.is_valid
-                })
-
-        # Группировка по позиции на стене
-        by_position = {'left': [], 'right': [], 'center': []}
-        for c in all_candidates:
-            if c['door'].confidence > 0.3:
-                by_position[c['door'].wall_position].append(c)
-
-        final_doors = []
-        for position, candidates in by_position.items():
-            if len(candidates) == 0:
-                continue
+        candidates = DetectionTable.concat(tables, kind='door').threshold(0.3)
+        return self._aggregate(candidates, camera_poses)
 
-            # Если нашли несколько раз в разных фото - повышаем уверенность
-            if len(candidates) >= 2 or (candidates and candidates[0]['door'].confidence > 0.6):
-                best = max(candidates, key=lambda x: x['door'].confidence)
-                confidence_boost = 1.0 + (len(candidates) - 1) * 0.15
-
-                final_doors.append({
-                    'position': position,
-                    'confidence': min(best['door'].confidence * confidence_boost, 1.0),
-                    'aspect_ratio': best['door'].height / best['door'].width,
-                    'verified': len(candidates) >= 2,
-                    'has_glass': best['door'].has_glass,
-                    'is_open': best['door'].is_open
-                })
-                print(f"    ✓ Дверь на {position} стене: уверенность {best['door'].confidence:.2f}")
-
-        return final_doors
+    def _aggregate(self, candidates: DetectionTable,
+                   camera_poses: Optional[List] = None) -> DetectionTable:
+        """
+        Группировка детекций одной двери: по точке касания пола, если известны
+        позы камер, иначе по позиции на стене. Найденные на нескольких фото - увереннее.
+        """
+        keys = candidates['position']
+        if camera_poses is not None:
+            keys, _ = self.associator.associate(candidates, camera_poses, height=0.0)
+        best, counts, first = candidates.group_best(keys)
+
+        keep = (counts >= 2) | (candidates['confidence'][first] > 0.6)
+        result, counts = candidates[best[keep]], counts[keep]
+
+        for row in result.data:
+            print(f"    ✓ Дверь на {WALL_POSITIONS[row['position']]} стене: "
+                  f"уверенность {row['confidence']:.2f}")
+
+        confidence_boost = 1.0 + (counts - 1) * 0.15
+        result.data['confidence'] = np.minimum(result['confidence'] * confidence_boost, 1.0)
+        result.data['support'] = counts
+        result.data['flags'] |= np.where(counts >= 2, FLAG_VERIFIED, 0).astype(np.uint8)
+        return result
+
+    def analyze_multiple_images(self, images: List[np.ndarray],
+                                camera_poses: Optional[List] = None) -> List[Dict]:
+        """
+        Анализ нескольких изображений для поиска дверей.
+
+        Returns:
+            Список обнаруженных дверей с агрегированной информацией
+        """
+        return self.analyze_table(images, camera_poses).to_legacy()
 
 
 def map_door_to_floorplan(detected_doors: List[Dict],
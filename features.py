@@ -2,17 +2,88 @@ import cv2
 import numpy as np
 
 
+# Поддерживаемые форматы хранения дескрипторов
+DESCRIPTOR_FORMATS = ('float32', 'uint8', 'pca16')
+
+
+def quantize_descriptors(descriptors):
+    """
+    Квантование SIFT дескрипторов в uint8.
+
+    OpenCV уже масштабирует компоненты SIFT в диапазон 0..255,
+    поэтому округление почти не теряет информации, а память сокращается в 4 раза.
+    """
+    if descriptors is None:
+        return None
+    return np.clip(np.rint(descriptors), 0, 255).astype(np.uint8)
+
+
+class PCADescriptorReducer:
+    """Понижение размерности дескрипторов методом главных компонент (float16)."""
+
+    def __init__(self, n_components=64):
+        self.n_components = n_components
+        self.mean = None
+        self.components = None
+
+    @property
+    def is_fitted(self):
+        return self.components is not None
+
+    def fit(self, descriptors):
+        """Обучение базиса PCA на выборке дескрипторов."""
+        data = np.asarray(descriptors, dtype=np.float32)
+        if len(data) < 2:
+            raise ValueError("Недостаточно дескрипторов для обучения PCA")
+
+        self.mean = data.mean(axis=0)
+        # Собственные векторы ковариационной матрицы 128×128
+        cov = np.cov(data - self.mean, rowvar=False)
+        eigvals, eigvecs = np.linalg.eigh(cov)
+        order = np.argsort(eigvals)[::-1][:self.n_components]
+        self.components = eigvecs[:, order].astype(np.float32)
+        return self
+
+    def transform(self, descriptors):
+        """Проекция дескрипторов в компактное пространство."""
+        if descriptors is None:
+            return None
+        if not self.is_fitted:
+            raise RuntimeError("PCA не обучен: сначала вызовите fit()")
+        projected = (np.asarray(descriptors, dtype=np.float32) - self.mean) @ self.components
+        return projected.astype(np.float16)
+
+
 class FeatureDetector:
     """Детектор ключевых точек SIFT."""
 
-    def __init__(self, max_features=5000):
+    def __init__(self, max_features=5000, descriptor_format='float32', pca=None):
+        if descriptor_format not in DESCRIPTOR_FORMATS:
+            raise ValueError(f"Неизвестный формат дескрипторов: {descriptor_format}")
+
         self.detector = cv2.SIFT_create(nfeatures=max_features)
+        self.max_features = max_features
+        self.descriptor_format = descriptor_format
+        self.pca = pca if pca is not None else PCADescriptorReducer()
 
     def detect(self, image):
         """Детекция ключевых точек."""
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         keypoints, descriptors = self.detector.detectAndCompute(gray, None)
-        return keypoints, descriptors
+        return keypoints, self.compact(descriptors)
+
+    def compact(self, descriptors):
+        """Перевод float32 дескрипторов в выбранный компактный формат."""
+        if descriptors is None or self.descriptor_format == 'float32':
+            return descriptors
+
+        if self.descriptor_format == 'uint8':
+            return quantize_descriptors(descriptors)
+
+        # pca16: базис обучается на первом изображении и переиспользуется
+        if not self.pca.is_fitted:
+            self.pca.fit(descriptors)
+        return self.pca.transform(descriptors)
 
 
 class FeatureMatcher:
@@ -27,6 +98,14 @@ class FeatureMatcher:
         if desc1 is None or desc2 is None:
             return []
 
+        if desc1.dtype != desc2.dtype:
+            raise ValueError(f"Разные форматы дескрипторов: {desc1.dtype} и {desc2.dtype}")
+
+        # BFMatcher работает с uint8 и float32; float16 расширяем только на время пары
+        if desc1.dtype == np.float16:
+            desc1 = desc1.astype(np.float32)
+            desc2 = desc2.astype(np.float32)
+
         # k-NN поиск
         matches = self.matcher.knnMatch(desc1, desc2, k=2)
 
@@ -58,3 +137,51 @@ class FeatureMatcher:
         inliers = [m for m, valid in zip(matches, mask) if valid]
 
         return inliers, F
+
+
+def compare_descriptor_formats(image1, image2, max_features=5000, ratio_threshold=0.75,
+                               n_components=64):
+    """
+    Сравнение форматов дескрипторов: память и точность сопоставления.
+
+    Эталоном служат соответствия float32 SIFT; для компактных форматов считается доля
+    эталонных пар (queryIdx, trainIdx), которые найдены повторно.
+
+    Returns:
+        Список словарей с полями format, bytes, bytes_per_feature, matches, agreement
+    """
+    detector = FeatureDetector(max_features=max_features)
+    matcher = FeatureMatcher(ratio_threshold=ratio_threshold)
+
+    kp1, desc1 = detector.detect(image1)
+    kp2, desc2 = detector.detect(image2)
+    if desc1 is None or desc2 is None:
+        return []
+
+    reference = {(m.queryIdx, m.trainIdx) for m in matcher.match(desc1, desc2)}
+
+    pca = PCADescriptorReducer(n_components).fit(desc1)
+    variants = {
+        'float32': (desc1, desc2),
+        'uint8': (quantize_descriptors(desc1), quantize_descriptors(desc2)),
+        'pca16': (pca.transform(desc1), pca.transform(desc2)),
+    }
+
+    report = []
+    print(f"\n{'Формат':<10}{'Байт/точка':>12}{'Всего, КБ':>12}{'Соотв.':>10}{'Совпадение':>12}")
+    for name, (d1, d2) in variants.items():
+        pairs = {(m.queryIdx, m.trainIdx) for m in matcher.match(d1, d2)}
+        agreement = len(pairs & reference) / len(reference) if reference else 0.0
+        total_bytes = d1.nbytes + d2.nbytes
+
+        report.append({
+            'format': name,
+            'bytes': total_bytes,
+            'bytes_per_feature': d1.itemsize * d1.shape[1],
+            'matches': len(pairs),
+            'agreement': agreement
+        })
+        print(f"{name:<10}{d1.itemsize * d1.shape[1]:>12}{total_bytes / 1024:>12.1f}"
+              f"{len(pairs):>10}{agreement:>12.1%}")
+
+    return report
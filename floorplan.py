@@ -1,18 +1,104 @@
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.patches import Rectangle, FancyBboxPatch
+import os
+import sys
 import numpy as np
 import cv2
-from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
 
+from color_stats import WALL_EDGE_ZONES, photo_colors
+from plan_layout import PLAN_COLORS, build_layout
+from plan_raster import render_raster
+from plan_svg import write_svg
 
-class FloorplanDrawer:
-    """Рисование планировки комнаты."""
 
-    def __init__(self, pixels_per_meter=100):
+@dataclass
+class FloorplanRender:
+    """
+    Отрисованная планировка для следующих этапов без чтения PNG с диска.
+
+    Хранит растр (как в PNG) и цвета из фото, которыми рисовала
+    планировка; запись PNG идёт в фоне (saved).
+    """
+    image: Optional[np.ndarray]  # RGB (H, W, 3); None для SVG
+    wall_color: Optional[Tuple[float, float, float]] = None  # Цвет стен из фото, 0..1
+    floor_color: Optional[Tuple[float, float, float]] = None  # Цвет пола из фото, 0..1
+    output_path: Optional[str] = None
+    saved: Optional[Future] = None
+
+    def wait(self):
+        """Дождаться записи PNG (исключение записи пробрасывается)."""
+        if self.saved is not None:
+            self.saved.result()
+
+
+class FloorplanDrawer:
+    """
+    Рисование планировки комнаты.
+
+    Бэкенды: 'opencv' - быстрый растр примитивами cv2 (plan_raster),
+    'matplotlib' - прежняя отрисовка фигурой (сглаженный текст и
+    стрелки, но сотни миллисекунд и тяжёлый импорт). Файл .svg пишется
+    векторно (plan_svg) независимо от бэкенда.
+    """
+
+    DPI = 150
+    PAD_INCHES = 0.1  # Поля вокруг содержимого, как bbox_inches='tight'
+    BACKENDS = ('opencv', 'matplotlib')
+
+    def __init__(self, pixels_per_meter=100, backend: str = 'opencv'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд планировки: {backend}")
         self.pixels_per_meter = pixels_per_meter
+        self.backend = backend
+
+    def draw(self, room_dims, windows, doors=None, output_path=None, images=None) -> FloorplanRender:
+        """
+        Отрисовка планировки.
+
+        PNG пишется в фоновом потоке из уже отрисованного растра; растр и
+        цвета из фото возвращаются для 3D этапа (FloorplanRender). Для
+        output_path с расширением .svg пишется векторный план без растра.
+        Без output_path планировка показывается в окне (как plt.show());
+        где окна недоступны, растр берётся из FloorplanRender.image.
+        """
+        # Определяем цвет стен (и пола - для 3D этапа) из фотографий
+        wall_rgb, floor_rgb = self._get_photo_colors(images) if images else (None, None)
+        if wall_rgb:
+            print("  Определен доминирующий цвет стен: #{:02x}{:02x}{:02x}".format(*wall_rgb))
+
+        scale = self.pixels_per_meter * self.DPI / 100
+        vector = bool(output_path) and output_path.lower().endswith('.svg')
+        if vector:
+            image = None
+            write_svg(output_path, build_layout(room_dims, windows, doors, wall_rgb or PLAN_COLORS['lightgray']),
+                      scale, self.DPI)
+        elif self.backend == 'matplotlib':
+            image = self._draw_matplotlib(room_dims, windows, doors, wall_rgb, show=not output_path)
+        else:
+            layout = build_layout(room_dims, windows, doors, wall_rgb or PLAN_COLORS['lightgray'])
+            image = render_raster(layout, scale, self.DPI)
+
+        render = FloorplanRender(
+            image=image,
+            wall_color=tuple(c / 255.0 for c in wall_rgb) if wall_rgb else None,
+            floor_color=tuple(c / 255.0 for c in floor_rgb) if floor_rgb else None,
+            output_path=output_path,
+        )
+        if vector:
+            print(f"\nПланировка сохранена: {output_path}")
+        elif output_path:
+            render.saved = _write_png_async(output_path, render.image)
+            print(f"\nПланировка сохраняется: {output_path}")
+        elif self.backend != 'matplotlib':  # matplotlib уже показал фигуру
+            _show_raster(render.image)
+        return render
+
+    def _draw_matplotlib(self, room_dims, windows, doors, wall_rgb, show: bool = False) -> np.ndarray:
+        """Отрисовка фигурой matplotlib; растр как savefig(dpi=150, bbox_inches='tight')."""
+        import matplotlib.pyplot as plt
+        from matplotlib.patches import Rectangle
 
-    def draw(self, room_dims, windows, doors=None, output_path=None, images=None):
         # Размеры изображения
         margin = 1.0  # метры
         total_width = room_dims.width + 2 * margin
@@ -22,9 +108,7 @@ class FloorplanDrawer:
         fig_height = total_length * self.pixels_per_meter / 100
 
         fig, ax = plt.subplots(1, 1, figsize=(fig_width, fig_height))
-
-        # Определяем цвет стен из фотографий
-        wall_color = self._get_dominant_wall_color(images) if images else 'lightgray'
+        wall_color = '#{:02x}{:02x}{:02x}'.format(*wall_rgb) if wall_rgb else 'lightgray'
 
         # Рисуем комнату (стены)
         room_rect = Rectangle(
@@ -70,68 +154,47 @@ class FloorplanDrawer:
 
         plt.tight_layout()
 
-        if output_path:
-            plt.savefig(output_path, dpi=150, bbox_inches='tight',
-                        facecolor='white', edgecolor='none')
-            print(f"\nПланировка сохранена: {output_path}")
-        else:
+        image = self._render_buffer(fig)
+        if show:
             plt.show()
-
-        plt.close()
-
-    def _get_dominant_wall_color(self, images):
-        """Определение доминирующего цвета стен из фотографий."""
-        all_colors = []
-
-        for img in images:
-            if img is None:
-                continue
-
-            h, w = img.shape[:2]
-
-            # Берем края изображения (где обычно стены)
-            edge_width = w // 8
-
-            # Левый край
-            left_edge = img[:, :edge_width]
-            # Правый край
-            right_edge = img[:, -edge_width:]
-            # Верхний край (потолок)
-            top_edge = img[:edge_width, :]
-
-            # Собираем цвета с краев
-            for edge in [left_edge, right_edge, top_edge]:
-                # Уменьшаем для скорости
-                small = cv2.resize(edge, (50, 50))
-                # Конвертируем в RGB
-                rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
-                # Фильтруем темные и светлые пиксели
-                pixels = rgb.reshape(-1, 3)
-                brightness = np.mean(pixels, axis=1)
-                # Берем пиксели со средней яркостью (не тени, не блики)
-                mask = (brightness > 50) & (brightness < 200)
-                valid_pixels = pixels[mask]
-
-                if len(valid_pixels) > 0:
-                    # Группируем похожие цвета
-                    quantized = (valid_pixels // 30) * 30 + 15
-                    all_colors.extend(quantized)
-
-        if not all_colors:
-            return 'lightgray'
-
-        # Находим самый частый цвет
-        color_counts = Counter(map(tuple, all_colors))
-        most_common = color_counts.most_common(1)[0][0]
-
-        # Конвертируем в hex для matplotlib
-        hex_color = '#{:02x}{:02x}{:02x}'.format(most_common[0], most_common[1], most_common[2])
-
-        print(f"  Определен доминирующий цвет стен: {hex_color}")
-        return hex_color
+        plt.close(fig)
+        return image
+
+    def _render_buffer(self, fig) -> np.ndarray:
+        """
+        Растр фигуры (RGB) с обрезкой по содержимому, как
+        savefig(dpi=DPI, bbox_inches='tight', facecolor='white').
+        """
+        fig.set_dpi(self.DPI)
+        fig.patch.set_facecolor('white')
+        fig.canvas.draw()
+        rgba = np.asarray(fig.canvas.buffer_rgba())
+        height, width = rgba.shape[:2]
+
+        # Границы содержимого в дюймах (начало - снизу слева) -> строки и столбцы
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(self.PAD_INCHES)
+        x0 = int(round(bbox.x0 * self.DPI))
+        y0 = height - int(round(bbox.y1 * self.DPI))
+        x1 = x0 + int(bbox.width * self.DPI)
+        y1 = y0 + int(bbox.height * self.DPI)
+        return np.ascontiguousarray(rgba[max(y0, 0):min(y1, height), max(x0, 0):min(x1, width), :3])
+
+    def _get_photo_colors(self, images):
+        """
+        Доминирующие цвета стен (края кадров) и пола из фотографий.
+
+        Returns:
+            (wall, floor) - цвета 0..255 или None
+        """
+        stats = photo_colors(images)
+        walls = stats.dominant(list(WALL_EDGE_ZONES))
+        floors = stats.dominant(['floor'])
+        return (walls[0] if walls else None), (floors[0] if floors else None)
 
     def _draw_window(self, ax, window, margin, room_dims):
         """Рисование окна."""
+        from matplotlib.patches import Rectangle
+
         # Определяем позицию окна на стене
         if window.wall == 'right':
             x = margin + room_dims.width - 0.15  # Небольшой отступ от стены
@@ -193,6 +256,8 @@ class FloorplanDrawer:
 
     def _draw_door(self, ax, door, margin, room_dims):
         """Рисование двери."""
+        from matplotlib.patches import Rectangle
+
         # Определяем позицию двери на стене
         door_width_draw = 0.15  # Толщина линии двери на плане
 
@@ -327,7 +392,8 @@ class FloorplanDrawer:
         pass
 
 
-def create_simple_floorplan(width, length, windows_count=1, doors_count=1, output_path=None):
+def create_simple_floorplan(width, length, windows_count=1, doors_count=1, output_path=None,
+                            backend: str = 'opencv'):
     """Создание простой планировки с заданным количеством окон и дверей."""
     from room_detector import RoomDimensions, Window, Door
 
@@ -349,5 +415,34 @@ def create_simple_floorplan(width, length, windows_count=1, doors_count=1, outpu
         doors.append(Door(x=length * 0.15, width=0.9, height=2.0, wall='right',
                           has_glass=True, is_open=True))
 
-    drawer = FloorplanDrawer()
-    drawer.draw(room, windows, doors, output_path)
\ No newline at end of file
+    drawer = FloorplanDrawer(backend=backend)
+    render = drawer.draw(room, windows, doors, output_path)
+    render.wait()
+    return render
+
+
+def _show_raster(image: np.ndarray, title: str = "Floorplan"):
+    """Показ RGB растра в окне OpenCV до нажатия клавиши."""
+    # Без дисплея GUI-сборка OpenCV аварийно завершает процесс, а не бросает исключение
+    if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        print("  Нет дисплея для показа планировки: используйте FloorplanRender.image")
+        return
+    try:
+        cv2.imshow(title, cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+        cv2.waitKey(0)
+        cv2.destroyWindow(title)
+    except cv2.error:
+        print("  OpenCV собран без GUI: используйте FloorplanRender.image")
+
+
+# Один фоновый поток записи: PNG кодируется, пока идут следующие этапы
+_writer = ThreadPoolExecutor(max_workers=1)
+
+
+def _write_png_async(path: str, image: np.ndarray) -> Future:
+    """Запись RGB растра в PNG в фоновом потоке (cv2 отпускает GIL)."""
+    def write():
+        if not cv2.imwrite(path, cv2.cvtColor(image, cv2.COLOR_RGB2BGR)):
+            raise IOError(f"Не удалось сохранить планировку: {path}")
+        return path
+    return _writer.submit(write)
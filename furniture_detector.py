@@ -4,6 +4,11 @@ from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from association import DetectionAssociator
+from detections import DetectionTable, FLAG_VERIFIED, nms_keep
+from occupancy import OccupancyGrid
+from layout_optimizer import LayoutOptimizer
+
 
 class FurnitureType(Enum):
     """Типы мебели и предметов."""
@@ -41,13 +46,41 @@ class BoundingBox3D:
     dimensions: np.ndarray  # [width, height, depth]
     rotation: float = 0.0  # Поворот вокруг Y (вертикальной оси) в радианах
 
+    @property
+    def half_extents(self) -> np.ndarray:
+        """Полуразмеры осевой коробки, описанной вокруг повёрнутой."""
+        if self.rotation == 0.0:
+            return self.dimensions / 2
+        c, s = abs(np.cos(self.rotation)), abs(np.sin(self.rotation))
+        w, h, d = self.dimensions / 2
+        return np.array([c * w + s * d, h, s * w + c * d])
+
     @property
     def min_corner(self) -> np.ndarray:
-        return self.center - self.dimensions / 2
+        return self.center - self.half_extents
 
     @property
     def max_corner(self) -> np.ndarray:
-        return self.center + self.dimensions / 2
+        return self.center + self.half_extents
+
+    def rotation_matrix(self) -> np.ndarray:
+        """Матрица поворота вокруг оси Y."""
+        c, s = np.cos(self.rotation), np.sin(self.rotation)
+        return np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]])
+
+    def corners(self) -> np.ndarray:
+        """
+        8 вершин коробки (8, 3) с учётом поворота.
+        Порядок: нижние -Z (0-1), верхние -Z (2-3), затем то же для +Z (4-7).
+        """
+        signs = np.array([
+            [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+            [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1],
+        ])
+        local = signs * (self.dimensions / 2)
+        if self.rotation == 0.0:
+            return self.center + local
+        return self.center + local @ self.rotation_matrix().T
 
 
 class FurnitureDetectorCV:
@@ -67,7 +100,13 @@ class FurnitureDetectorCV:
         FurnitureType.UNKNOWN: {'width': (0.3, 2.0), 'height': (0.3, 2.0), 'depth': (0.3, 2.0)},
     }
 
-    def __init__(self, min_area=5000, max_area=500000):
+    def __init__(self, min_area=5000, max_area=500000, room_transform=None):
+        """
+        Args:
+            room_transform: матрица 3×3 плоскость пола -> комната (метры) для
+                точек касания пола; без неё (и без set_room_corners) мебель
+                расставляется свободно
+        """
         self.min_area = min_area
         self.max_area = max_area
 
@@ -105,11 +144,21 @@ class FurnitureDetectorCV:
             },
         }
 
+        # Сопоставление детекций между фото по позам камер
+        self.associator = DetectionAssociator(room_transform=room_transform)
+
         # Фоновое вычитание для статичных камер (опционально)
         self.background_subtractor = cv2.createBackgroundSubtractorMOG2(
             history=500, varThreshold=16, detectShadows=False
         )
 
+    def set_room_corners(self, corner_pixels: np.ndarray, camera_pose, image_shape, room_dims):
+        """
+        Привязка плоскости пола к комнате по углам пола на одном фото
+        (DetectionAssociator.fit_room_transform).
+        """
+        return self.associator.fit_room_transform(corner_pixels, camera_pose, image_shape[:2], room_dims)
+
     def detect_furniture(self, image: np.ndarray,
                          room_floor_y: Optional[float] = None) -> List[DetectedFurniture]:
         """
@@ -305,38 +354,13 @@ class FurnitureDetectorCV:
         if len(furniture) <= 1:
             return furniture
 
-        # Сортируем по уверенности
-        sorted_furniture = sorted(furniture, key=lambda f: f.confidence, reverse=True)
-
-        keep = []
-        for f1 in sorted_furniture:
-            overlap = False
-            for f2 in keep:
-                if self._iou(f1, f2) > iou_threshold:
-                    overlap = True
-                    break
-            if not overlap:
-                keep.append(f1)
-
-        return keep
+        # Приоритет - по уверенности
+        boxes = np.array([(f.x, f.y, f.width, f.height) for f in furniture])
+        order = np.argsort(-np.array([f.confidence for f in furniture]), kind='stable')
+        return [furniture[i] for i in nms_keep(boxes, iou_threshold, order)]
 
-    def _iou(self, f1: DetectedFurniture, f2: DetectedFurniture) -> float:
-        """Вычисление IoU двух прямоугольников."""
-        x1 = max(f1.x, f2.x)
-        y1 = max(f1.y, f2.y)
-        x2 = min(f1.x + f1.width, f2.x + f2.width)
-        y2 = min(f1.y + f1.height, f2.y + f2.height)
-
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        area1 = f1.width * f1.height
-        area2 = f2.width * f2.height
-        union = area1 + area2 - intersection
-
-        return intersection / union if union > 0 else 0
-
-    def analyze_multiple_images(self, images: List[np.ndarray],
-                                camera_poses: Optional[List[np.ndarray]] = None
-                                ) -> List[Dict]:
+    def analyze_table(self, images: List[np.ndarray],
+                      camera_poses: Optional[List[np.ndarray]] = None) -> DetectionTable:
         """
         Анализ нескольких изображений для 3D реконструкции мебели.
 
@@ -345,79 +369,62 @@ class FurnitureDetectorCV:
             camera_poses: Позы камер (опционально, для триангуляции)
 
         Returns:
-            Список агрегированной информации о мебели
+            Таблица агрегированной мебели (по строке на объект)
         """
-        all_detections = []
+        tables = []
 
         for i, img in enumerate(images):
             print(f"  Фото {i + 1}: анализ мебели...")
             detections = self.detect_furniture(img)
             print(f"    Найдено {len(detections)} объектов")
+            tables.append(DetectionTable.from_detections(detections, i, img.shape,
+                                                         labels=tuple(FurnitureType)))
+
+        all_detections = DetectionTable.concat(tables, labels=tuple(FurnitureType))
+
+        # Группировка по типу и положению в комнате
+        return self._group_detections(all_detections, camera_poses)
 
-            for det in detections:
-                all_detections.append({
-                    'photo_idx': i,
-                    'furniture': det,
-                    'camera_pose': camera_poses[i] if camera_poses else None
-                })
-
-        # Группировка по типу и примерной позиции
-        grouped = self._group_detections(all_detections)
-
-        return grouped
-
-    def _group_detections(self, detections: List[Dict]) -> List[Dict]:
-        """Группировка детекций одного объекта с разных фото."""
-        if not detections:
-            return []
-
-        # Простая кластеризация по типу и относительной позиции
-        groups = []
-
-        for det in detections:
-            furniture = det['furniture']
-            matched = False
-
-            for group in groups:
-                # Проверяем совпадение типа
-                if group['type'] != furniture.furniture_type:
-                    continue
-
-                # Проверяем близость позиций (если есть camera_pose)
-                if det['camera_pose'] is not None and group.get('camera_poses'):
-                    # TODO: Реализовать триангуляцию для точной позиции
-                    pass
-
-                # Простая проверка по photo_idx (разные фото)
-                if det['photo_idx'] != group['photo_idx']:
-                    group['detections'].append(det)
-                    matched = True
-                    break
-
-            if not matched:
-                groups.append({
-                    'type': furniture.furniture_type,
-                    'photo_idx': det['photo_idx'],
-                    'detections': [det],
-                    'camera_poses': [det['camera_pose']] if det['camera_pose'] else []
-                })
-
-        # Формируем финальный результат
-        result = []
-        for group in groups:
-            if len(group['detections']) >= 1:
-                # Берем лучшую детекцию
-                best = max(group['detections'],
-                           key=lambda d: d['furniture'].confidence)
-
-                result.append({
-                    'type': group['type'],
-                    'confidence': best['furniture'].confidence,
-                    'dimensions_2d': (best['furniture'].width, best['furniture'].height),
-                    'depth_estimate': best['furniture'].depth_estimate,
-                    'verified': len(group['detections']) >= 2
-                })
+    def analyze_multiple_images(self, images: List[np.ndarray],
+                                camera_poses: Optional[List[np.ndarray]] = None
+                                ) -> List[Dict]:
+        """Результат analyze_table в виде списка словарей."""
+        return self.analyze_table(images, camera_poses).to_legacy()
 
+    def _group_detections(self, detections: DetectionTable,
+                          camera_poses: Optional[List] = None) -> DetectionTable:
+        """
+        Группировка детекций одного объекта с разных фото.
+
+        С позами камер детекции сопоставляются по точке касания пола
+        (DetectionAssociator): группа - один объект, по детекции с фото.
+        Без поз детекция присоединяется к первой группе своего типа,
+        основанной на другом фото: каждая детекция типа с первого фото,
+        где он встретился, основывает свою группу, остальные попадают в
+        группу первой детекции типа.
+        """
+        if not len(detections):
+            return detections
+
+        codes = detections['type_code']
+        centroids = None
+
+        if camera_poses is not None:
+            founder, centroids = self.associator.associate(detections, camera_poses, keys=codes)
+        else:
+            index = np.arange(len(detections))
+            photos = detections['photo']
+            _, type_first, type_inverse = np.unique(codes, return_index=True, return_inverse=True)
+            first_of_type = type_first[type_inverse]
+            founder = np.where(photos == photos[first_of_type], index, first_of_type)
+
+        best, counts, _ = detections.group_best(founder)
+        result = detections[best]
+        result.data['support'] = counts
+        result.data['flags'] |= np.where(counts >= 2, FLAG_VERIFIED, 0).astype(np.uint8)
+        if centroids is not None:
+            result.data['floor'] = centroids
+            result.data['room'] = self.associator.room_coordinates(centroids)
         return result
 
 
@@ -426,13 +433,38 @@ class Furniture3DReconstructor:
     Реконструкция 3D коробок (bounding boxes) для мебели.
     """
 
-    def __init__(self, room_dims):
+    # Приоритеты зон размещения (меньше = важнее)
+    PRIORITY_CORNER = 0
+    PRIORITY_WALL = 1
+    PRIORITY_CENTER = 2
+
+    def __init__(self, room_dims, grid_steps: int = 5, n_random: int = 10, seed: int = 42,
+                 orientations: Tuple[float, ...] = (0.0, np.pi / 2, np.pi / 4, 3 * np.pi / 4),
+                 optimize_layout: bool = False, optimizer_time: float = 1.0):
         self.room_width = room_dims.width
         self.room_length = room_dims.length
         self.room_height = room_dims.height
 
-        # Сетка для размещения объектов (избегаем пересечений)
-        self.occupied_regions = []
+        # Плотность кандидатов: шагов сетки вдоль стен и случайных точек в центре
+        self.grid_steps = grid_steps
+        self.n_random = n_random
+        self.seed = seed
+        # Повороты вокруг вертикали в порядке предпочтения (коробка симметрична на 180°)
+        self.orientations = np.asarray(orientations, dtype=np.float64)
+
+        # Карта занятости пола (двери, окна, уже поставленная мебель)
+        self.occupancy = None
+        self.window_margin = 0.3
+        self.door_margin = 0.5
+        self.furniture_margin = 0.2
+
+        # Точка касания пола дальше этого от стен (м) - ошибка привязки:
+        # такой объект расставляется свободно, а не прижимается к стене
+        self.anchor_tolerance = 0.5
+
+        # Глобальная доводка жадной расстановки отжигом
+        self.optimize_layout = optimize_layout
+        self.optimizer_time = optimizer_time
 
     def reconstruct_furniture_3d(self, detected_furniture: List[Dict],
                                  windows: List, doors: List) -> List[BoundingBox3D]:
@@ -448,39 +480,170 @@ class Furniture3DReconstructor:
             Список 3D коробок
         """
         boxes_3d = []
+        self.occupancy = self._build_occupancy(windows, doors)
 
         print(f"\nРеконструкция 3D мебели: {len(detected_furniture)} объектов")
 
-        for i, furn in enumerate(detected_furniture, 1):
-            ftype = furn['type']
+        # Определяем размеры на основе типа
+        items = [(furn['type'], self._estimate_dimensions(furn['type'], furn.get('dimensions_2d')))
+                 for furn in detected_furniture]
 
-            # Определяем размеры на основе типа
-            dims = self._estimate_dimensions(ftype, furn.get('dimensions_2d'))
+        # Объекты с известной точкой касания пола ставятся туда, где сфотографированы
+        anchors = self._anchored_positions(detected_furniture, items)
+        fixed = np.all(np.isfinite(anchors), axis=1)
+        placements = [(anchors[k], 0.0) if fixed[k] else None for k in range(len(items))]
 
-            # Находим свободную позицию в комнате
-            position = self._find_placement_position(
-                dims, windows, doors, boxes_3d
-            )
+        for k in np.flatnonzero(fixed):
+            box = self._make_box(items[k][1], *placements[k])
+            self._add_box_to_occupancy(self.occupancy, box)
 
-            if position is None:
-                print(f"  ! Не удалось разместить {ftype.value} #{i}")
-                continue
+        for i, (ftype, dims) in enumerate(items, 1):
+            if fixed[i - 1]:
+                placement = placements[i - 1]
+            else:
+                # Находим свободную позицию и ориентацию в комнате
+                placement = self._find_placement_position(
+                    dims, windows, doors, boxes_3d
+                )
+                placements[i - 1] = placement
 
-            # Создаем коробку
-            box = BoundingBox3D(
-                center=position,
-                dimensions=np.array([dims['width'], dims['height'], dims['depth']]),
-                rotation=0.0  # Можно добавить ориентацию позже
-            )
+            if placement is None:
+                if not self.optimize_layout:
+                    print(f"  ! Не удалось разместить {ftype.value} #{i}")
+                continue
 
+            box = self._make_box(dims, *placement)
             boxes_3d.append(box)
-            self.occupied_regions.append(self._get_region_2d(box))
+            if not fixed[i - 1]:
+                self._add_box_to_occupancy(self.occupancy, box)
+
+            if not self.optimize_layout:
+                self._report_box(ftype, i, box)
 
-            print(f"  ✓ {ftype.value} #{i}: {dims['width']:.2f}×{dims['height']:.2f}×{dims['depth']:.2f}м "
-                  f"на позиции ({position[0]:.2f}, {position[1]:.2f}, {position[2]:.2f})")
+        if not self.optimize_layout:
+            return boxes_3d
+
+        optimized = self._optimize_placements(items, placements, windows, doors, fixed)
+        if sum(p is not None for p in optimized) >= len(boxes_3d):
+            placements = optimized
+
+        boxes_3d = []
+        for i, ((ftype, dims), placement) in enumerate(zip(items, placements), 1):
+            if placement is None:
+                print(f"  ! Не удалось разместить {ftype.value} #{i}")
+                continue
+            box = self._make_box(dims, *placement)
+            boxes_3d.append(box)
+            self._report_box(ftype, i, box)
 
         return boxes_3d
 
+    def _anchored_positions(self, detected_furniture: List[Dict],
+                            items: List[Tuple[FurnitureType, Dict]]) -> np.ndarray:
+        """
+        Центры коробок по точкам касания пола ('floor_position' в координатах
+        комнаты), все объекты сразу; коробка сдвигается внутрь стен.
+        Точки дальше anchor_tolerance за стенами не используются.
+
+        Returns:
+            Массив (N, 3); строки NaN - позиция не известна
+        """
+        if not items:
+            return np.zeros((0, 3))
+
+        floor = np.array([furn.get('floor_position', (np.nan, np.nan))
+                          for furn in detected_furniture], dtype=np.float64)
+        sizes = np.array([[d['width'], d['height'], d['depth']] for _, d in items])
+
+        room = np.array([self.room_width, self.room_length])
+        outside = np.any((floor < -self.anchor_tolerance) | (floor > room + self.anchor_tolerance), axis=1)
+        floor[outside] = np.nan
+
+        margin = self.occupancy.wall_margin if self.occupancy is not None else 0.0
+        half = sizes[:, [0, 2]] / 2
+        lo = margin + half
+        hi = room - margin - half
+        floor = np.minimum(np.maximum(floor, lo), np.maximum(hi, lo))
+
+        centers = np.column_stack([floor[:, 0], sizes[:, 1] / 2, floor[:, 1]])
+        centers[sizes[:, 1] / 2 > self.room_height] = np.nan
+        return centers
+
+    def _make_box(self, dims: Dict, position: np.ndarray, rotation: float) -> BoundingBox3D:
+        """Коробка по размерам и найденному размещению."""
+        return BoundingBox3D(
+            center=position,
+            dimensions=np.array([dims['width'], dims['height'], dims['depth']]),
+            rotation=rotation
+        )
+
+    def _report_box(self, ftype: FurnitureType, index: int, box: BoundingBox3D):
+        width, height, depth = box.dimensions
+        position = box.center
+        print(f"  ✓ {ftype.value} #{index}: {width:.2f}×{height:.2f}×{depth:.2f}м "
+              f"на позиции ({position[0]:.2f}, {position[1]:.2f}, {position[2]:.2f}), "
+              f"поворот {np.degrees(box.rotation):.0f}°")
+
+    def _optimize_placements(self, items: List[Tuple[FurnitureType, Dict]],
+                             placements: List, windows, doors,
+                             fixed: Optional[np.ndarray] = None) -> List:
+        """
+        Совместная оптимизация раскладки, начиная с жадного результата.
+
+        Объекты с фиксированной позицией (fixed) остаются на месте и служат
+        препятствиями. Не поставленные жадно объекты стартуют из центра
+        комнаты. Итог проверяется точно (SAT) в порядке детекций; объект,
+        оставшийся в конфликте, ищет место обычным перебором кандидатов.
+
+        Returns:
+            Список (центр, поворот) или None для каждого объекта
+        """
+        fixed = np.zeros(len(items), dtype=bool) if fixed is None else fixed
+        movable = np.flatnonzero(~fixed)
+        if not len(movable):
+            return list(placements)
+
+        base = self._build_occupancy(windows, doors)
+        placed_boxes = []
+        for k in np.flatnonzero(fixed):
+            box = self._make_box(items[k][1], *placements[k])
+            placed_boxes.append(box)
+            self._add_box_to_occupancy(base, box)
+        obstacles = np.array([r[:5] for r in base.rects]) if base.rects else None
+
+        sizes = np.array([[d['width'], d['height'], d['depth']] for _, d in items])[movable]
+        start = [placements[k] for k in movable]
+        positions = np.array([(p[0][0], p[0][2]) if p is not None
+                              else (self.room_width / 2, self.room_length / 2)
+                              for p in start])
+        angles = np.array([p[1] if p is not None else self.orientations[0] for p in start])
+
+        optimizer = LayoutOptimizer(self.room_width, self.room_length, obstacles,
+                                    margin=self.furniture_margin,
+                                    wall_margin=base.wall_margin, seed=self.seed)
+        positions, angles, cost = optimizer.optimize(sizes, positions, angles,
+                                                     orientations=self.orientations,
+                                                     time_budget=self.optimizer_time)
+        print(f"  Оптимизация раскладки: стоимость {cost:.3f}")
+
+        self.occupancy = base
+        result = list(placements)
+        for k, (x, z), angle, size in zip(movable, positions, angles, sizes):
+            dims = items[k][1]
+            width, height, depth = size
+            if height / 2 <= self.room_height and base.is_free(x, z, width, depth, height, angle):
+                placement = (np.array([x, height / 2, z]), float(angle))
+            else:
+                placement = self._find_placement_position(dims, windows, doors, placed_boxes)
+
+            result[k] = placement
+            if placement is not None:
+                box = self._make_box(dims, *placement)
+                placed_boxes.append(box)
+                self._add_box_to_occupancy(base, box)
+
+        return result
+
     def _estimate_dimensions(self, ftype: FurnitureType,
                              dims_2d: Optional[Tuple[int, int]]) -> Dict:
         """Оценка 3D размеров на основе типа и 2D проекции."""
@@ -509,167 +672,103 @@ class Furniture3DReconstructor:
         }
 
     def _find_placement_position(self, dims: Dict, windows, doors,
-                                 existing_boxes: List[BoundingBox3D]) -> Optional[np.ndarray]:
+                                 existing_boxes: List[BoundingBox3D]
+                                 ) -> Optional[Tuple[np.ndarray, float]]:
         """
-        Поиск свободной позиции для размещения мебели.
-        Использует эвристики для типичного расположения.
+        Поиск свободной позиции и ориентации для размещения мебели.
+        Все пары (кандидат, поворот) проверяются одним вызовом; предпочтение -
+        порядку поворотов, затем приоритету зоны, затем порядку генерации.
+
+        Returns:
+            (центр коробки, поворот) или None
         """
         width, depth = dims['width'], dims['depth']
         height = dims['height']
 
-        # Попытки размещения (приоритетные зоны)
-        candidates = self._generate_candidate_positions(width, depth)
+        # Мебель стоит на полу: центр коробки на половине высоты
+        if height / 2 > self.room_height:
+            return None
 
-        for pos_x, pos_z in candidates:
-            # Проверяем высоту (Y) — мебель стоит на полу
-            pos_y = height / 2  # Центр коробки на половине высоты
+        occupancy = self.occupancy
+        if occupancy is None:
+            occupancy = self._build_occupancy(windows, doors)
+            for box in existing_boxes:
+                self._add_box_to_occupancy(occupancy, box)
 
-            position = np.array([pos_x, pos_y, pos_z])
+        candidates, priorities = self._generate_candidate_positions(width, depth)
+        n, k = len(candidates), len(self.orientations)
 
-            # Проверяем коллизии
-            if self._check_collision(position, np.array([width, height, depth]),
-                                     windows, doors, existing_boxes):
-                continue
+        all_centers = np.tile(candidates, (k, 1))
+        all_angles = np.repeat(self.orientations, n)
+        feasible = occupancy.feasible_mask(all_centers, width, depth, height, all_angles)
 
-            # Проверяем границы комнаты
-            if not self._is_inside_room(position, width, depth):
-                continue
+        if not np.any(feasible):
+            return None
+
+        order = np.lexsort((np.tile(np.arange(n), k), np.tile(priorities, k), np.repeat(np.arange(k), n)))
+        best = order[np.argmax(feasible[order])]
+
+        pos_x, pos_z = all_centers[best]
+        return np.array([pos_x, height / 2, pos_z]), float(all_angles[best])
 
-            return position
+    def _add_box_to_occupancy(self, occupancy: OccupancyGrid, box: BoundingBox3D):
+        """Footprint коробки (с учётом поворота) и зазор вокруг неё."""
+        if box.rotation == 0.0:
+            occupancy.add_rect(*self._get_region_2d(box), margin=self.furniture_margin)
+        else:
+            occupancy.add_obb(box.center[0], box.center[2], box.dimensions[0], box.dimensions[2],
+                              box.rotation, margin=self.furniture_margin)
 
-        return None
+    def _build_occupancy(self, windows, doors) -> OccupancyGrid:
+        """Карта занятости пола с зонами окон и дверей."""
+        occupancy = OccupancyGrid(self.room_width, self.room_length)
+        for win in windows:
+            occupancy.add_window(win, margin=self.window_margin)
+        for door in doors:
+            occupancy.add_door(door, margin=self.door_margin)
+        return occupancy
 
     def _generate_candidate_positions(self, obj_width: float,
-                                      obj_depth: float) -> List[Tuple[float, float]]:
-        """Генерация кандидатных позиций с приоритетами."""
-        candidates = []
+                                      obj_depth: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Генерация кандидатных позиций с приоритетами.
 
+        Returns:
+            candidates: массив (N, 2) координат (x, z)
+            priorities: массив (N,) приоритетов зон (углы, стены, центр)
+        """
         margin = 0.5  # Отступ от стен
 
-        # Сетка позиций
-        grid_x = np.linspace(margin + obj_width / 2,
-                             self.room_width - margin - obj_width / 2, 5)
-        grid_z = np.linspace(margin + obj_depth / 2,
-                             self.room_length - margin - obj_depth / 2, 5)
+        x_lo = margin + obj_width / 2
+        x_hi = self.room_width - margin - obj_width / 2
+        z_lo = margin + obj_depth / 2
+        z_hi = self.room_length - margin - obj_depth / 2
 
-        # Центр комнаты (низкий приоритет для большинства мебели)
-        center_x, center_z = self.room_width / 2, self.room_length / 2
+        # Сетка позиций
+        grid_x = np.linspace(x_lo, x_hi, self.grid_steps)
+        grid_z = np.linspace(z_lo, z_hi, self.grid_steps)
 
         # Углы комнаты (высокий приоритет для шкафов)
-        corners = [
-            (margin + obj_width / 2, margin + obj_depth / 2),
-            (self.room_width - margin - obj_width / 2, margin + obj_depth / 2),
-            (margin + obj_width / 2, self.room_length - margin - obj_depth / 2),
-            (self.room_width - margin - obj_width / 2, self.room_length - margin - obj_depth / 2),
-        ]
-
-        # У стен (средний приоритет)
-        wall_positions = []
-        for x in grid_x:
-            wall_positions.append((x, margin + obj_depth / 2))
-            wall_positions.append((x, self.room_length - margin - obj_depth / 2))
-        for z in grid_z:
-            wall_positions.append((margin + obj_width / 2, z))
-            wall_positions.append((self.room_width - margin - obj_width / 2, z))
-
-        # Комбинируем с приоритетами
-        candidates.extend(corners)
-        candidates.extend(wall_positions)
-
-        # Добавляем случайные позиции в центре
-        np.random.seed(42)
-        for _ in range(10):
-            rx = np.random.uniform(margin, self.room_width - margin)
-            rz = np.random.uniform(margin, self.room_length - margin)
-            candidates.append((rx, rz))
-
-        return candidates
-
-    def _check_collision(self, position: np.ndarray, dimensions: np.ndarray,
-                         windows, doors, existing_boxes: List[BoundingBox3D]) -> bool:
-        """Проверка коллизий с окнами, дверями и другой мебелью."""
-        new_min = position - dimensions / 2
-        new_max = position + dimensions / 2
-
-        # Проверка с окнами (не размещаем мебель вплотную)
-        window_margin = 0.3
-        for win in windows:
-            if win.wall in ['left', 'right']:
-                win_x = 0 if win.wall == 'left' else self.room_width
-                win_z_start = win.x
-                win_z_end = win.x + win.width
-                win_y_bottom = win.y
-                win_y_top = win.y + win.height
-
-                # Проверяем пересечение по Z и Y
-                if (new_min[2] < win_z_end + window_margin and
-                        new_max[2] > win_z_start - window_margin and
-                        new_max[1] > win_y_bottom and
-                        new_min[1] < win_y_top):
-                    # Проверяем близость к стене с окном
-                    if win.wall == 'left' and new_min[0] < window_margin:
-                        return True
-                    if win.wall == 'right' and new_max[0] > self.room_width - window_margin:
-                        return True
-            else:
-                win_z = 0 if win.wall == 'bottom' else self.room_length
-                win_x_start = win.x
-                win_x_end = win.x + win.width
-
-                if (new_min[0] < win_x_end + window_margin and
-                        new_max[0] > win_x_start - window_margin and
-                        new_max[1] > win.y and
-                        new_min[1] < win.y + win.height):
-                    if win.wall == 'bottom' and new_min[2] < window_margin:
-                        return True
-                    if win.wall == 'top' and new_max[2] > self.room_length - window_margin:
-                        return True
-
-        # Проверка с дверями
-        door_margin = 0.5
-        for door in doors:
-            if door.wall in ['left', 'right']:
-                door_z_start = door.x
-                door_z_end = door.x + door.width
-                if (new_min[2] < door_z_end + door_margin and
-                        new_max[2] > door_z_start - door_margin):
-                    if door.wall == 'left' and new_min[0] < door_margin:
-                        return True
-                    if door.wall == 'right' and new_max[0] > self.room_width - door_margin:
-                        return True
-            else:
-                door_x_start = door.x
-                door_x_end = door.x + door.width
-                if (new_min[0] < door_x_end + door_margin and
-                        new_max[0] > door_x_start - door_margin):
-                    if door.wall == 'bottom' and new_min[2] < door_margin:
-                        return True
-                    if door.wall == 'top' and new_max[2] > self.room_length - door_margin:
-                        return True
-
-        # Проверка с другой мебелью
-        furniture_margin = 0.2
-        for box in existing_boxes:
-            existing_min = box.min_corner - furniture_margin
-            existing_max = box.max_corner + furniture_margin
-
-            if (new_min[0] < existing_max[0] and new_max[0] > existing_min[0] and
-                    new_min[1] < existing_max[1] and new_max[1] > existing_min[1] and
-                    new_min[2] < existing_max[2] and new_max[2] > existing_min[2]):
-                return True
-
-        return False
-
-    def _is_inside_room(self, position: np.ndarray, width: float, depth: float) -> bool:
-        """Проверка, что объект полностью внутри комнаты."""
-        margin = 0.05
-        return (
-                position[0] - width / 2 >= margin and
-                position[0] + width / 2 <= self.room_width - margin and
-                position[2] - depth / 2 >= margin and
-                position[2] + depth / 2 <= self.room_length - margin and
-                position[1] >= 0 and position[1] <= self.room_height
-        )
+        corners = np.array([(x_lo, z_lo), (x_hi, z_lo), (x_lo, z_hi), (x_hi, z_hi)])
+
+        # У стен (средний приоритет): ближняя/дальняя, затем левая/правая
+        along_x = np.stack([np.repeat(grid_x, 2), np.tile([z_lo, z_hi], len(grid_x))], axis=1)
+        along_z = np.stack([np.tile([x_lo, x_hi], len(grid_z)), np.repeat(grid_z, 2)], axis=1)
+
+        # Случайные позиции в центре: локальный генератор с фиксированным seed,
+        # глобальное состояние np.random не трогаем
+        rng = np.random.RandomState(self.seed)
+        center = rng.uniform((margin, margin),
+                             (self.room_width - margin, self.room_length - margin),
+                             size=(self.n_random, 2))
+
+        candidates = np.concatenate([corners, along_x, along_z, center])
+        priorities = np.concatenate([
+            np.full(len(corners), self.PRIORITY_CORNER),
+            np.full(len(along_x) + len(along_z), self.PRIORITY_WALL),
+            np.full(len(center), self.PRIORITY_CENTER),
+        ])
+        return candidates, priorities
 
     def _get_region_2d(self, box: BoundingBox3D) -> Tuple[float, float, float, float]:
         """Получение 2D проекции региона (для отслеживания занятых зон)."""
@@ -681,9 +780,10 @@ class Furniture3DReconstructor:
 
 def map_furniture_to_3d(detected_furniture: List[Dict],
                         room_dims,
-                        windows, doors) -> List[BoundingBox3D]:
+                        windows, doors,
+                        optimize_layout: bool = False) -> List[BoundingBox3D]:
     """
     Удобная функция для конвертации детекций в 3D коробки.
     """
-    reconstructor = Furniture3DReconstructor(room_dims)
+    reconstructor = Furniture3DReconstructor(room_dims, optimize_layout=optimize_layout)
     return reconstructor.reconstruct_furniture_3d(detected_furniture, windows, doors)
\ No newline at end of file
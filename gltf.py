@@ -0,0 +1,239 @@
+import json
+import struct
+import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Sequence, Tuple
+
+from mesh import IndexedMesh
+
+
+# Заголовок и типы блоков GLB (glTF 2.0)
+GLB_MAGIC = 0x46546C67  # 'glTF'
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# Типы компонент и назначение буферов
+FLOAT = 5126
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+# Вершины единичной коробки в порядке BoundingBox3D.corners()
+UNIT_BOX_CORNERS = 0.5 * np.array([
+    [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+    [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1],
+], dtype=np.float64)
+
+
+@dataclass
+class MeshInstance:
+    """Узел сцены, ссылающийся на общую сетку экземпляров."""
+    material: str
+    translation: np.ndarray
+    rotation: float = 0.0  # Поворот вокруг Y в радианах
+    scale: np.ndarray = field(default_factory=lambda: np.ones(3))
+    name: str = ""
+
+
+def unit_box(bottom: bool = True) -> IndexedMesh:
+    """Единичная коробка (1×1×1 с центром в нуле) для экземпляров мебели."""
+    mesh = IndexedMesh(chunk=32)
+    mesh.add_box(UNIT_BOX_CORNERS, "instance", bottom=bottom)
+    return mesh
+
+
+class _GLBBuffer:
+    """Один двоичный буфер GLB: массивы NumPy дописываются с выравниванием 4 байта."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.length = 0
+        self.buffer_views: List[Dict] = []
+        self.accessors: List[Dict] = []
+
+    def add_bytes(self, data: bytes, target: Optional[int] = None) -> int:
+        """
+        Добавить байты как bufferView (изображения - без target).
+
+        Returns:
+            номер bufferView
+        """
+        view = {"buffer": 0, "byteOffset": self.length, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.buffer_views.append(view)
+        self.parts.append(data)
+        self.length += len(data)
+        padding = -self.length % 4
+        if padding:
+            self.parts.append(b"\0" * padding)
+            self.length += padding
+        return len(self.buffer_views) - 1
+
+    def add(self, array: np.ndarray, accessor_type: str, component: int,
+            target: int, bounds: bool = False) -> int:
+        """
+        Добавить массив как bufferView + accessor.
+
+        Returns:
+            номер accessor
+        """
+        view = self.add_bytes(np.ascontiguousarray(array).tobytes(), target)
+        accessor = {"bufferView": view, "componentType": component,
+                    "count": int(len(array)), "type": accessor_type}
+        if bounds and len(array):
+            accessor["min"] = [float(v) for v in array.min(axis=0)]
+            accessor["max"] = [float(v) for v in array.max(axis=0)]
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def add_geometry(self, mesh: IndexedMesh) -> Tuple[Dict, Dict[int, int]]:
+        """
+        Общие атрибуты вершин и индексы граней по материалам.
+
+        Индексы uint16, если вершин меньше 65535, иначе uint32. UV сетки
+        (v вверх, как в OBJ) переводятся в систему glTF (v вниз).
+
+        Returns:
+            attributes: POSITION / NORMAL / TEXCOORD_0 -> accessor
+            indices: номер материала сетки -> accessor индексов
+        """
+        attributes = {
+            "POSITION": self.add(mesh.vertices, "VEC3", FLOAT, ARRAY_BUFFER, bounds=True),
+            "NORMAL": self.add(mesh.normals, "VEC3", FLOAT, ARRAY_BUFFER),
+            "TEXCOORD_0": self.add(np.column_stack([mesh.uvs[:, 0], 1.0 - mesh.uvs[:, 1]]).astype(np.float32),
+                                   "VEC2", FLOAT, ARRAY_BUFFER),
+        }
+
+        if mesh.n_vertices < 65535:
+            index_dtype, component = np.uint16, UNSIGNED_SHORT
+        else:
+            index_dtype, component = np.uint32, UNSIGNED_INT
+
+        face_materials = mesh.face_materials
+        order = np.argsort(face_materials, kind='stable')
+        ids, starts = np.unique(face_materials[order], return_index=True)
+        bounds = np.append(starts, len(order))
+
+        faces = mesh.faces
+        indices = {}
+        for mat_id, lo, hi in zip(ids, bounds[:-1], bounds[1:]):
+            flat = faces[order[lo:hi]].astype(index_dtype).reshape(-1)
+            indices[int(mat_id)] = self.add(flat, "SCALAR", component, ELEMENT_ARRAY_BUFFER)
+        return attributes, indices
+
+
+def _material(name: str, color: Sequence[float]) -> Dict:
+    """Материал glTF из цвета (r, g, b) или (r, g, b, alpha)."""
+    rgba = [float(c) for c in color] + [1.0] * (4 - len(color))
+    material = {
+        "name": name,
+        "pbrMetallicRoughness": {"baseColorFactor": rgba,
+                                 "metallicFactor": 0.0, "roughnessFactor": 0.8},
+        "doubleSided": True,
+    }
+    if rgba[3] < 1.0:
+        material["alphaMode"] = "BLEND"
+    return material
+
+
+def write_glb(mesh: IndexedMesh, filename: str, colors: Dict[str, Sequence[float]],
+              instances: Sequence[MeshInstance] = (),
+              instance_mesh: Optional[IndexedMesh] = None,
+              generator: str = "RoomPlanner",
+              textures: Optional[Dict[str, bytes]] = None):
+    """
+    Запись сцены в двоичный glTF (GLB).
+
+    Атрибуты вершин (float32) и индексы (uint16/uint32) пишутся в один
+    двоичный буфер напрямую из массивов сетки. Сетка комнаты - один узел,
+    по примитиву на материал. Экземпляры (мебель) ссылаются на одну общую
+    геометрию instance_mesh (по умолчанию единичная коробка) через узлы
+    с переносом, поворотом и масштабом; для каждого материала экземпляров
+    создаётся своя glTF-сетка с теми же accessor.
+
+    Args:
+        colors: имя материала -> (r, g, b) или (r, g, b, alpha) в 0..1
+        textures: имя материала -> PNG (например, атлас TextureAtlas);
+            изображение встраивается в тот же двоичный буфер
+    """
+    buffer = _GLBBuffer()
+    materials: List[Dict] = []
+    material_index: Dict[str, int] = {}
+    textures = textures or {}
+    images: List[Dict] = []
+
+    def material_id(name: str) -> int:
+        if name not in material_index:
+            material_index[name] = len(materials)
+            if name in textures:
+                material = _material(name, colors.get(name, (1.0, 1.0, 1.0)))
+                material["pbrMetallicRoughness"]["baseColorTexture"] = {"index": len(images)}
+                images.append({"bufferView": buffer.add_bytes(textures[name]),
+                               "mimeType": "image/png"})
+                materials.append(material)
+            else:
+                materials.append(_material(name, colors.get(name, (0.8, 0.8, 0.8))))
+        return material_index[name]
+
+    meshes, nodes = [], []
+    if mesh.n_faces:
+        attributes, indices = buffer.add_geometry(mesh)
+        primitives = [{"attributes": attributes, "indices": accessor,
+                       "material": material_id(mesh.materials[mat_id])}
+                      for mat_id, accessor in indices.items()]
+        meshes.append({"name": "room", "primitives": primitives})
+        nodes.append({"name": "room", "mesh": 0})
+
+    if instances:
+        shared = instance_mesh if instance_mesh is not None else unit_box()
+        attributes, indices = buffer.add_geometry(shared)
+        instance_meshes: Dict[str, int] = {}
+
+        for i, instance in enumerate(instances):
+            if instance.material not in instance_meshes:
+                mat = material_id(instance.material)
+                instance_meshes[instance.material] = len(meshes)
+                meshes.append({"name": instance.material,
+                               "primitives": [{"attributes": attributes, "indices": accessor,
+                                               "material": mat}
+                                              for accessor in indices.values()]})
+
+            half = instance.rotation / 2.0
+            nodes.append({
+                "name": instance.name or f"instance_{i}",
+                "mesh": instance_meshes[instance.material],
+                "translation": [float(v) for v in instance.translation],
+                "rotation": [0.0, float(np.sin(half)), 0.0, float(np.cos(half))],
+                "scale": [float(v) for v in instance.scale],
+            })
+
+    document = {
+        "asset": {"version": "2.0", "generator": generator},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(nodes)))}],
+        "nodes": nodes,
+        "meshes": meshes,
+        "materials": materials,
+        "accessors": buffer.accessors,
+        "bufferViews": buffer.buffer_views,
+        "buffers": [{"byteLength": buffer.length}],
+    }
+    if images:
+        document["images"] = images
+        document["samplers"] = [{"magFilter": 9729, "minFilter": 9987}]
+        document["textures"] = [{"sampler": 0, "source": i} for i in range(len(images))]
+
+    json_chunk = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    json_chunk += b" " * (-len(json_chunk) % 4)
+    total = 12 + 8 + len(json_chunk) + 8 + buffer.length
+
+    with open(filename, 'wb') as f:
+        f.write(struct.pack('<III', GLB_MAGIC, GLB_VERSION, total))
+        f.write(struct.pack('<II', len(json_chunk), CHUNK_JSON))
+        f.write(json_chunk)
+        f.write(struct.pack('<II', buffer.length, CHUNK_BIN))
+        for part in buffer.parts:
+            f.write(part)
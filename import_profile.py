@@ -0,0 +1,95 @@
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List, Sequence
+
+
+# Тяжёлые библиотеки, которые не должны загружаться при импорте точки входа
+HEAVY_MODULES = ('numpy', 'cv2', 'matplotlib', 'PIL')
+
+# Бюджет импорта точки входа, секунды
+STARTUP_BUDGET = 0.3
+
+
+@dataclass
+class ImportRecord:
+    """Строка отчёта python -X importtime (время в микросекундах)."""
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # Вложенность: 0 - модуль импортирован верхним уровнем
+
+
+def import_profile(module: str = 'main', python: str = sys.executable) -> List[ImportRecord]:
+    """
+    Профиль импорта module в чистом интерпретаторе (python -X importtime).
+
+    Запуск - в отдельном процессе из каталога проекта, чтобы уже загруженные
+    модули текущего процесса не искажали картину.
+    """
+    result = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {module}:\n{result.stderr}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Заголовок таблицы
+        name = fields[2].rstrip()
+        records.append(ImportRecord(name.strip(), int(fields[0]), int(fields[1]),
+                                    (len(name) - len(name.lstrip())) // 2))
+    return records
+
+
+def check_startup(module: str = 'main', heavy: Sequence[str] = HEAVY_MODULES,
+                  budget: float = STARTUP_BUDGET) -> List[str]:
+    """
+    Проверка холодного старта: тяжёлые библиотеки не загружаются при
+    импорте module, суммарное время импорта укладывается в бюджет.
+
+    Returns:
+        описания нарушений (пусто - старт в норме)
+    """
+    records = import_profile(module)
+    problems = []
+    loaded = {record.name.split('.')[0] for record in records}
+    for name in heavy:
+        if name in loaded:
+            problems.append(f"{module} загружает {name} при импорте")
+
+    total = next((r.cumulative_us for r in records if r.name == module), 0) / 1e6
+    if total > budget:
+        problems.append(f"импорт {module}: {total:.3f} с при бюджете {budget:.3f} с")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Профиль времени импорта модуля (python -X importtime)')
+    parser.add_argument('module', nargs='?', default='main', help='Модуль проекта')
+    parser.add_argument('--top', type=int, default=15, help='Сколько самых долгих импортов показать')
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET, help='Бюджет импорта, с')
+    args = parser.parse_args()
+
+    records = import_profile(args.module)
+    print(f"{'накопл., мс':>12} {'свои, мс':>9}  модуль")
+    for record in sorted(records, key=lambda r: -r.cumulative_us)[:args.top]:
+        print(f"{record.cumulative_us / 1000:12.1f} {record.self_us / 1000:9.1f}  "
+              f"{'  ' * record.depth}{record.name}")
+
+    problems = check_startup(args.module, budget=args.budget)
+    for problem in problems:
+        print(f"  ✗ {problem}")
+    if problems:
+        sys.exit(1)
+    print("  ✓ Старт без тяжёлых модулей, в пределах бюджета")
+
+
+if __name__ == "__main__":
+    main()
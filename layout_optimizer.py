@@ -0,0 +1,189 @@
+import time
+
+import numpy as np
+
+from occupancy import aabb_half_extents
+
+
+class LayoutOptimizer:
+    """
+    Совместная оптимизация расстановки мебели (имитация отжига).
+
+    Стоимость раскладки = штрафы за выход за комнату и за зоны окон/дверей
+    + штрафы за пересечение коробок с зазором + слабое притяжение к стенам.
+    При перемещении одной коробки пересчитываются только её слагаемые:
+    статическая часть и пары с соседями из пространственного хэша.
+    Пересечения считаются по описанным осевым прямоугольникам; точная
+    проверка итоговой раскладки выполняется вызывающим кодом.
+    """
+
+    OVERLAP_WEIGHT = 10.0
+
+    def __init__(self, room_width, room_length, obstacles=None, margin=0.2,
+                 wall_margin=0.05, wall_weight=0.05, cell_size=1.0, seed=42):
+        """
+        Args:
+            obstacles: массив (M, 5) статических зон: x0, z0, x1, z1, min_height
+                       (зона мешает только объектам выше min_height)
+        """
+        self.room_width = room_width
+        self.room_length = room_length
+        self.obstacles = (np.asarray(obstacles, dtype=np.float64).reshape(-1, 5)
+                          if obstacles is not None else np.empty((0, 5)))
+        self.margin = margin
+        self.wall_margin = wall_margin
+        self.wall_weight = wall_weight
+        self.cell_size = cell_size
+        self.rng = np.random.default_rng(seed)
+
+    # --- стоимость -------------------------------------------------------
+
+    def _static_cost(self, i, cx, cz, hx, hz):
+        """Слагаемые, зависящие только от коробки i: комната, окна/двери, стены."""
+        x0, x1, z0, z1 = cx - hx, cx + hx, cz - hz, cz + hz
+        m = self.wall_margin
+        area = 4 * hx * hz
+
+        inside = (max(0.0, min(x1, self.room_width - m) - max(x0, m)) *
+                  max(0.0, min(z1, self.room_length - m) - max(z0, m)))
+        cost = self.OVERLAP_WEIGHT * (area - inside)
+
+        obs = self._obstacles_for[i]
+        if len(obs):
+            ox = np.clip(np.minimum(x1, obs[:, 2]) - np.maximum(x0, obs[:, 0]), 0, None)
+            oz = np.clip(np.minimum(z1, obs[:, 3]) - np.maximum(z0, obs[:, 1]), 0, None)
+            cost += self.OVERLAP_WEIGHT * float(np.dot(ox, oz))
+
+        # Мебель обычно стоит у стен
+        wall_gap = min(x0, self.room_width - x1, z0, self.room_length - z1)
+        cost += self.wall_weight * max(wall_gap, 0.0)
+        return cost
+
+    def _pair_cost(self, a, b):
+        """Пересечение прямоугольников, расширенных на половину зазора каждый."""
+        ox = min(a[2], b[2]) - max(a[0], b[0])
+        if ox <= 0:
+            return 0.0
+        oz = min(a[3], b[3]) - max(a[1], b[1])
+        if oz <= 0:
+            return 0.0
+        return self.OVERLAP_WEIGHT * ox * oz
+
+    def _expanded(self, cx, cz, hx, hz):
+        h = self.margin / 2
+        return (cx - hx - h, cz - hz - h, cx + hx + h, cz + hz + h)
+
+    # --- пространственный хэш --------------------------------------------
+
+    def _cells(self, rect):
+        c = self.cell_size
+        return [(ix, iz)
+                for ix in range(int(np.floor(rect[0] / c)), int(np.floor(rect[2] / c)) + 1)
+                for iz in range(int(np.floor(rect[1] / c)), int(np.floor(rect[3] / c)) + 1)]
+
+    def _insert(self, i, rect):
+        for cell in self._cells(rect):
+            self._grid.setdefault(cell, set()).add(i)
+
+    def _remove(self, i, rect):
+        for cell in self._cells(rect):
+            self._grid[cell].discard(i)
+
+    def _neighbours(self, rect, exclude):
+        found = set()
+        for cell in self._cells(rect):
+            found |= self._grid.get(cell, set())
+        found.discard(exclude)
+        return found
+
+    def _pairs_sum(self, i, rect):
+        return sum(self._pair_cost(rect, self._rects[j]) for j in self._neighbours(rect, i))
+
+    # --- оптимизация -----------------------------------------------------
+
+    def optimize(self, sizes, positions, angles, orientations=(0.0, np.pi / 2),
+                 iterations=None, time_budget=1.0, t_start=0.05, t_end=1e-4):
+        """
+        Отжиг от начальной раскладки.
+
+        Args:
+            sizes: массив (N, 3) размеров коробок (width, height, depth)
+            positions: начальные центры (N, 2) в плоскости XZ
+            angles: начальные повороты (N,)
+            orientations: допустимые повороты
+            iterations: число шагов (по умолчанию 300 на объект)
+            time_budget: ограничение по времени, секунды
+
+        Returns:
+            positions (N, 2), angles (N,), итоговая стоимость
+        """
+        sizes = np.asarray(sizes, dtype=np.float64).reshape(-1, 3)
+        n = len(sizes)
+        if n == 0:
+            return np.empty((0, 2)), np.empty(0), 0.0
+
+        orientations = np.asarray(orientations, dtype=np.float64)
+        pos = np.array(positions, dtype=np.float64).reshape(n, 2)
+        ang = np.array(angles, dtype=np.float64).reshape(n)
+        iterations = iterations or 300 * n
+
+        # Для каждой коробки - только зоны, которым мешает её высота
+        self._obstacles_for = [self.obstacles[sizes[i, 1] > self.obstacles[:, 4]] for i in range(n)]
+
+        half = np.array([aabb_half_extents(sizes[i, 0] / 2, sizes[i, 2] / 2, ang[i])
+                         for i in range(n)])
+        static = np.array([self._static_cost(i, *pos[i], *half[i]) for i in range(n)])
+        self._rects = [self._expanded(*pos[i], *half[i]) for i in range(n)]
+        self._grid = {}
+        for i in range(n):
+            self._insert(i, self._rects[i])
+
+        total = static.sum() + sum(self._pairs_sum(i, self._rects[i]) for i in range(n)) / 2
+        best = (total, pos.copy(), ang.copy())
+
+        cooling = (t_end / t_start) ** (1.0 / max(iterations - 1, 1))
+        temperature = t_start
+        deadline = time.perf_counter() + time_budget
+
+        for step in range(iterations):
+            if step % 64 == 0 and time.perf_counter() > deadline:
+                break
+
+            i = int(self.rng.integers(n))
+            cx, cz = pos[i]
+            angle = ang[i]
+            move = self.rng.random()
+            if move < 0.6:
+                sigma = max(0.05, 0.5 * np.sqrt(temperature / t_start))
+                cx += self.rng.normal(0, sigma)
+                cz += self.rng.normal(0, sigma)
+            elif move < 0.85:
+                cx = self.rng.uniform(0, self.room_width)
+                cz = self.rng.uniform(0, self.room_length)
+            elif len(orientations) > 1:
+                angle = orientations[self.rng.integers(len(orientations))]
+
+            hx, hz = (aabb_half_extents(sizes[i, 0] / 2, sizes[i, 2] / 2, angle)
+                      if angle != ang[i] else half[i])
+            new_rect = self._expanded(cx, cz, hx, hz)
+            new_static = self._static_cost(i, cx, cz, hx, hz)
+
+            old_rect = self._rects[i]
+            delta = (new_static - static[i] +
+                     self._pairs_sum(i, new_rect) - self._pairs_sum(i, old_rect))
+
+            if delta < 0 or self.rng.random() < np.exp(-delta / temperature):
+                self._remove(i, old_rect)
+                self._insert(i, new_rect)
+                self._rects[i] = new_rect
+                pos[i] = (cx, cz)
+                ang[i] = angle
+                half[i] = (hx, hz)
+                static[i] = new_static
+                total += delta
+                if total < best[0] - 1e-12:
+                    best = (total, pos.copy(), ang.copy())
+
+            temperature *= cooling
+
+        return best[1], best[2], best[0]
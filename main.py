@@ -2,22 +2,18 @@ import sys
 import argparse
 from pathlib import Path
 
-from utils import load_images
-from room_detector import RoomDimensions, Window
-from floorplan import FloorplanDrawer
-from window_detector import WindowDetectorCV, map_windows_to_floorplan
-from model3d import create_3d_model
-from door_detector import DoorDetectorCV, map_door_to_floorplan
-from room_detector import Door, auto_place_door
-from model_from_floorplan import create_3d_model_from_floorplan
-from furniture_detector import (
-    FurnitureDetectorCV, Furniture3DReconstructor,
-    map_furniture_to_3d, BoundingBox3D
-)
+# Модули конвейера (numpy, OpenCV, PIL, детекторы, 3D) импортируются при
+# первом использовании: --help, ошибки аргументов и короткие запуски не
+# платят за их загрузку. Проверка: python import_profile.py main
+
+# Бэкенды отрисовки планировки (FloorplanDrawer.BACKENDS)
+PLAN_BACKENDS = ('opencv', 'matplotlib')
 
 
 def get_room_dimensions_interactive():
     """Интерактивный ввод размеров комнаты."""
+    from room_detector import RoomDimensions
+
     print("ВВЕДИТЕ РАЗМЕРЫ КОМНАТЫ")
 
     while True:
@@ -213,8 +209,8 @@ def combine_detected_and_manual(detected_windows, manual_windows, room_width, ro
 def main():
     parser = argparse.ArgumentParser(description='Создание планировки и 3D модели комнаты по фото')
     parser.add_argument('--images', '-i', nargs='+', help='Пути к фотографиям')
-    parser.add_argument('--output', '-o', default='floorplan.png', help='Выходной файл планировки')
-    parser.add_argument('--output-3d', default='room.obj', help='Выходной файл 3D модели (.obj)')
+    parser.add_argument('--output', '-o', default='floorplan.png', help='Выходной файл планировки (.png или .svg)')
+    parser.add_argument('--output-3d', default='room.obj', help='Выходной файл 3D модели (.obj или .glb)')
     parser.add_argument('--width', '-w', type=float, help='Ширина комнаты (м)')
     parser.add_argument('--length', '-l', type=float, help='Длина комнаты (м)')
     parser.add_argument('--height', '-H', type=float, default=2.7, help='Высота потолка (м)')
@@ -224,6 +220,12 @@ def main():
                         help='Только ручной ввод окон')
     parser.add_argument('--no-3d', action='store_true',
                         help='Не создавать 3D модель')
+    parser.add_argument('--lod', action='store_true',
+                        help='Дополнительно сохранить упрощённые уровни детализации (_lod1, _lod2)')
+    parser.add_argument('--textures', action='store_true',
+                        help='Запечь участки фото в атлас текстур стен и пола (_atlas.png)')
+    parser.add_argument('--plan-backend', choices=PLAN_BACKENDS, default='opencv',
+                        help='Отрисовка планировки: opencv (быстро) или matplotlib (качественнее)')
 
     args = parser.parse_args()
 
@@ -247,6 +249,9 @@ def main():
             print(f"Ошибка: Файл не найден: {path}")
             sys.exit(1)
 
+    from utils import load_images
+    from room_detector import RoomDimensions, Window
+
     print(f"\nЗагрузка {len(image_paths)} изображений...")
     images = load_images(image_paths)
 
@@ -278,8 +283,12 @@ def main():
 
     # Автоматическая детекция (если не --manual-only)
     if not args.manual_only:
+        from window_detector import WindowDetectorCV
+        from door_detector import DoorDetectorCV
+
         window_detector = WindowDetectorCV()
-        detected_windows = window_detector.analyze_multiple_images(images)
+        # Детекции живут в колоночной таблице; словари - только для отчётов и диалогов
+        detected_windows = window_detector.analyze_table(images).to_legacy()
         print(f"\n  Автоматически обнаружено окон: {len(detected_windows)}")
         for w in detected_windows:
             status = "✓" if w.get('verified') else "~"
@@ -288,7 +297,7 @@ def main():
         # Детекция дверей
         print("\n  Поиск дверей на фотографиях...")
         door_detector = DoorDetectorCV()
-        detected_doors = door_detector.analyze_multiple_images(images)
+        detected_doors = door_detector.analyze_table(images).to_legacy()
         print(f"  Автоматически обнаружено дверей: {len(detected_doors)}")
 
     # Ручной ввод или подтверждение
@@ -366,6 +375,7 @@ def main():
             )
         else:
             # Из авто-детекции — через map_windows_to_floorplan
+            from window_detector import map_windows_to_floorplan
             mapped = map_windows_to_floorplan([w], room_dims.width, room_dims.length)
             if mapped:
                 m = mapped[0]
@@ -399,6 +409,7 @@ def main():
                 final_door = None
             elif confirm in ['edit', 'e']:
                 # Ручной ввод двери
+                from room_detector import Door
                 print("  Укажите расположение двери:")
                 walls = ['left', 'right', 'top', 'bottom']
                 for i, w in enumerate(walls, 1):
@@ -460,9 +471,10 @@ def main():
 
     # === ЭТАП 3: Детекция мебели ===
     print("\n[3/4] Анализ фотографий на наличие мебели...")
+    from furniture_detector import FurnitureDetectorCV, map_furniture_to_3d
 
     furniture_detector = FurnitureDetectorCV()
-    detected_furniture = furniture_detector.analyze_multiple_images(images)
+    detected_furniture = furniture_detector.analyze_table(images).to_legacy()
 
     print(f"\n  Обнаружено объектов мебели: {len(detected_furniture)}")
     for furn in detected_furniture:
@@ -482,8 +494,9 @@ def main():
     print("\n[4/4] Создание планировки...")
 
     # Рисуем планировку
-    drawer = FloorplanDrawer()
-    drawer.draw(room_dims, windows_for_drawer, doors, args.output, images=images)
+    from floorplan import FloorplanDrawer
+    drawer = FloorplanDrawer(backend=args.plan_backend)
+    floorplan = drawer.draw(room_dims, windows_for_drawer, doors, args.output, images=images)
 
     # === ЭТАП 5: Создание 3D модели ===
     if not args.no_3d:
@@ -500,16 +513,21 @@ def main():
         print("=" * 50)
 
         # Создаем 3D модель на основе планировки
+        from model_from_floorplan import create_3d_model_from_floorplan
         create_3d_model_from_floorplan(
             room_dims=room_dims,
             windows=windows_3d,
             doors=doors,
             output_path=args.output_3d,
-            floorplan_path=args.output,
-            furniture_boxes=furniture_boxes
+            floorplan=floorplan,
+            furniture_boxes=furniture_boxes,
+            lods=args.lod,
+            images=images,
+            textures=args.textures
         )
 
-    # Итог
+    # Итог (PNG планировки записывается в фоне)
+    floorplan.wait()
     print("\nГОТОВО!")
     print(f"Размеры комнаты: {room_dims.width}м × {room_dims.length}м = {room_dims.area}м²")
     print(f"Высота потолка: {room_dims.height}м")
@@ -520,7 +538,13 @@ def main():
     print(f"  Планировка: {args.output}")
     if not args.no_3d:
         print(f"  3D модель:  {args.output_3d}")
-        print(f"  Материалы:  {args.output_3d.replace('.obj', '.mtl')}")
+        if args.output_3d.lower().endswith('.obj'):
+            print(f"  Материалы:  {args.output_3d.replace('.obj', '.mtl')}")
+            if args.textures:
+                print(f"  Текстура:   {args.output_3d.replace('.obj', '_atlas.png')}")
+        if args.lod:
+            from mesh import lod_path
+            print(f"  Уровни LOD: {lod_path(args.output_3d, 1)}, {lod_path(args.output_3d, 2)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,698 @@
+import hashlib
+import numpy as np
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, List, Dict, Optional, Sequence, Tuple, Union
+
+
+# Текстурные координаты углов прямоугольника (p0, p1, p2, p3)
+QUAD_UVS = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]], dtype=np.float32)
+
+# Два треугольника прямоугольника p0-p1-p2-p3
+QUAD_TRIANGLES = np.array([[0, 1, 2], [0, 2, 3]], dtype=np.int32)
+
+# Грани коробки по вершинам BoundingBox3D.corners(): низ, верх, перед, зад, лево, право
+BOX_QUADS = np.array([
+    [0, 1, 5, 4], [3, 2, 6, 7], [0, 1, 2, 3],
+    [4, 5, 6, 7], [0, 4, 7, 3], [1, 5, 6, 2],
+])
+
+
+class IndexedMesh:
+    """
+    Индексированная треугольная сетка.
+
+    Вершины, нормали и UV хранятся массивами float32, грани - int32 (N, 3),
+    у каждой грани номер материала. Буферы растут блоками по chunk элементов,
+    поэтому добавление сотен прямоугольников не копирует массивы на каждом шаге.
+    Все экспортёры читают одни и те же массивы.
+    """
+
+    CHUNK = 1024
+
+    def __init__(self, chunk: int = CHUNK):
+        self.chunk = chunk
+        self._vertices = np.empty((chunk, 3), dtype=np.float32)
+        self._normals = np.empty((chunk, 3), dtype=np.float32)
+        self._uvs = np.empty((chunk, 2), dtype=np.float32)
+        self._faces = np.empty((chunk, 3), dtype=np.int32)
+        self._face_materials = np.empty(chunk, dtype=np.int32)
+        self.n_vertices = 0
+        self.n_faces = 0
+
+        # Имена материалов; номер в списке - идентификатор в face_materials
+        self.materials: List[str] = []
+        self._material_ids: Dict[str, int] = {}
+
+    @classmethod
+    def from_arrays(cls, vertices: np.ndarray, normals: np.ndarray, uvs: np.ndarray,
+                    faces: np.ndarray, face_materials: np.ndarray,
+                    materials: Sequence[str]) -> 'IndexedMesh':
+        """Сетка из готовых массивов (face_materials - номера в materials)."""
+        mesh = cls()
+        for name in materials:
+            mesh.material_id(name)
+        n, m = len(vertices), len(faces)
+        mesh._reserve_vertices(n)
+        mesh._reserve_faces(m)
+        mesh._vertices[:n] = vertices
+        mesh._normals[:n] = normals
+        mesh._uvs[:n] = uvs
+        mesh._faces[:m] = faces
+        mesh._face_materials[:m] = face_materials
+        mesh.n_vertices, mesh.n_faces = n, m
+        return mesh
+
+    @classmethod
+    def concatenate(cls, meshes: Sequence['IndexedMesh']) -> 'IndexedMesh':
+        """Одна сетка из нескольких; материалы объединяются по именам."""
+        meshes = [m for m in meshes if m.n_vertices]
+        if not meshes:
+            return cls()
+
+        material_ids: Dict[str, int] = {}
+        faces, face_materials, offset = [], [], 0
+        for m in meshes:
+            remap = np.array([material_ids.setdefault(name, len(material_ids))
+                              for name in m.materials], dtype=np.int32)
+            faces.append(m.faces + offset)
+            face_materials.append(remap[m.face_materials])
+            offset += m.n_vertices
+
+        return cls.from_arrays(np.concatenate([m.vertices for m in meshes]),
+                               np.concatenate([m.normals for m in meshes]),
+                               np.concatenate([m.uvs for m in meshes]),
+                               np.concatenate(faces), np.concatenate(face_materials),
+                               list(material_ids))
+
+    @property
+    def vertices(self) -> np.ndarray:
+        return self._vertices[:self.n_vertices]
+
+    @property
+    def normals(self) -> np.ndarray:
+        return self._normals[:self.n_vertices]
+
+    @property
+    def uvs(self) -> np.ndarray:
+        return self._uvs[:self.n_vertices]
+
+    @property
+    def faces(self) -> np.ndarray:
+        return self._faces[:self.n_faces]
+
+    @property
+    def face_materials(self) -> np.ndarray:
+        return self._face_materials[:self.n_faces]
+
+    def material_id(self, name: str) -> int:
+        """Идентификатор материала (регистрируется при первом обращении)."""
+        if name not in self._material_ids:
+            self._material_ids[name] = len(self.materials)
+            self.materials.append(name)
+        return self._material_ids[name]
+
+    def _capacity(self, current: int, needed: int) -> int:
+        """Новая ёмкость: не меньше удвоенной, кратна размеру блока."""
+        return max(2 * current, -(-needed // self.chunk) * self.chunk)
+
+    def _reserve_vertices(self, count: int):
+        needed = self.n_vertices + count
+        if needed <= len(self._vertices):
+            return
+        size = self._capacity(len(self._vertices), needed)
+        for name in ('_vertices', '_normals', '_uvs'):
+            old = getattr(self, name)
+            new = np.empty((size, old.shape[1]), dtype=old.dtype)
+            new[:self.n_vertices] = old[:self.n_vertices]
+            setattr(self, name, new)
+
+    def _reserve_faces(self, count: int):
+        needed = self.n_faces + count
+        if needed <= len(self._faces):
+            return
+        size = self._capacity(len(self._faces), needed)
+        faces = np.empty((size, 3), dtype=np.int32)
+        faces[:self.n_faces] = self._faces[:self.n_faces]
+        materials = np.empty(size, dtype=np.int32)
+        materials[:self.n_faces] = self._face_materials[:self.n_faces]
+        self._faces, self._face_materials = faces, materials
+
+    def _material_array(self, material: Union[str, Sequence[str]], count: int) -> np.ndarray:
+        if isinstance(material, str):
+            return np.full(count, self.material_id(material), dtype=np.int32)
+        return np.array([self.material_id(m) for m in material], dtype=np.int32)
+
+    def add_triangles(self, vertices: np.ndarray, faces: np.ndarray, normals: np.ndarray,
+                      material: Union[str, Sequence[str]],
+                      uvs: Optional[np.ndarray] = None) -> int:
+        """
+        Добавить вершины и треугольники (индексы граней - локальные).
+
+        Args:
+            normals: (N, 3) нормали вершин или одна нормаль (3,)
+            material: имя для всех граней или по имени на грань
+
+        Returns:
+            Индекс первой добавленной вершины
+        """
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        faces = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+        n, m = len(vertices), len(faces)
+        base = self.n_vertices
+
+        self._reserve_vertices(n)
+        self._reserve_faces(m)
+
+        self._vertices[base:base + n] = vertices
+        self._normals[base:base + n] = np.broadcast_to(np.asarray(normals, dtype=np.float32), (n, 3))
+        self._uvs[base:base + n] = 0.0 if uvs is None else uvs
+        self._faces[self.n_faces:self.n_faces + m] = faces + base
+        self._face_materials[self.n_faces:self.n_faces + m] = self._material_array(material, m)
+
+        self.n_vertices += n
+        self.n_faces += m
+        return base
+
+    def add_quads(self, quads: np.ndarray, normals: np.ndarray,
+                  material: Union[str, Sequence[str]]) -> int:
+        """
+        Добавить прямоугольники (Q, 4, 3), каждый - два треугольника.
+
+        Args:
+            normals: (Q, 3) по нормали на прямоугольник или одна (3,)
+            material: имя для всех или по имени на прямоугольник
+        """
+        quads = np.asarray(quads, dtype=np.float32).reshape(-1, 4, 3)
+        q = len(quads)
+        normals = np.broadcast_to(np.asarray(normals, dtype=np.float32), (q, 3))
+        faces = (QUAD_TRIANGLES[None] + 4 * np.arange(q, dtype=np.int32)[:, None, None]).reshape(-1, 3)
+        if not isinstance(material, str):
+            material = np.repeat(np.asarray(material, dtype=object), 2)
+        return self.add_triangles(quads.reshape(-1, 3), faces, np.repeat(normals, 4, axis=0),
+                                  material, np.tile(QUAD_UVS, (q, 1)))
+
+    def add_box(self, corners: np.ndarray, material: str, bottom: bool = True) -> int:
+        """
+        Коробка по 8 вершинам (порядок BoundingBox3D.corners()).
+        У каждой грани свои 4 вершины и внешняя нормаль, обход - против
+        часовой стрелки снаружи.
+
+        Args:
+            bottom: строить нижнюю грань (у стоящей на полу коробки она не видна)
+        """
+        corners = np.asarray(corners, dtype=np.float64).reshape(8, 3)
+        quads = corners[BOX_QUADS if bottom else BOX_QUADS[1:]]
+        normals = np.cross(quads[:, 1] - quads[:, 0], quads[:, 3] - quads[:, 0])
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+
+        outward = np.einsum('ij,ij->i', normals, quads.mean(axis=1) - corners.mean(axis=0)) > 0
+        quads[~outward] = quads[~outward][:, ::-1]
+        normals[~outward] *= -1
+        return self.add_quads(quads, normals, material)
+
+
+def input_key(*parts) -> str:
+    """
+    Хэш входных данных фрагмента сетки.
+
+    Учитываются поля dataclass (Window, Door, BoundingBox3D, Wall3D),
+    массивы NumPy (форма, тип, байты), списки, словари и скаляры.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def feed(value):
+        if is_dataclass(value):
+            digest.update(type(value).__name__.encode())
+            for f in fields(value):
+                feed(getattr(value, f.name))
+        elif isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (list, tuple)):
+            digest.update(f"[{len(value)}".encode())
+            for item in value:
+                feed(item)
+        elif isinstance(value, dict):
+            digest.update(f"{{{len(value)}".encode())
+            for k in sorted(value, key=repr):
+                feed(k)
+                feed(value[k])
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b";")
+
+    for part in parts:
+        feed(part)
+    return digest.hexdigest()
+
+
+class MeshCache:
+    """
+    Кэш фрагментов сетки (стена, пол, предмет мебели) по хэшу входных данных.
+
+    Сборщик модели запрашивает каждый фрагмент по имени и ключу input_key;
+    перестраиваются только фрагменты с изменившимся ключом, остальные
+    берутся готовыми и сшиваются IndexedMesh.concatenate. Один кэш можно
+    передавать в повторные экспорты той же комнаты.
+    """
+
+    def __init__(self):
+        self._chunks: Dict[str, Tuple[str, IndexedMesh]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def begin(self):
+        """Начало сборки модели: обнулить счётчики попаданий."""
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, key: str, build: Callable[[IndexedMesh], Any]) -> IndexedMesh:
+        """Фрагмент name; при промахе build заполняет новую сетку."""
+        cached = self._chunks.get(name)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        chunk = IndexedMesh(chunk=64)
+        build(chunk)
+        self._chunks[name] = (key, chunk)
+        self.misses += 1
+        return chunk
+
+    def retain(self, names: Sequence[str], prefix: str = ""):
+        """Удалить фрагменты с префиксом prefix, которых больше нет в модели."""
+        names = set(names)
+        for name in [n for n in self._chunks if n.startswith(prefix) and n not in names]:
+            del self._chunks[name]
+
+    def report(self) -> str:
+        """Строка отчёта о последней сборке."""
+        return f"Кэш фрагментов: перестроено {self.misses}, из кэша {self.hits}"
+
+
+def wall_openings(wall) -> List[Dict]:
+    """Проёмы стены (окна и двери), отсортированные по X."""
+    openings = [{'x': win.x, 'y': win.y, 'width': win.width, 'height': win.height,
+                 'type': 'window'} for win in wall.windows]
+    openings += [{'x': door.x, 'y': 0, 'width': door.width, 'height': door.height,
+                  'type': 'door'} for door in wall.doors]
+    openings.sort(key=lambda op: op['x'])
+    return openings
+
+
+def decompose_wall(wall_len: float, height: float, openings: List[Dict],
+                   snap: float = 0.05) -> Tuple[np.ndarray, List[tuple]]:
+    """
+    Вычитание проёмов из прямоугольника стены.
+
+    Заметающая прямая проходит по границам проёмов вдоль X; в каждой полосе
+    свободные интервалы по Y - дополнение объединения активных проёмов.
+    Интервал, совпадающий с интервалом предыдущей полосы, продолжает тот же
+    прямоугольник, поэтому число прямоугольников растёт с числом проёмов,
+    а не с размером сетки разбиения.
+
+    Args:
+        snap: проёмы ближе snap к краю стены прижимаются к нему (без узких полос)
+
+    Returns:
+        wall: (R, 4) прямоугольники стены (x_start, x_end, y_start, y_end)
+        panes: список (x_start, x_end, y_start, y_end, тип) проёмов в пределах стены
+    """
+    panes = []
+    for op in openings:
+        x0, x1 = max(op['x'], 0.0), min(op['x'] + op['width'], wall_len)
+        y0, y1 = max(op['y'], 0.0), min(op['y'] + op['height'], height)
+        x0 = 0.0 if x0 < snap else x0
+        y0 = 0.0 if y0 < snap else y0
+        x1 = wall_len if x1 > wall_len - snap else x1
+        y1 = height if y1 > height - snap else y1
+        if x1 - x0 > 1e-6 and y1 - y0 > 1e-6:
+            panes.append((x0, x1, y0, y1, op['type']))
+
+    # События заметания: вход и выход проёма, по X
+    events = sorted([(p[0], 1, i) for i, p in enumerate(panes)] +
+                    [(p[1], 0, i) for i, p in enumerate(panes)])
+    events.append((wall_len, 0, -1))
+
+    rects = []
+    running: Dict[tuple, float] = {}  # (y_start, y_end) -> x_start
+    active = set()
+    x_prev = 0.0
+    for x, entering, i in events:
+        if x > x_prev:
+            # Свободные интервалы полосы [x_prev, x]
+            free, y_cur = [], 0.0
+            for y0, y1 in sorted((panes[j][2], panes[j][3]) for j in active):
+                if y0 > y_cur:
+                    free.append((y_cur, y0))
+                y_cur = max(y_cur, y1)
+            if y_cur < height:
+                free.append((y_cur, height))
+
+            for interval in list(running):
+                if interval not in free:
+                    rects.append((running.pop(interval), x_prev) + interval)
+            for interval in free:
+                running.setdefault(interval, x_prev)
+            x_prev = x
+
+        if i >= 0:
+            if entering:
+                active.add(i)
+            else:
+                active.discard(i)
+
+    for interval, x_start in running.items():
+        rects.append((x_start, wall_len) + interval)
+
+    return np.array(rects, dtype=np.float64).reshape(-1, 4), panes
+
+
+def add_wall(mesh: IndexedMesh, wall, wall_idx: int) -> int:
+    """
+    Стена с проёмами в сетку.
+
+    Прямоугольники decompose_wall (материал wall_i) используют общие
+    сваренные вершины с UV по размерам стены; окна и двери - отдельные
+    прямоугольники с материалами window_i / door_i.
+
+    Returns:
+        Число добавленных прямоугольников
+    """
+    start = np.asarray(wall.start, dtype=np.float64)
+    wall_vec = np.asarray(wall.end, dtype=np.float64) - start
+    wall_len = np.linalg.norm(wall_vec)
+    if wall_len < 0.01:
+        return 0
+
+    rects, panes = decompose_wall(wall_len, wall.height, wall_openings(wall))
+    wall_dir = wall_vec / wall_len
+    up = np.array([0.0, 1.0, 0.0])
+
+    def to_world(xy: np.ndarray) -> np.ndarray:
+        return start + xy[..., :1] * wall_dir + xy[..., 1:] * up
+
+    if len(rects):
+        # Углы p0..p3: (x_start, y_start), (x_end, y_start), (x_end, y_end), (x_start, y_end)
+        corners = np.stack([rects[:, [0, 1, 1, 0]], rects[:, [2, 2, 3, 3]]], axis=2)
+        points, index = unique_rows(corners.reshape(-1, 2), scale=1e6)
+        faces = index.reshape(-1, 4)[:, QUAD_TRIANGLES].reshape(-1, 3)
+        mesh.add_triangles(to_world(points), faces, wall.normal, f"wall_{wall_idx}",
+                           uvs=points / [wall_len, wall.height])
+
+    if panes:
+        pane = np.array([p[:4] for p in panes], dtype=np.float64)
+        corners = np.stack([pane[:, [0, 1, 1, 0]], pane[:, [2, 2, 3, 3]]], axis=2)
+        mesh.add_quads(to_world(corners), wall.normal,
+                       [f"{kind}_{wall_idx}" for *_, kind in panes])
+
+    return len(rects) + len(panes)
+
+
+def add_wall_slab(mesh: IndexedMesh, wall, wall_idx: int, patch_offset: float = 0.005) -> int:
+    """
+    Упрощённая стена для LOD: один прямоугольник на всю стену, проёмы -
+    накладки с материалами window_i / door_i, сдвинутые на patch_offset
+    вдоль нормали (без z-fighting).
+
+    Returns:
+        Число добавленных прямоугольников
+    """
+    start = np.asarray(wall.start, dtype=np.float64)
+    wall_vec = np.asarray(wall.end, dtype=np.float64) - start
+    wall_len = np.linalg.norm(wall_vec)
+    if wall_len < 0.01:
+        return 0
+
+    _, panes = decompose_wall(wall_len, wall.height, wall_openings(wall))
+    rects = np.array([(0.0, wall_len, 0.0, wall.height)] + [p[:4] for p in panes])
+    corners = np.stack([rects[:, [0, 1, 1, 0]], rects[:, [2, 2, 3, 3]]], axis=2)
+
+    normal = np.asarray(wall.normal, dtype=np.float64)
+    offsets = np.where(np.arange(len(rects)) > 0, patch_offset, 0.0)
+    quads = (start + corners[..., :1] * (wall_vec / wall_len) +
+             corners[..., 1:] * np.array([0.0, 1.0, 0.0]) + offsets[:, None, None] * normal)
+
+    mesh.add_quads(quads, wall.normal,
+                   [f"wall_{wall_idx}"] + [f"{kind}_{wall_idx}" for *_, kind in panes])
+    return len(rects)
+
+
+def lod_path(filename: str, level: int) -> str:
+    """Имя файла уровня детализации: room.obj -> room_lod1.obj (уровень 0 - сам файл)."""
+    if level == 0:
+        return filename
+    stem, dot, ext = filename.rpartition('.')
+    return f"{stem}_lod{level}.{ext}" if dot else f"{filename}_lod{level}"
+
+
+# Четыре десятичные цифры числа 0..9999 (байты '0000'..'9999' в младших байтах uint64)
+_DIGITS4 = np.array([[48 + i // 1000, 48 + i // 100 % 10, 48 + i // 10 % 10, 48 + i % 10]
+                     for i in range(10000)], dtype=np.uint8).view(np.uint32).ravel().astype(np.uint64)
+
+# Быстрый путь: до 7 цифр в целой части - число с разделителем (или знаком)
+# помещается в одно слово uint64
+DIGITS_LIMIT = 10 ** 7
+
+
+def _digit_words(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Цифры неотрицательных чисел (< 10^7), выровненные к началу слова uint64.
+
+    Returns:
+        слова (младший байт - первая цифра, хвост - нулевые байты)
+        и длины в битах (8 × число цифр)
+    """
+    high = values // 10000
+    word = _DIGITS4[high] | (_DIGITS4[values - high * 10000] << np.uint64(32))
+    n_digits = np.ones(values.shape, dtype=np.uint8)
+    for power in (10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6):
+        n_digits += values >= power
+    bits = n_digits.astype(np.uint64) * np.uint64(8)
+    return word >> (np.uint64(64) - bits), bits
+
+
+def format_rows(prefix: bytes, kind: str, separators: bytes, columns: np.ndarray) -> bytes:
+    """
+    Текст строк таблицы без цикла по строкам.
+
+    Каждое значение записывается в слово uint64 фиксированной ширины
+    (цифры, затем разделитель), неиспользованные байты остаются нулевыми;
+    строки собираются в одну матрицу слов, нулевые байты удаляются одним
+    bytes.translate.
+
+    Args:
+        prefix: начало каждой строки, до 8 байт (b"v ", b"f " ...)
+        kind: 'd' - неотрицательные целые, 'f' - как '%.4f'
+        separators: по одному байту после каждой колонки (последний - перевод строки)
+        columns: массив (N, K)
+
+    Returns:
+        Байты всех N строк
+    """
+    columns = np.asarray(columns)
+    n, k = columns.shape
+    if n == 0:
+        return b""
+    seps = np.frombuffer(separators, dtype=np.uint8).astype(np.uint64)
+    head = np.frombuffer(prefix.ljust(8, b"\0"), dtype='<u8')[0]
+
+    if kind == 'd':
+        if columns.min() < 0 or columns.max() >= DIGITS_LIMIT:
+            return _format_rows_slow(prefix, kind, separators, columns)
+        words, bits = _digit_words(columns.astype(np.int32))
+        rows = np.empty((n, 1 + k), dtype=np.uint64)
+        rows[:, 1:] = words | (seps << bits)
+    else:
+        values = columns.astype(np.float64)
+        fixed = np.rint(np.abs(values) * 10000)
+        if not np.all(fixed < DIGITS_LIMIT * 10000.0):
+            return _format_rows_slow(prefix, kind, separators, columns)
+        whole, frac = np.divmod(fixed.astype(np.int64), 10000)
+        words, _ = _digit_words(whole.astype(np.int32))
+
+        # Знак - отдельным байтом перед цифрами ('-0.0000' не пишется)
+        negative = ((values < 0) & (fixed > 0)).astype(np.uint64)
+        words = (words << (negative * np.uint64(8))) | (negative * np.uint64(ord('-')))
+
+        rows = np.empty((n, 1 + 2 * k), dtype=np.uint64)
+        rows[:, 1::2] = words
+        rows[:, 2::2] = (np.uint64(ord('.')) |
+                         (_DIGITS4[frac] << np.uint64(8)) |
+                         (seps << np.uint64(40)))
+
+    rows[:, 0] = head
+    return rows.tobytes().translate(None, b"\0")
+
+
+def _format_rows_slow(prefix: bytes, kind: str, separators: bytes, columns: np.ndarray) -> bytes:
+    """Запасной путь для значений вне диапазона быстрого форматирования."""
+    fmt = prefix.decode() + ''.join(f"%{'d' if kind == 'd' else '.4f'}{chr(c)}" for c in separators)
+    return ''.join(fmt % tuple(row) for row in columns.tolist()).encode()
+
+
+def _write_rows(stream, prefix: bytes, kind: str, separators: bytes,
+                columns: np.ndarray, chunk: int = 1 << 17):
+    """Запись блока строк кусками по chunk (ограничивает память под текст)."""
+    for lo in range(0, len(columns), chunk):
+        stream.write(format_rows(prefix, kind, separators, columns[lo:lo + chunk]))
+
+
+def unique_rows(values: np.ndarray, scale: float = 10000.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Уникальные строки после округления до 1/scale (точность записи в файл).
+
+    Returns:
+        уникальные строки (U, K) и индекс строки в них для каждой входной (N,)
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return values.reshape(0, values.shape[1]), np.zeros(0, dtype=np.intp)
+    first, index = row_ids(np.rint(values.astype(np.float64) * scale).astype(np.int64))
+    return values[first], index
+
+
+def row_ids(columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Плотная нумерация строк целочисленной матрицы (N, K).
+
+    Колонки упаковываются в один ключ int64 - сортируется один столбец
+    вместо лексикографического np.unique(axis=0). Если диапазоны не
+    помещаются в int64, половины колонок нумеруются отдельно и
+    упаковываются их плотные номера (не больше N каждый).
+
+    Returns:
+        first: по одной исходной строке на уникальную (U,)
+        index: номер уникальной строки для каждой входной (N,)
+    """
+    columns = np.asarray(columns, dtype=np.int64)
+    if len(columns) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+    low = columns.min(axis=0)
+    spans = [int(v) for v in columns.max(axis=0) - low + 1]
+    if np.prod(spans, dtype=object) >= 2 ** 63:
+        k = columns.shape[1]
+        if k == 1:
+            _, first, index = np.unique(columns[:, 0], return_index=True, return_inverse=True)
+            return first, index.reshape(-1)
+        return row_ids(np.column_stack([row_ids(columns[:, :k // 2])[1],
+                                        row_ids(columns[:, k // 2:])[1]]))
+
+    keys = columns[:, 0] - low[0]
+    for k in range(1, columns.shape[1]):
+        keys = keys * spans[k] + (columns[:, k] - low[k])
+
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    starts = np.empty(len(keys), dtype=bool)
+    starts[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=starts[1:])
+    index = np.empty(len(keys), dtype=np.intp)
+    index[order] = np.cumsum(starts) - 1
+    return order[starts], index
+
+
+def weld_mesh(mesh: IndexedMesh, scale: float = 10000.0,
+              min_area: float = 1e-12) -> Tuple[IndexedMesh, Dict[str, int]]:
+    """
+    Сварка совпадающих вершин и удаление лишних граней перед экспортом.
+
+    Вершины объединяются, если после округления до 1/scale совпадают
+    позиция, нормаль и UV (швы нормалей на углах коробок сохраняются):
+    нормали и UV нумеруются отдельно, затем позиция и оба номера
+    упаковываются в один ключ (row_ids). Затем удаляются вырожденные грани
+    (совпавшие индексы или площадь меньше min_area) и повторы - одинаковые
+    тройки вершин с тем же обходом и материалом.
+
+    Returns:
+        новая сетка и статистика: vertices_before/after, faces_before/after,
+        degenerate, duplicate
+    """
+    stats = {'vertices_before': mesh.n_vertices, 'faces_before': mesh.n_faces}
+
+    _, normal_id = unique_rows(mesh.normals, scale)
+    _, uv_id = unique_rows(mesh.uvs, scale)
+    positions = np.rint(mesh.vertices.astype(np.float64) * scale).astype(np.int64)
+    representative, vertex_id = row_ids(
+        np.column_stack([positions, normal_id, uv_id]).reshape(-1, 5))
+
+    faces = vertex_id[mesh.faces]
+    vertices = mesh.vertices[representative]
+    u = vertices[faces[:, 1]] - vertices[faces[:, 0]]
+    v = vertices[faces[:, 2]] - vertices[faces[:, 0]]
+    doubled_area_sq = ((u[:, 1] * v[:, 2] - u[:, 2] * v[:, 1]) ** 2 +
+                       (u[:, 2] * v[:, 0] - u[:, 0] * v[:, 2]) ** 2 +
+                       (u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]) ** 2)
+    degenerate = ((faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) |
+                  (faces[:, 0] == faces[:, 2]) | (doubled_area_sq < (2 * min_area) ** 2))
+
+    # Повторы: циклический сдвиг к наименьшему индексу сохраняет обход,
+    # поэтому грани спина к спине (две стороны плоскости) не удаляются
+    shift = np.argmin(faces, axis=1)
+    canonical = np.take_along_axis(faces, (shift[:, None] + np.arange(3)) % 3, axis=1)
+    first, group = row_ids(np.column_stack([canonical, mesh.face_materials]))
+    keep = ~degenerate & (first[group] == np.arange(len(faces)))
+
+    stats['degenerate'] = int(degenerate.sum())
+    stats['duplicate'] = int(len(faces) - stats['degenerate'] - keep.sum())
+
+    # Остаются только вершины, на которые ссылаются грани
+    faces = faces[keep]
+    used = np.zeros(len(representative), dtype=bool)
+    used[faces] = True
+    remap = np.cumsum(used) - 1
+    source = representative[used]
+
+    welded = IndexedMesh.from_arrays(mesh.vertices[source], mesh.normals[source], mesh.uvs[source],
+                                     remap[faces], mesh.face_materials[keep], mesh.materials)
+    stats['vertices_after'] = welded.n_vertices
+    stats['faces_after'] = welded.n_faces
+    return welded, stats
+
+
+def weld_report(stats: Dict[str, int]) -> str:
+    """Строка отчёта о сварке для вывода экспортёров."""
+    return (f"Сварка: вершин {stats['vertices_before']} → {stats['vertices_after']}, "
+            f"граней {stats['faces_before']} → {stats['faces_after']} "
+            f"(вырожденных {stats['degenerate']}, повторов {stats['duplicate']})")
+
+
+def write_obj(mesh: IndexedMesh, filename: str, mtl_name: Optional[str] = None,
+              header: str = "# Room 3D Model"):
+    """
+    Запись сетки в Wavefront OBJ.
+
+    Блоки v / vt / vn и грани форматируются целиком (format_rows) в
+    буферизованный двоичный поток. Совпадающие нормали и UV записываются
+    один раз; грани сгруппированы по материалам (один usemtl на материал).
+    """
+    normals, normal_index = unique_rows(mesh.normals)
+    uvs, uv_index = unique_rows(mesh.uvs)
+
+    faces = mesh.faces.astype(np.int64)
+    corners = np.stack([faces + 1,
+                        uv_index[faces] + 1,
+                        normal_index[faces] + 1], axis=2).reshape(-1, 9)
+
+    face_materials = mesh.face_materials
+    order = np.argsort(face_materials, kind='stable')
+    ids, starts = np.unique(face_materials[order], return_index=True)
+    bounds = np.append(starts, len(order))
+
+    with open(filename, 'wb') as f:
+        f.write((header + "\n").encode('utf-8'))
+        if mtl_name:
+            f.write(f"mtllib {mtl_name}\n".encode('utf-8'))
+        f.write(b"\n")
+
+        _write_rows(f, b"v ", 'f', b"  \n", mesh.vertices)
+        f.write(b"\n")
+        _write_rows(f, b"vt ", 'f', b" \n", uvs)
+        f.write(b"\n")
+        _write_rows(f, b"vn ", 'f', b"  \n", normals)
+        f.write(b"\n")
+
+        for mat_id, lo, hi in zip(ids, bounds[:-1], bounds[1:]):
+            f.write(f"usemtl {mesh.materials[mat_id]}\n".encode('utf-8'))
+            _write_rows(f, b"f ", 'd', b"// // //\n", corners[order[lo:hi]])
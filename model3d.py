@@ -1,10 +1,13 @@
 import numpy as np
-import cv2
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
 from pathlib import Path
-from collections import Counter
 from room_detector import RoomDimensions, Window, Door
+from mesh import (IndexedMesh, MeshCache, add_wall, add_wall_slab, input_key, lod_path,
+                  weld_mesh, weld_report, write_obj)
+from color_stats import COLOR_ZONES, most_common_color, photo_colors
+from gltf import write_glb
+from texture_atlas import TextureAtlas, photo_surfaces
 
 
 @dataclass
@@ -28,13 +31,23 @@ class Wall3D:
 class RoomModel3D:
     """Генератор 3D модели комнаты."""
 
-    def __init__(self, room_dims: RoomDimensions):
+    # Уровни детализации: 0 - стены с проёмами, 1 - стена одним
+    # прямоугольником, проёмы - накладки материала
+    LOD_LEVELS = 2
+
+    def __init__(self, room_dims: RoomDimensions, cache: Optional[MeshCache] = None):
+        """
+        Args:
+            cache: кэш фрагментов сетки для повторных экспортов той же комнаты
+        """
         self.dims = room_dims
+        self.cache = cache if cache is not None else MeshCache()
         self.walls = []
         self.floor = None
         self.floor_color = (0.5, 0.4, 0.3)
         self.ceiling = None
         self.ceiling_color = (0.95, 0.95, 0.95)
+        self.atlas: Optional[TextureAtlas] = None
 
     def analyze_photo_colors(self, images: List[np.ndarray], windows_data: List[Dict] = None):
         """
@@ -50,45 +63,30 @@ class RoomModel3D:
         floor_samples = []
         ceiling_samples = []
 
+        # Все зоны всех фото одним проходом (результат общий с этапом планировки)
+        stats = photo_colors(images)
+        wall_map = {'left': 'left', 'center': 'top', 'right': 'right'}
+
         for i, img in enumerate(images):
             if img is None:
                 continue
 
             print(f"    Обработка фото {i + 1}...")
-            h, w = img.shape[:2]
-
-            # Разбиваем на зоны
-            zones = {
-                'left': img[:, :w // 4],
-                'center': img[:, w // 4:3 * w // 4],
-                'right': img[:, 3 * w // 4:],
-                'floor': img[2 * h // 3:, :],
-                'ceiling': img[:h // 3, :]
-            }
-
-            # Анализ каждой зоны
-            for zone_name, zone_img in zones.items():
-                if zone_img.size == 0:
-                    continue
-
-                # Получаем доминирующий цвет в зоне
-                dominant_color = self._get_dominant_color(zone_img)
+            for zone_name in COLOR_ZONES:
+                dominant = stats.dominant([zone_name], [i])
+                dominant_color = tuple(c / 255.0 for c in dominant[0]) if dominant else (0.8, 0.8, 0.8)
 
                 if zone_name == 'floor':
                     floor_samples.append(dominant_color)
                 elif zone_name == 'ceiling':
                     ceiling_samples.append(dominant_color)
                 else:
-                    # Определяем стену
-                    wall_map = {'left': 'left', 'center': 'top', 'right': 'right'}
-                    wall_key = wall_map.get(zone_name)
-                    if wall_key:
-                        wall_samples[wall_key].append(dominant_color)
+                    wall_samples[wall_map[zone_name]].append(dominant_color)
 
         # Выбираем цвета для стен
         for wall_name, colors in wall_samples.items():
             if colors:
-                color = self._most_common_color(colors)
+                color = most_common_color(colors)
                 print(f"    Стена {wall_name}: RGB({color[0] * 255:.0f}, {color[1] * 255:.0f}, {color[2] * 255:.0f})")
                 # Применяем к стенам
                 for wall in self.walls:
@@ -97,59 +95,16 @@ class RoomModel3D:
 
         # Пол
         if floor_samples:
-            self.floor_color = self._most_common_color(floor_samples)
+            self.floor_color = most_common_color(floor_samples)
             print(
                 f"    Пол: RGB({self.floor_color[0] * 255:.0f}, {self.floor_color[1] * 255:.0f}, {self.floor_color[2] * 255:.0f})")
 
         # Потолок
         if ceiling_samples:
-            self.ceiling_color = self._most_common_color(ceiling_samples)
+            self.ceiling_color = most_common_color(ceiling_samples)
             print(
                 f"    Потолок: RGB({self.ceiling_color[0] * 255:.0f}, {self.ceiling_color[1] * 255:.0f}, {self.ceiling_color[2] * 255:.0f})")
 
-    def _get_dominant_color(self, image: np.ndarray) -> Tuple[float, float, float]:
-        """
-        Находит доминирующий цвет в изображении.
-        """
-        # Уменьшаем для скорости
-        small = cv2.resize(image, (30, 30))
-
-        # Конвертируем в RGB
-        rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
-
-        # Фильтруем очень темные и очень светлые пиксели
-        pixels = rgb.reshape(-1, 3)
-        brightness = np.mean(pixels, axis=1)
-        valid_pixels = pixels[(brightness > 40) & (brightness < 215)]
-
-        if len(valid_pixels) == 0:
-            return (0.8, 0.8, 0.8)
-
-        # Группируем похожие цвета
-        quantized = (valid_pixels // 25) * 25 + 12
-
-        # Считаем частоту
-        color_counts = Counter(map(tuple, quantized))
-        most_common = color_counts.most_common(1)[0][0]
-
-        # Нормализуем в [0, 1]
-        return tuple(c / 255.0 for c in most_common)
-
-    def _most_common_color(self, colors: List[Tuple[float, float, float]]) -> Tuple[float, float, float]:
-        """
-        Выбирает самый частый цвет из списка.
-        """
-        if not colors:
-            return (0.8, 0.8, 0.8)
-
-        # Округляем для группировки похожих
-        quantized = [(round(r, 1), round(g, 1), round(b, 1)) for r, g, b in colors]
-
-        color_counts = Counter(quantized)
-        most_common = color_counts.most_common(1)[0][0]
-
-        return most_common
-
     def _get_wall_name(self, wall: Wall3D) -> str:
         """Определить имя стены по нормали."""
         normals = {
@@ -213,252 +168,170 @@ class RoomModel3D:
             'normal': np.array([0, -1, 0])
         }
 
-    def export_obj(self, filename: str, images: List[np.ndarray] = None, windows_data: List[Dict] = None):
-        """Экспорт в Wavefront OBJ с цветами из фото."""
-
-        if images and len(images) > 0:
-            self.analyze_photo_colors(images, windows_data)
-
-        all_vertices = []
-        all_faces = []
-        vertex_offset = 1
+    def build_mesh(self, lod: int = 0) -> IndexedMesh:
+        """
+        Геометрия комнаты: стены с проёмами, пол и потолок.
 
-        mtl_filename = filename.replace('.obj', '.mtl')
+        Каждая стена, пол и потолок - отдельный фрагмент в self.cache;
+        перестраиваются только фрагменты с изменившимися входными данными.
 
-        lines = [
-            "# Room 3D Model - Generated by RoomPlanner",
-            f"mtllib {Path(mtl_filename).name}",
-            ""
-        ]
+        Args:
+            lod: уровень детализации (0 - полный, см. LOD_LEVELS)
+        """
+        self.cache.begin()
+        prefix = f"lod{lod}/"
+        chunks, names = [], []
+        build_wall = self._build_wall_with_holes if lod == 0 else self._build_wall_slab
 
         # Генерируем стены
         for i, wall in enumerate(self.walls):
-            lines.append(f"# Wall {i + 1} ({self._get_wall_name(wall)})")
-            verts, faces, vertex_offset = self._build_wall_with_holes(wall, vertex_offset, i)
-            all_vertices.extend(verts)
-            all_faces.extend(faces)
-
-        # Генерируем пол
-        lines.append("# Floor")
-        verts, faces, vertex_offset = self._build_floor(self.floor['corners'], vertex_offset)
-        all_vertices.extend(verts)
-        all_faces.extend([("floor", *f) for f in faces])
-
-        # Генерируем потолок
-        lines.append("# Ceiling")
-        verts, faces, vertex_offset = self._build_ceiling(self.ceiling['corners'], vertex_offset)
-        all_vertices.extend(verts)
-        all_faces.extend([("ceiling", *f) for f in faces])
-
-        # Записываем вершины
-        for v in all_vertices:
-            lines.append(f"v {v[0]:.4f} {v[1]:.4f} {v[2]:.4f}")
-
-        # Текстурные координаты
-        lines.extend(["", "vt 0.0 0.0", "vt 1.0 0.0", "vt 1.0 1.0", "vt 0.0 1.0"])
-
-        # Нормали
-        lines.append("")
-        for wall in self.walls:
-            lines.append(f"vn {wall.normal[0]:.4f} {wall.normal[1]:.4f} {wall.normal[2]:.4f}")
-        lines.append(f"vn {self.floor['normal'][0]:.4f} {self.floor['normal'][1]:.4f} {self.floor['normal'][2]:.4f}")
-        lines.append(
-            f"vn {self.ceiling['normal'][0]:.4f} {self.ceiling['normal'][1]:.4f} {self.ceiling['normal'][2]:.4f}")
-
-        # Записываем грани
-        lines.append("")
-        current_mtl = None
-        wall_normal_offset = 1
-        floor_normal_offset = wall_normal_offset + len(self.walls)
-        ceiling_normal_offset = floor_normal_offset + 1
-
-        for face in all_faces:
-            mat = face[0]
-            if mat != current_mtl:
-                current_mtl = mat
-                lines.append(f"usemtl {mat}")
-
-            # Определяем индекс нормали
-            if mat == "floor":
-                ni = floor_normal_offset
-            elif mat == "ceiling":
-                ni = ceiling_normal_offset
-            else:
-                # Для стен используем соответствующий индекс
-                wall_idx = int(mat.split('_')[1]) if '_' in mat else 0
-                ni = wall_normal_offset + wall_idx
-
-            # Формируем строку грани (используем 4 вершины для квадратов)
-            if len(face) == 5:  # Треугольник
-                _, v1, v2, v3, _ = face
-                lines.append(f"f {v1}/{1}/{ni} {v2}/{2}/{ni} {v3}/{3}/{ni}")
-            elif len(face) == 6:  # Четырехугольник
-                _, v1, v2, v3, v4, _ = face
-                lines.append(f"f {v1}/{1}/{ni} {v2}/{2}/{ni} {v3}/{3}/{ni} {v4}/{4}/{ni}")
+            names.append(f"{prefix}wall_{i}")
+            chunks.append(self.cache.get(names[-1], input_key(i, wall),
+                                         lambda mesh, wall=wall, i=i: build_wall(wall, mesh, i)))
+
+        # Генерируем пол и потолок
+        names += [f"{prefix}floor", f"{prefix}ceiling"]
+        chunks.append(self.cache.get(names[-2], input_key(self.floor['corners'], self.floor['normal']),
+                                     lambda mesh: self._build_floor(self.floor['corners'], mesh)))
+        chunks.append(self.cache.get(names[-1], input_key(self.ceiling['corners'], self.ceiling['normal']),
+                                     lambda mesh: self._build_ceiling(self.ceiling['corners'], mesh)))
+
+        self.cache.retain(names, prefix)
+        return IndexedMesh.concatenate(chunks)
+
+    def bake_textures(self, images: List[np.ndarray]) -> Optional[TextureAtlas]:
+        """Атлас текстур стен, пола и потолка из зон фото."""
+        walls = [(f"wall_{i}", self._get_wall_name(wall), wall) for i, wall in enumerate(self.walls)]
+        surfaces = photo_surfaces(images, walls, (self.dims.width, self.dims.length))
+        if not surfaces:
+            return None
+        atlas = TextureAtlas()
+        atlas.bake(surfaces)
+        print(f"  Атлас текстур: {len(surfaces)} поверхностей, "
+              f"{atlas.image.shape[1]}×{atlas.image.shape[0]} пикселей")
+        return atlas
+
+    def _export_mesh(self, lod: int = 0):
+        """Сетка уровня lod для записи: атлас (если запечён) и сварка."""
+        mesh = self.build_mesh(lod)
+        if self.atlas is not None:
+            self.atlas.apply(mesh)
+        return weld_mesh(mesh)
+
+    def export_obj(self, filename: str, images: List[np.ndarray] = None, windows_data: List[Dict] = None,
+                   lods: bool = False, textures: bool = False):
+        """
+        Экспорт в Wavefront OBJ с цветами из фото.
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines))
+        Args:
+            lods: дополнительно записать упрощённые уровни (room_lod1.obj ...)
+                с общим MTL
+            textures: запечь участки фото в атлас (room_atlas.png, материал atlas)
+        """
+
+        if images and len(images) > 0:
+            self.analyze_photo_colors(images, windows_data)
+        self.atlas = self.bake_textures(images) if textures and images else None
+
+        mtl_filename = filename.replace('.obj', '.mtl')
+        atlas_filename = None
+        if self.atlas is not None:
+            atlas_filename = filename.replace('.obj', '_atlas.png')
+            self.atlas.save(atlas_filename)
+
+        mesh, stats = self._export_mesh()
+        write_obj(mesh, filename, Path(mtl_filename).name,
+                  header="# Room 3D Model - Generated by RoomPlanner")
 
-        self._write_mtl_colored(mtl_filename)
+        self._write_mtl_colored(mtl_filename, Path(atlas_filename).name if atlas_filename else None)
 
         print(f"\n✓ 3D модель сохранена: {filename}")
-        print(f"  Вершин: {len(all_vertices)}")
-        print(f"  Граней: {len(all_faces)}")
+        print(f"  Вершин: {mesh.n_vertices}")
+        print(f"  Граней: {mesh.n_faces}")
+        print(f"  {weld_report(stats)}")
+        print(f"  {self.cache.report()}")
         print(f"  Материалы: {mtl_filename}")
 
-    def _build_wall_with_holes(self, wall: Wall3D, vertex_offset: int, wall_idx: int):
-        """Построить стену с вырезами под окна и двери."""
-        vertices = []
-        faces = []
-
-        start, end = wall.start, wall.end
-        height = wall.height
-        wall_vec = end - start
-        wall_len = np.linalg.norm(wall_vec)
-
-        if wall_len < 0.01:
-            return vertices, faces, vertex_offset
-
-        wall_dir = wall_vec / wall_len
-
-        wall_normal_idx = wall_idx
-
-        # Собираем все проемы (окна + двери)
-        all_openings = []
-
-        # Добавляем окна
-        for win in wall.windows:
-            all_openings.append({
-                'x': win.x,
-                'y': win.y,
-                'width': win.width,
-                'height': win.height,
-                'type': 'window'
-            })
-
-        # Добавляем двери
-        for door in wall.doors:
-            all_openings.append({
-                'x': door.x,
-                'y': 0,  # Дверь от пола
-                'width': door.width,
-                'height': door.height,
-                'type': 'door'
-            })
-
-        # Сортируем проемы по X
-        all_openings.sort(key=lambda op: op['x'])
-
-        # Создаем позиции по X для разбиения стены
-        x_positions = [0.0]
-
-        for op in all_openings:
-            x1 = max(op['x'], 0.0)
-            x2 = min(op['x'] + op['width'], wall_len)
-
-            if x1 > x_positions[-1] + 0.05:
-                x_positions.append(x1)
-            if x2 > x_positions[-1] + 0.05 and x2 < wall_len - 0.05:
-                x_positions.append(x2)
-
-        if x_positions[-1] < wall_len - 0.05:
-            x_positions.append(wall_len)
-
-        # Для каждого сегмента по горизонтали
-        for col_idx in range(len(x_positions) - 1):
-            x_start, x_end = x_positions[col_idx], x_positions[col_idx + 1]
-
-            # Находим проемы в этом сегменте
-            col_openings = [op for op in all_openings
-                            if not (op['x'] + op['width'] <= x_start or op['x'] >= x_end)]
-
-            # Создаем позиции по Y для разбиения
-            y_positions = [0.0]
-            for op in col_openings:
-                y1 = op['y']
-                y2 = op['y'] + op['height']
-                if y1 > y_positions[-1] + 0.05:
-                    y_positions.append(y1)
-                if y2 > y_positions[-1] + 0.05 and y2 < height - 0.05:
-                    y_positions.append(y2)
-
-            if y_positions[-1] < height - 0.05:
-                y_positions.append(height)
-
-            # Для каждого сегмента по вертикали
-            for row_idx in range(len(y_positions) - 1):
-                y1, y2 = y_positions[row_idx], y_positions[row_idx + 1]
-
-                # Проверяем, является ли этот сегмент проемом
-                is_opening = False
-                opening_type = 'wall'
-
-                for op in col_openings:
-                    if (op['y'] - 0.05 <= y1 <= op['y'] + op['height'] + 0.05 and
-                            op['x'] - 0.05 <= x_start <= op['x'] + op['width'] + 0.05):
-                        is_opening = True
-                        opening_type = op['type']
-                        break
-
-                # Вычисляем вершины сегмента
-                p0 = start + wall_dir * x_start + np.array([0, y1, 0])
-                p1 = start + wall_dir * x_end + np.array([0, y1, 0])
-                p2 = start + wall_dir * x_end + np.array([0, y2, 0])
-                p3 = start + wall_dir * x_start + np.array([0, y2, 0])
-
-                base = vertex_offset + len(vertices)
-                vertices.extend([p0, p1, p2, p3])
-
-                # Определяем материал
-                if is_opening:
-                    if opening_type == 'door':
-                        mat = f"door_{wall_idx}"
-                    else:
-                        mat = f"window_{wall_idx}"
-                else:
-                    mat = f"wall_{wall_idx}"
+        if lods:
+            self._export_lods(filename, lambda lod_mesh, path: write_obj(
+                lod_mesh, path, Path(mtl_filename).name,
+                header="# Room 3D Model - Generated by RoomPlanner"))
 
-                # Добавляем грани (два треугольника для прямоугольника)
-                faces.extend([
-                    (mat, base, base + 1, base + 2, wall_idx),
-                    (mat, base, base + 2, base + 3, wall_idx)
-                ])
+    def export_glb(self, filename: str, images: List[np.ndarray] = None, windows_data: List[Dict] = None,
+                   lods: bool = False, textures: bool = False):
+        """
+        Экспорт в двоичный glTF (GLB) с цветами из фото.
 
-        return vertices, faces, vertex_offset + len(vertices)
+        Args:
+            lods: дополнительно записать упрощённые уровни (room_lod1.glb ...)
+            textures: запечь участки фото в атлас, встроенный в GLB
+        """
 
-    def _build_floor(self, corners: List[np.ndarray], vertex_offset: int):
-        """Построить пол."""
-        v0, v1, v2, v3 = corners
-        base = vertex_offset
+        if images and len(images) > 0:
+            self.analyze_photo_colors(images, windows_data)
+        self.atlas = self.bake_textures(images) if textures and images else None
+        atlas_png = {TextureAtlas.MATERIAL: self.atlas.encode()} if self.atlas is not None else None
 
-        vertices = [v0, v1, v2, v3]
-        faces = [
-            (base, base + 1, base + 2),
-            (base, base + 2, base + 3)
-        ]
+        mesh, stats = self._export_mesh()
+        colors = self.material_colors()
+        write_glb(mesh, filename, colors, textures=atlas_png)
 
-        return vertices, faces, vertex_offset + 4
+        print(f"\n✓ 3D модель сохранена: {filename}")
+        print(f"  Вершин: {mesh.n_vertices}")
+        print(f"  Граней: {mesh.n_faces}")
+        print(f"  {weld_report(stats)}")
+        print(f"  {self.cache.report()}")
+
+        if lods:
+            self._export_lods(filename, lambda lod_mesh, path: write_glb(lod_mesh, path, colors,
+                                                                        textures=atlas_png))
+
+    def _export_lods(self, filename: str, write):
+        """Уровни детализации 1..LOD_LEVELS-1 в соседние файлы (lod_path)."""
+        for level in range(1, self.LOD_LEVELS):
+            mesh, _ = self._export_mesh(lod=level)
+            path = lod_path(filename, level)
+            write(mesh, path)
+            print(f"  LOD{level}: {mesh.n_vertices} вершин, {mesh.n_faces} граней → {path}")
+
+    def material_colors(self) -> Dict[str, Tuple[float, ...]]:
+        """Основные цвета материалов (r, g, b[, alpha]) по именам из сетки."""
+        colors = {}
+        for i, wall in enumerate(self.walls):
+            r, g, b = wall.color
+            colors[f"wall_{i}"] = (r, g, b)
+            # Окно — светлее и полупрозрачное
+            colors[f"window_{i}"] = (min(r + 0.2, 1.0), min(g + 0.2, 1.0), min(b + 0.3, 1.0), 0.6)
+            # Дверь — коричневый цвет дерева
+            colors[f"door_{i}"] = (0.5, 0.35, 0.15)
+        colors["floor"] = tuple(self.floor_color)
+        colors["ceiling"] = tuple(self.ceiling_color)
+        return colors
 
-    def _build_ceiling(self, corners: List[np.ndarray], vertex_offset: int):
-        """Построить потолок."""
-        v0, v1, v2, v3 = corners
-        base = vertex_offset
+    def _build_wall_with_holes(self, wall: Wall3D, mesh: IndexedMesh, wall_idx: int) -> int:
+        """Построить стену с вырезами под окна и двери."""
+        return add_wall(mesh, wall, wall_idx)
 
-        vertices = [v0, v1, v2, v3]
-        faces = [
-            (base, base + 1, base + 2),
-            (base, base + 2, base + 3)
-        ]
+    def _build_wall_slab(self, wall: Wall3D, mesh: IndexedMesh, wall_idx: int) -> int:
+        """Стена одним прямоугольником с накладками проёмов (LOD)."""
+        return add_wall_slab(mesh, wall, wall_idx)
 
-        return vertices, faces, vertex_offset + 4
+    def _build_floor(self, corners: List[np.ndarray], mesh: IndexedMesh):
+        """Построить пол."""
+        mesh.add_quads(np.array(corners[:4]), self.floor['normal'], "floor")
+
+    def _build_ceiling(self, corners: List[np.ndarray], mesh: IndexedMesh):
+        """Построить потолок."""
+        mesh.add_quads(np.array(corners[:4]), self.ceiling['normal'], "ceiling")
 
-    def _write_mtl_colored(self, filename: str):
-        """Записать MTL с реальными цветами."""
+    def _write_mtl_colored(self, filename: str, atlas_name: Optional[str] = None):
+        """Записать MTL с реальными цветами (и материалом атласа, если он запечён)."""
         lines = ["# Room materials - Generated by RoomPlanner"]
+        colors = self.material_colors()
 
         # Материалы для стен
         for i, wall in enumerate(self.walls):
-            r, g, b = wall.color
+            r, g, b = colors[f"wall_{i}"]
 
             # Основной цвет стены
             lines.append(f"""
@@ -470,9 +343,7 @@ Ns 10
 illum 2""")
 
             # Окно — светлее и полупрозрачное
-            wr = min(r + 0.2, 1.0)
-            wg = min(g + 0.2, 1.0)
-            wb = min(b + 0.3, 1.0)
+            wr, wg, wb, _ = colors[f"window_{i}"]
             lines.append(f"""
 newmtl window_{i}
 Ka {wr:.3f} {wg:.3f} {wb:.3f}
@@ -511,20 +382,35 @@ Ks 0.1 0.1 0.1
 Ns 5
 illum 2""")
 
+        # Атлас текстур из фото
+        if atlas_name:
+            lines.append(f"""
+newmtl {TextureAtlas.MATERIAL}
+Ka 1.000 1.000 1.000
+Kd 1.000 1.000 1.000
+Ks 0.1 0.1 0.1
+Ns 5
+illum 2
+map_Kd {atlas_name}""")
+
         with open(filename, 'w', encoding='utf-8') as f:
             f.write('\n'.join(lines))
 
 
 def create_3d_model(room_dims: RoomDimensions, windows: List[Window], doors: List[Door],
                     output_path: str, images: List[np.ndarray] = None,
-                    windows_data: List[Dict] = None):
-    """Создать 3D модель с цветами из фото и дверями."""
+                    windows_data: List[Dict] = None, cache: Optional[MeshCache] = None,
+                    lods: bool = False, textures: bool = False):
+    """Создать 3D модель с цветами из фото и дверями (.obj + .mtl или .glb по расширению)."""
     print("\nПОСТРОЕНИЕ 3D МОДЕЛИ")
     print(f"Размеры: {room_dims.width}м x {room_dims.length}м x {room_dims.height}м")
     print(f"Окон: {len(windows)}, Дверей: {len(doors)}")
 
-    model = RoomModel3D(room_dims)
+    model = RoomModel3D(room_dims, cache)
     model.build_walls(windows, doors)
-    model.export_obj(output_path, images=images, windows_data=windows_data)
+    if output_path.lower().endswith('.glb'):
+        model.export_glb(output_path, images=images, windows_data=windows_data, lods=lods, textures=textures)
+    else:
+        model.export_obj(output_path, images=images, windows_data=windows_data, lods=lods, textures=textures)
 
     return model
\ No newline at end of file
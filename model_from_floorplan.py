@@ -1,15 +1,18 @@
 import numpy as np
-import cv2
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
 from pathlib import Path
-from PIL import Image
-from collections import Counter
 import os
 from typing import TYPE_CHECKING
 
 # Импортируем BoundingBox3D напрямую
 from furniture_detector import BoundingBox3D
+from mesh import (IndexedMesh, MeshCache, add_wall, add_wall_slab, input_key, lod_path,
+                  weld_mesh, weld_report, write_obj)
+from color_stats import PLAN_EDGE_ZONES, ZoneColors
+from floorplan import FloorplanRender
+from gltf import MeshInstance, unit_box, write_glb
+from texture_atlas import TextureAtlas, photo_surfaces
 
 
 @dataclass
@@ -23,6 +26,7 @@ class Wall3D:
     windows: List = None
     doors: List = None
     color: Tuple[float, float, float] = (0.85, 0.85, 0.85)
+    plan_name: Optional[str] = None  # Имя той же стены на планировке (дальняя 'top' -> 3D 'bottom')
 
     def __post_init__(self):
         if self.windows is None:
@@ -34,12 +38,36 @@ class Wall3D:
 class ModelFromFloorplan:
     """Генератор 3D модели на основе 2D планировки."""
 
-    def __init__(self, room_dims, floorplan_image=None):
+    # Уровни детализации: 0 - полный, 1 - стена одним прямоугольником
+    # с накладками проёмов, 2 - дополнительно мебель осевыми коробками без дна
+    LOD_LEVELS = 3
+
+    # Масштаб атласа, встроенного в GLB уровня детализации; уровни без
+    # записи (прокси) - без атласа, с плоскими цветами материалов
+    ATLAS_LOD_SCALE = {0: 1.0, 1: 0.5}
+
+    # Цвета мебели (по кругу)
+    FURNITURE_COLORS = [
+        (0.6, 0.4, 0.2),  # Коричневый (дерево)
+        (0.4, 0.4, 0.4),  # Серый (металл)
+        (0.8, 0.6, 0.4),  # Светлое дерево
+        (0.3, 0.3, 0.5),  # Темно-синий
+        (0.7, 0.7, 0.6),  # Бежевый
+    ]
+
+    def __init__(self, room_dims, floorplan_image=None, cache: MeshCache = None):
+        """
+        Args:
+            floorplan_image: FloorplanRender или путь к PNG планировки
+            cache: кэш фрагментов сетки для повторных экспортов той же комнаты
+        """
         self.dims = room_dims
+        self.cache = cache if cache is not None else MeshCache()
         self.floorplan_image = floorplan_image
         self.walls = []
         self.floor = None
         self.furniture = []  # Инициализируем пустым списком
+        self.atlas: Optional[TextureAtlas] = None
 
         # Стандартные цвета
         self.wall_color = (0.85, 0.85, 0.85)
@@ -48,34 +76,48 @@ class ModelFromFloorplan:
         self.window_color = (0.7, 0.8, 0.9)
 
     def extract_floorplan_features(self):
-        """Извлечение информации из изображения планировки."""
-        if not self.floorplan_image or not Path(self.floorplan_image).exists():
+        """
+        Извлечение информации из планировки.
+
+        FloorplanRender отдаёт цвета, которыми рисовалась планировка, и
+        растр в памяти; путь к PNG (прежний вариант) читается с диска.
+        """
+        render = self.floorplan_image if isinstance(self.floorplan_image, FloorplanRender) else None
+        if render is not None and (render.wall_color or render.floor_color):
+            if render.floor_color:
+                self.floor_color = render.floor_color
+                print(f"  Цвет пола из фото: RGB({self.floor_color[0] * 255:.0f}, "
+                      f"{self.floor_color[1] * 255:.0f}, {self.floor_color[2] * 255:.0f})")
+            if render.wall_color:
+                self.wall_color = render.wall_color
+                print(f"  Цвет стен из фото: RGB({self.wall_color[0] * 255:.0f}, "
+                      f"{self.wall_color[1] * 255:.0f}, {self.wall_color[2] * 255:.0f})")
+            return
+
+        if (render.image is None if render is not None
+                else not self.floorplan_image or not Path(self.floorplan_image).exists()):
             print("  Изображение планировки не найдено, используем стандартные цвета")
             return
 
         try:
-            img = Image.open(self.floorplan_image)
-            img_array = np.array(img)
-            h, w = img_array.shape[:2]
-
-            # Анализируем цвета
+            if render is not None:
+                img_array = render.image
+            else:
+                from PIL import Image  # Только для планировки из файла
+                img_array = np.array(Image.open(self.floorplan_image))
+
+            # Анализируем цвета: края планировки одним проходом (PIL - порядок RGB)
+            stats = ZoneColors([img_array], PLAN_EDGE_ZONES, bgr=False)
             wall_samples = []
-            floor_samples = []
 
-            # Левый и правый края (стены)
-            edge_width = w // 10
-            left_edge = img_array[:, :edge_width]
-            right_edge = img_array[:, -edge_width:]
-            top_edge = img_array[:edge_width, :]
-
-            for edge in [left_edge, right_edge, top_edge]:
-                colors = self._get_dominant_colors(edge, n_colors=2)
-                wall_samples.extend(colors)
+            # Левый, правый и верхний края (стены)
+            for edge in ('left', 'right', 'top'):
+                wall_samples.extend(tuple(c / 255.0 for c in color)
+                                    for color in stats.dominant([edge], n_colors=2))
 
             # Нижний край (пол)
-            bottom_height = h // 6
-            bottom_edge = img_array[-bottom_height:, :]
-            floor_colors = self._get_dominant_colors(bottom_edge, n_colors=2)
+            floor_colors = [tuple(c / 255.0 for c in color)
+                            for color in stats.dominant(['floor'], n_colors=2)]
             if floor_colors:
                 self.floor_color = floor_colors[0]
                 print(f"  Цвет пола из планировки: RGB({self.floor_color[0] * 255:.0f}, "
@@ -89,30 +131,6 @@ class ModelFromFloorplan:
         except Exception as e:
             print(f"  Ошибка при анализе планировки: {e}")
 
-    def _get_dominant_colors(self, image: np.ndarray, n_colors: int = 3):
-        """Получение доминирующих цветов."""
-        small = cv2.resize(image, (50, 50))
-
-        if len(small.shape) == 3:
-            rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
-        else:
-            rgb = cv2.cvtColor(cv2.cvtColor(small, cv2.COLOR_GRAY2BGR), cv2.COLOR_BGR2RGB)
-
-        pixels = rgb.reshape(-1, 3)
-        brightness = np.mean(pixels, axis=1)
-        mask = (brightness > 30) & (brightness < 225)
-        pixels = pixels[mask]
-
-        if len(pixels) == 0:
-            return []
-
-        # Простая группировка цветов
-        quantized = (pixels // 30) * 30 + 15
-        color_counts = Counter(map(tuple, quantized))
-
-        top_colors = [k for k, v in color_counts.most_common(n_colors)]
-        return [tuple(c / 255.0 for c in color) for color in top_colors]
-
     def _average_color(self, colors: List[Tuple[float, float, float]]) -> Tuple[float, float, float]:
         """Усреднение списка цветов."""
         if not colors:
@@ -225,7 +243,8 @@ class ModelFromFloorplan:
                 normal=wall_conf['normal'],
                 windows=wall_windows,
                 doors=wall_doors,
-                color=self.wall_color
+                color=self.wall_color,
+                plan_name=plan_name
             )
             self.walls.append(wall)
             print(f"  Стена {wall_name_3d}: длина={wall_length:.2f}м, "
@@ -243,325 +262,202 @@ class ModelFromFloorplan:
             'color': self.floor_color
         }
 
-    def _build_wall_segments(self, wall, vertex_offset, wall_idx):
+    def _build_wall_segments(self, wall, mesh: IndexedMesh, wall_idx) -> int:
         """Построение стены с разбиением на сегменты."""
-        vertices = []
-        faces = []
-
-        start, end = wall.start, wall.end
-        height = wall.height
-        wall_vec = end - start
-        wall_len = np.linalg.norm(wall_vec)
-
-        if wall_len < 0.01:
-            return vertices, faces, vertex_offset
-
-        wall_dir = wall_vec / wall_len
-
-        # Собираем все проемы
-        all_openings = []
-
-        for win in wall.windows:
-            all_openings.append({
-                'x': win.x,
-                'y': win.y,
-                'width': win.width,
-                'height': win.height,
-                'type': 'window'
-            })
-
-        for door in wall.doors:
-            all_openings.append({
-                'x': door.x,
-                'y': 0,
-                'width': door.width,
-                'height': door.height,
-                'type': 'door'
-            })
-
-        all_openings.sort(key=lambda op: op['x'])
-
-        # Точки разбиения по X
-        x_points = [0.0]
-        for op in all_openings:
-            x1 = max(op['x'], 0.0)
-            x2 = min(op['x'] + op['width'], wall_len)
-            if x1 > x_points[-1] + 0.05:
-                x_points.append(x1)
-            if x2 > x_points[-1] + 0.05 and x2 < wall_len - 0.05:
-                x_points.append(x2)
-
-        if x_points[-1] < wall_len - 0.05:
-            x_points.append(wall_len)
-
-        # Для каждого сегмента
-        for i in range(len(x_points) - 1):
-            x_start, x_end = x_points[i], x_points[i + 1]
-
-            seg_openings = [op for op in all_openings
-                            if not (op['x'] + op['width'] <= x_start or op['x'] >= x_end)]
-
-            # Точки разбиения по Y
-            y_points = [0.0]
-            for op in seg_openings:
-                y1 = op['y']
-                y2 = op['y'] + op['height']
-                if y1 > y_points[-1] + 0.05:
-                    y_points.append(y1)
-                if y2 > y_points[-1] + 0.05 and y2 < height - 0.05:
-                    y_points.append(y2)
-
-            if y_points[-1] < height - 0.05:
-                y_points.append(height)
-
-            for j in range(len(y_points) - 1):
-                y_start, y_end = y_points[j], y_points[j + 1]
-
-                # Проверяем, проем ли это
-                is_opening = False
-                opening_type = 'wall'
-
-                for op in seg_openings:
-                    if (op['y'] - 0.05 <= y_start <= op['y'] + op['height'] + 0.05 and
-                            op['x'] - 0.05 <= x_start <= op['x'] + op['width'] + 0.05):
-                        is_opening = True
-                        opening_type = op['type']
-                        break
-
-                # Вершины
-                p0 = start + wall_dir * x_start + np.array([0, y_start, 0])
-                p1 = start + wall_dir * x_end + np.array([0, y_start, 0])
-                p2 = start + wall_dir * x_end + np.array([0, y_end, 0])
-                p3 = start + wall_dir * x_start + np.array([0, y_end, 0])
-
-                base = len(vertices)
-                vertices.extend([p0, p1, p2, p3])
-
-                # Материал
-                if is_opening:
-                    if opening_type == 'door':
-                        mat = f"door_{wall_idx}"
-                    else:
-                        mat = f"window_{wall_idx}"
-                else:
-                    mat = f"wall_{wall_idx}"
-
-                # Грани (два треугольника)
-                faces.extend([
-                    (mat, base + vertex_offset, base + 1 + vertex_offset, base + 2 + vertex_offset),
-                    (mat, base + vertex_offset, base + 2 + vertex_offset, base + 3 + vertex_offset)
-                ])
-
-        return vertices, faces, vertex_offset + len(vertices)
-
-    def _build_plane(self, corners, vertex_offset, color_name):
+        return add_wall(mesh, wall, wall_idx)
+
+    def _build_plane(self, corners, mesh: IndexedMesh, color_name) -> int:
         """Построение плоскости (пол или потолок)."""
         if len(corners) < 4:
-            return [], [], vertex_offset
-
-        v0, v1, v2, v3 = corners[:4]
-        base = len(vertices) if 'vertices' in locals() else 0
-
-        vertices = [v0, v1, v2, v3]
-
-        # Грани (два треугольника)
-        faces = [
-            (color_name, base + vertex_offset, base + 1 + vertex_offset, base + 2 + vertex_offset),
-            (color_name, base + vertex_offset, base + 2 + vertex_offset, base + 3 + vertex_offset)
-        ]
-
-        return vertices, faces, vertex_offset + len(vertices)
+            return 0
+        mesh.add_quads(np.array(corners[:4]), self.floor['normal'], color_name)
+        return 1
 
     def add_furniture(self, furniture_boxes: List[BoundingBox3D]):
         """Добавление мебели как 3D коробок."""
         self.furniture = furniture_boxes
         print(f"\n  Добавлено {len(furniture_boxes)} объектов мебели")
 
-    def _build_furniture_box(self, box: BoundingBox3D, vertex_offset: int, idx: int):
-        """Построение одной коробки мебели."""
-        vertices = []
-        faces = []
-
-        c = box.center
-        w, h, d = box.dimensions / 2  # Половины размеров
-
-        # 8 вершин куба
-        corners = [
-            c + np.array([-w, -h, -d]),  # 0: нижний левый ближний
-            c + np.array([w, -h, -d]),  # 1: нижний правый ближний
-            c + np.array([w, h, -d]),  # 2: верхний правый ближний
-            c + np.array([-w, h, -d]),  # 3: верхний левый ближний
-            c + np.array([-w, -h, d]),  # 4: нижний левый дальний
-            c + np.array([w, -h, d]),  # 5: нижний правый дальний
-            c + np.array([w, h, d]),  # 6: верхний правый дальний
-            c + np.array([-w, h, d]),  # 7: верхний левый дальний
-        ]
+    def _build_furniture_box(self, box: BoundingBox3D, mesh: IndexedMesh, idx: int):
+        """Построение одной коробки мебели (6 граней с внешними нормалями)."""
+        mesh.add_box(box.corners(), f"furniture_{idx}")
 
-        base = vertex_offset
-        vertices.extend(corners)
-
-        # Грани (каждая как 2 треугольника)
-        # Нижняя (нормаль -Y)
-        faces.extend([
-            (f"furniture_{idx}", base, base + 1, base + 5),
-            (f"furniture_{idx}", base, base + 5, base + 4),
-        ])
-        # Верхняя (нормаль +Y)
-        faces.extend([
-            (f"furniture_{idx}", base + 3, base + 2, base + 6),
-            (f"furniture_{idx}", base + 3, base + 6, base + 7),
-        ])
-        # Передняя (нормаль -Z)
-        faces.extend([
-            (f"furniture_{idx}", base, base + 1, base + 2),
-            (f"furniture_{idx}", base, base + 2, base + 3),
-        ])
-        # Задняя (нормаль +Z)
-        faces.extend([
-            (f"furniture_{idx}", base + 4, base + 5, base + 6),
-            (f"furniture_{idx}", base + 4, base + 6, base + 7),
-        ])
-        # Левая (нормаль -X)
-        faces.extend([
-            (f"furniture_{idx}", base, base + 4, base + 7),
-            (f"furniture_{idx}", base, base + 7, base + 3),
-        ])
-        # Правая (нормаль +X)
-        faces.extend([
-            (f"furniture_{idx}", base + 1, base + 5, base + 6),
-            (f"furniture_{idx}", base + 1, base + 6, base + 2),
-        ])
-
-        return vertices, faces, vertex_offset + 8
-
-    def export_obj(self, filename):
-        """Экспорт в Wavefront OBJ формат."""
-        all_vertices = []
-        all_faces = []
-        vertex_offset = 1
+    def _build_furniture_proxy(self, box: BoundingBox3D, mesh: IndexedMesh, idx: int):
+        """Осевая описанная коробка мебели без нижней грани (LOD)."""
+        proxy = BoundingBox3D(center=box.center, dimensions=2 * box.half_extents)
+        mesh.add_box(proxy.corners(), f"furniture_{idx}", bottom=False)
 
-        mtl_filename = filename.replace('.obj', '.mtl')
+    def _build_wall_slab(self, wall, mesh: IndexedMesh, wall_idx) -> int:
+        """Стена одним прямоугольником с накладками проёмов (LOD)."""
+        return add_wall_slab(mesh, wall, wall_idx)
+
+    def build_mesh(self, furniture: bool = True, lod: int = 0) -> IndexedMesh:
+        """
+        Геометрия модели: стены, пол и мебель в одной сетке.
+
+        Стены, пол и каждый предмет мебели - отдельные фрагменты в self.cache;
+        перестраиваются только фрагменты с изменившимися входными данными.
+
+        Args:
+            furniture: добавлять коробки мебели (GLB хранит их экземплярами)
+            lod: уровень детализации (0 - полный, см. LOD_LEVELS)
+        """
+        self.cache.begin()
+        prefix = f"lod{lod}/"
+        chunks, names = [], []
+        build_wall = self._build_wall_segments if lod == 0 else self._build_wall_slab
+        build_box = self._build_furniture_box if lod < 2 else self._build_furniture_proxy
 
-        # Собираем все вершины и грани
         print("\n  Генерация геометрии:")
 
         # Стены
         for i, wall in enumerate(self.walls):
-            verts, faces, vertex_offset = self._build_wall_segments(wall, vertex_offset, i)
-            all_vertices.extend(verts)
-            all_faces.extend(faces)
-            print(f"    Стена {wall.name}: {len(verts)} вершин, {len(faces)} граней")
+            names.append(f"{prefix}wall_{i}")
+            chunk = self.cache.get(names[-1], input_key(i, wall),
+                                   lambda mesh, wall=wall, i=i: build_wall(wall, mesh, i))
+            chunks.append(chunk)
+            print(f"    Стена {wall.name}: {chunk.n_vertices} вершин, {chunk.n_faces} граней")
 
         # Пол
-        verts, faces, vertex_offset = self._build_plane(
-            self.floor['corners'],
-            vertex_offset,
-            "floor"
-        )
-        all_vertices.extend(verts)
-        all_faces.extend(faces)
-        print(f"    Пол: {len(verts)} вершин, {len(faces)} граней")
+        names.append(f"{prefix}floor")
+        chunk = self.cache.get(names[-1], input_key(self.floor['corners'], self.floor['normal']),
+                               lambda mesh: self._build_plane(self.floor['corners'], mesh, "floor"))
+        chunks.append(chunk)
+        print(f"    Пол: {chunk.n_vertices} вершин, {chunk.n_faces} граней")
 
         # МЕБЕЛЬ
-        if self.furniture:
+        if furniture and self.furniture:
             print("\n  Генерация мебели:")
             for i, box in enumerate(self.furniture):
-                verts, faces, vertex_offset = self._build_furniture_box(box, vertex_offset, i)
-                all_vertices.extend(verts)
-                all_faces.extend(faces)
+                names.append(f"{prefix}furniture_{i}")
+                chunks.append(self.cache.get(names[-1], input_key(i, box),
+                                             lambda mesh, box=box, i=i: build_box(box, mesh, i)))
                 print(f"    Коробка {i + 1}: {box.dimensions[0]:.2f}×{box.dimensions[1]:.2f}×{box.dimensions[2]:.2f}м")
 
-        # Собираем все уникальные нормали
-        all_normals = []
-        normal_map = {}
-
-        # Нормали стен
-        for wall in self.walls:
-            normal_tuple = tuple(wall.normal)
-            if normal_tuple not in normal_map:
-                normal_map[normal_tuple] = len(all_normals) + 1
-                all_normals.append(wall.normal)
-
-        # Нормаль пола
-        floor_normal = tuple(self.floor['normal'])
-        if floor_normal not in normal_map:
-            normal_map[floor_normal] = len(all_normals) + 1
-            all_normals.append(self.floor['normal'])
-
-        # Нормали для мебели (6 сторон куба)
-        furniture_normals = [
-            np.array([0, -1, 0]),  # bottom
-            np.array([0, 1, 0]),  # top
-            np.array([0, 0, -1]),  # front
-            np.array([0, 0, 1]),  # back
-            np.array([-1, 0, 0]),  # left
-            np.array([1, 0, 0]),  # right
-        ]
-        for fn in furniture_normals:
-            fn_tuple = tuple(fn)
-            if fn_tuple not in normal_map:
-                normal_map[fn_tuple] = len(all_normals) + 1
-                all_normals.append(fn)
+        self.cache.retain(names, prefix)
+        return IndexedMesh.concatenate(chunks)
+
+    def bake_textures(self, images: List[np.ndarray]) -> Optional[TextureAtlas]:
+        """
+        Атлас текстур стен и пола из зон фото (потолка в модели нет).
+
+        Зона фото выбирается по имени стены на планировке: дальняя стена
+        плана (центр фото, с окнами) в 3D называется 'bottom'.
+        """
+        walls = [(f"wall_{i}", wall.plan_name or wall.name, wall) for i, wall in enumerate(self.walls)]
+        surfaces = photo_surfaces(images, walls, (self.dims.width, self.dims.length), ceiling=False)
+        if not surfaces:
+            return None
+        atlas = TextureAtlas()
+        atlas.bake(surfaces)
+        print(f"  Атлас текстур: {len(surfaces)} поверхностей, "
+              f"{atlas.image.shape[1]}×{atlas.image.shape[0]} пикселей")
+        return atlas
+
+    def _export_mesh(self, furniture: bool = True, lod: int = 0, textured: bool = True):
+        """Сетка уровня lod для записи: атлас (если запечён и textured) и сварка."""
+        mesh = self.build_mesh(furniture, lod)
+        if textured and self.atlas is not None:
+            self.atlas.apply(mesh)
+        return weld_mesh(mesh)
+
+    def export_obj(self, filename, lods: bool = False, images: List[np.ndarray] = None,
+                   textures: bool = False):
+        """
+        Экспорт в Wavefront OBJ формат.
+
+        Args:
+            lods: дополнительно записать упрощённые уровни (room_lod1.obj ...)
+                с общим MTL
+            textures: запечь участки фото images в атлас (room_atlas.png)
+        """
+        mtl_filename = filename.replace('.obj', '.mtl')
+        self.atlas = self.bake_textures(images) if textures and images else None
+        atlas_filename = None
+        if self.atlas is not None:
+            atlas_filename = filename.replace('.obj', '_atlas.png')
+            self.atlas.save(atlas_filename)
 
-        # Записываем OBJ файл
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"# Room 3D Model - Generated from floorplan\n")
-            f.write(f"mtllib {Path(mtl_filename).name}\n\n")
-
-            # Вершины
-            for v in all_vertices:
-                f.write(f"v {v[0]:.4f} {v[1]:.4f} {v[2]:.4f}\n")
-
-            # Текстурные координаты
-            f.write("\nvt 0.0 0.0\nvt 1.0 0.0\nvt 1.0 1.0\nvt 0.0 1.0\n")
-
-            # Нормали
-            f.write("\n")
-            for normal in all_normals:
-                f.write(f"vn {normal[0]:.4f} {normal[1]:.4f} {normal[2]:.4f}\n")
-
-            # Грани
-            f.write("\n")
-            current_mtl = None
-
-            for face in all_faces:
-                mat = face[0]
-                if mat != current_mtl:
-                    current_mtl = mat
-                    f.write(f"usemtl {mat}\n")
-
-                # Определяем индекс нормали по материалу
-                if mat == "floor":
-                    ni = normal_map[tuple(self.floor['normal'])]
-                elif mat.startswith("furniture_"):
-                    # Для мебели используем разные нормали для разных граней
-                    # Но пока используем общую нормаль
-                    ni = normal_map[tuple(furniture_normals[0])]
-                else:
-                    # Для стен, окон, дверей
-                    wall_idx = int(mat.split('_')[1]) if '_' in mat and len(mat.split('_')) > 1 else 0
-                    if wall_idx < len(self.walls):
-                        ni = normal_map[tuple(self.walls[wall_idx].normal)]
-                    else:
-                        ni = 1
-
-                # Формируем строку грани
-                if len(face) == 4:  # Треугольник
-                    _, v1, v2, v3 = face
-                    f.write(f"f {v1}/{1}/{ni} {v2}/{2}/{ni} {v3}/{3}/{ni}\n")
-                elif len(face) == 5:  # Четырехугольник
-                    _, v1, v2, v3, v4 = face
-                    f.write(f"f {v1}/{1}/{ni} {v2}/{2}/{ni} {v3}/{3}/{ni} {v4}/{4}/{ni}\n")
+        mesh, stats = self._export_mesh()
+        write_obj(mesh, filename, Path(mtl_filename).name,
+                  header="# Room 3D Model - Generated from floorplan")
 
         # Создаем MTL файл
-        self._write_mtl(mtl_filename)
+        self._write_mtl(mtl_filename, Path(atlas_filename).name if atlas_filename else None)
 
         print(f"\n✓ 3D модель сохранена: {filename}")
-        print(f"  Вершин: {len(all_vertices)}")
-        print(f"  Граней: {len(all_faces)}")
-
-    def _write_mtl(self, filename):
-        """Запись MTL файла с материалами."""
+        print(f"  Вершин: {mesh.n_vertices}")
+        print(f"  Граней: {mesh.n_faces}")
+        print(f"  {weld_report(stats)}")
+        print(f"  {self.cache.report()}")
+
+        if lods:
+            for level in range(1, self.LOD_LEVELS):
+                mesh, _ = self._export_mesh(lod=level)
+                path = lod_path(filename, level)
+                write_obj(mesh, path, Path(mtl_filename).name,
+                          header=f"# Room 3D Model - Generated from floorplan (LOD{level})")
+                print(f"  LOD{level}: {mesh.n_vertices} вершин, {mesh.n_faces} граней → {path}")
+
+    def export_glb(self, filename, lods: bool = False, images: List[np.ndarray] = None,
+                   textures: bool = False):
+        """
+        Экспорт в двоичный glTF (GLB); мебель - узлы с общей коробкой.
+
+        Args:
+            lods: дополнительно записать упрощённые уровни (room_lod1.glb ...)
+            textures: запечь участки фото images в атлас, встроенный в GLB
+                (в уровень 1 - уменьшенный, в прокси-уровень - не встраивается)
+        """
+        colors = self.material_colors()
+        self.atlas = self.bake_textures(images) if textures and images else None
+
+        for level in range(self.LOD_LEVELS if lods else 1):
+            scale = self.ATLAS_LOD_SCALE.get(level) if self.atlas is not None else None
+            atlas_png = {TextureAtlas.MATERIAL: self.atlas.encode(scale=scale)} if scale else None
+            mesh, stats = self._export_mesh(furniture=False, lod=level, textured=atlas_png is not None)
+            instances = self._furniture_instances(proxy=level >= 2)
+            path = lod_path(filename, level)
+            write_glb(mesh, path, colors, instances, unit_box(bottom=level < 2),
+                      generator="RoomPlanner (floorplan)", textures=atlas_png)
+
+            if level == 0:
+                print(f"\n✓ 3D модель сохранена: {filename}")
+                print(f"  Вершин: {mesh.n_vertices}")
+                print(f"  Граней: {mesh.n_faces}")
+                print(f"  {weld_report(stats)}")
+                print(f"  {self.cache.report()}")
+                print(f"  Мебель: {len(instances)} экземпляров")
+            else:
+                print(f"  LOD{level}: {mesh.n_vertices} вершин, {mesh.n_faces} граней → {path}")
+
+    def _furniture_instances(self, proxy: bool = False) -> List[MeshInstance]:
+        """
+        Узлы мебели для GLB.
+
+        Args:
+            proxy: осевые описанные коробки без поворота (LOD)
+        """
+        return [MeshInstance(material=f"furniture_{i}", translation=box.center,
+                             rotation=0.0 if proxy else box.rotation,
+                             scale=2 * box.half_extents if proxy else box.dimensions,
+                             name=f"furniture_{i}")
+                for i, box in enumerate(self.furniture)]
+
+    def material_colors(self) -> Dict[str, Tuple[float, ...]]:
+        """Основные цвета материалов (r, g, b[, alpha]) по именам из сетки."""
+        colors = {}
+        for i, wall in enumerate(self.walls):
+            colors[f"wall_{i}"] = tuple(wall.color)
+            colors[f"window_{i}"] = tuple(self.window_color) + (0.6,)
+            colors[f"door_{i}"] = tuple(self.door_color)
+        colors["floor"] = tuple(self.floor_color)
+        for i in range(max(len(self.furniture), 1)):
+            colors[f"furniture_{i}"] = self.FURNITURE_COLORS[i % len(self.FURNITURE_COLORS)]
+        return colors
+
+    def _write_mtl(self, filename, atlas_name: Optional[str] = None):
+        """Запись MTL файла с материалами (и материалом атласа, если он запечён)."""
         with open(filename, 'w', encoding='utf-8') as f:
             f.write("# Room materials - Generated from floorplan\n")
 
@@ -610,16 +506,9 @@ illum 2
 """)
 
             # МЕБЕЛЬ
-            furniture_colors = [
-                (0.6, 0.4, 0.2),  # Коричневый (дерево)
-                (0.4, 0.4, 0.4),  # Серый (металл)
-                (0.8, 0.6, 0.4),  # Светлое дерево
-                (0.3, 0.3, 0.5),  # Темно-синий
-                (0.7, 0.7, 0.6),  # Бежевый
-            ]
             num_furniture = len(self.furniture) if hasattr(self, 'furniture') else 0
             for i in range(max(num_furniture, 1)):
-                r, g, b = furniture_colors[i % len(furniture_colors)]
+                r, g, b = self.FURNITURE_COLORS[i % len(self.FURNITURE_COLORS)]
                 f.write(f"""
 newmtl furniture_{i}
 Ka {r:.3f} {g:.3f} {b:.3f}
@@ -629,10 +518,31 @@ Ns 30
 illum 2
 """)
 
+            # Атлас текстур из фото
+            if atlas_name:
+                f.write(f"""
+newmtl {TextureAtlas.MATERIAL}
+Ka 1.000 1.000 1.000
+Kd 1.000 1.000 1.000
+Ks 0.1 0.1 0.1
+Ns 5
+illum 2
+map_Kd {atlas_name}
+""")
+
 
 def create_3d_model_from_floorplan(room_dims, windows, doors, output_path,
-                                   floorplan_path=None, furniture_boxes=None):
-    """Создание 3D модели на основе 2D планировки."""
+                                   floorplan_path=None, furniture_boxes=None,
+                                   cache: MeshCache = None, lods: bool = False,
+                                   images: List[np.ndarray] = None, textures: bool = False,
+                                   floorplan: FloorplanRender = None):
+    """
+    Создание 3D модели на основе 2D планировки (.obj + .mtl или .glb по расширению).
+
+    Цвета берутся из floorplan (результат FloorplanDrawer.draw), иначе
+    из PNG по floorplan_path. При textures=True стены и пол получают
+    атлас из зон фото images.
+    """
     print("\n" + "=" * 60)
     print("ПОСТРОЕНИЕ 3D МОДЕЛИ НА ОСНОВЕ ПЛАНИРОВКИ")
     print("=" * 60)
@@ -647,13 +557,16 @@ def create_3d_model_from_floorplan(room_dims, windows, doors, output_path,
         print(f"Мебели: {len(furniture_boxes)} объектов")
     print("=" * 60)
 
-    model = ModelFromFloorplan(room_dims, floorplan_path)
+    model = ModelFromFloorplan(room_dims, floorplan if floorplan is not None else floorplan_path, cache)
     model.extract_floorplan_features()
     model.build_walls(windows, doors)
 
     if furniture_boxes:
         model.add_furniture(furniture_boxes)
 
-    model.export_obj(output_path)
+    if output_path.lower().endswith('.glb'):
+        model.export_glb(output_path, lods=lods, images=images, textures=textures)
+    else:
+        model.export_obj(output_path, lods=lods, images=images, textures=textures)
 
     return model
\ No newline at end of file
@@ -0,0 +1,319 @@
+import numpy as np
+
+
+class OccupancyGrid:
+    """
+    Растровая 2D карта занятости пола комнаты (плоскость XZ).
+
+    Препятствия (зоны дверей, окон, уже поставленная мебель, полоса у стен)
+    прожигаются в сетку, а проверка свободного места под footprint объекта
+    выполняется за O(1) через интегральное изображение (суммы по прямоугольнику).
+    Границы привязываются к ближайшей линии сетки, поэтому объекты, вплотную
+    касающиеся зоны, считаются свободными; погрешность - не больше половины клетки.
+
+    Параллельно хранится список прямоугольников препятствий для точной проверки
+    (candidates × obstacles одним broadcast). Округление монотонно, поэтому растр
+    никогда не запрещает позицию, свободную при точной проверке, и служит фильтром.
+    Повёрнутые прямоугольники (OBB) в растр не попадают и проверяются только
+    точно, теоремой о разделяющей оси.
+    """
+
+    ANGLE_EPS = 1e-9
+
+    def __init__(self, room_width, room_length, cell_size=0.02, wall_margin=0.05):
+        self.room_width = room_width
+        self.room_length = room_length
+        self.cell_size = cell_size
+        self.wall_margin = wall_margin
+
+        self.nx = int(np.rint(room_width / cell_size))
+        self.nz = int(np.rint(room_length / cell_size))
+
+        # Базовый слой: двери, мебель, полоса у стен
+        self.base = np.zeros((self.nz, self.nx), dtype=np.int32)
+        # Окна мешают только объектам выше подоконника: (высота подоконника, слой)
+        self.window_layers = []
+        self._integrals = None
+        self._window_integrals = None
+        self._window_heights = None
+        # Точные препятствия: x0, z0, x1, z1, min_height, cx, cz, hx, hz, angle, aligned
+        self.rects = []
+        self._rects_array = None
+
+        if wall_margin > 0:
+            self.burn(0, 0, wall_margin, room_length)
+            self.burn(room_width - wall_margin, 0, room_width, room_length)
+            self.burn(0, 0, room_width, wall_margin)
+            self.burn(0, room_length - wall_margin, room_width, room_length)
+
+    def _cell_range(self, lo, hi, n):
+        """Клетки интервала (lo, hi) с привязкой границ к ближайшей линии сетки."""
+        i0 = int(np.rint(lo / self.cell_size))
+        i1 = int(np.rint(hi / self.cell_size))
+        return max(i0, 0), min(i1, n)
+
+    def burn(self, x0, z0, x1, z1, layer=None):
+        """Пометить прямоугольник (x0, z0)-(x1, z1) как занятый."""
+        target = self.base if layer is None else layer
+        ix0, ix1 = self._cell_range(x0, x1, self.nx)
+        iz0, iz1 = self._cell_range(z0, z1, self.nz)
+        if ix1 <= ix0 or iz1 <= iz0:
+            return
+        target[iz0:iz1, ix0:ix1] += 1
+
+        if layer is not None:
+            self._window_integrals = None
+        elif self._integrals is not None:
+            # Инкрементальное обновление: вклад прямоугольника в I[z, x] равен
+            # произведению длин его пересечения с [0, z) и [0, x)
+            rz = np.clip(np.arange(self.nz + 1) - iz0, 0, iz1 - iz0)
+            rx = np.clip(np.arange(self.nx + 1) - ix0, 0, ix1 - ix0)
+            self._integrals += np.outer(rz, rx)
+
+    def _wall_zone(self, wall, start, end, depth):
+        """Прямоугольник глубиной depth у стены между start и end вдоль неё."""
+        if wall == 'left':
+            return 0, start, depth, end
+        if wall == 'right':
+            return self.room_width - depth, start, self.room_width, end
+        if wall == 'bottom':
+            return start, 0, end, depth
+        return start, self.room_length - depth, end, self.room_length  # top
+
+    def _add_obstacle(self, rect, min_height=-np.inf):
+        """Осевой прямоугольник-препятствие (x0, z0, x1, z1)."""
+        x0, z0, x1, z1 = rect
+        self.rects.append((x0, z0, x1, z1, min_height,
+                           (x0 + x1) / 2, (z0 + z1) / 2, (x1 - x0) / 2, (z1 - z0) / 2, 0.0, 1.0))
+        self._rects_array = None
+
+    def add_window(self, window, margin=0.3):
+        """Зона перед окном; учитывается только для объектов выше подоконника."""
+        rect = self._wall_zone(window.wall, window.x - margin,
+                               window.x + window.width + margin, margin)
+        layer = np.zeros_like(self.base)
+        self.burn(*rect, layer=layer)
+        self.window_layers.append((window.y, layer))
+        self.window_layers.sort(key=lambda item: item[0])
+        self._add_obstacle(rect, window.y)
+
+    def add_door(self, door, margin=0.5):
+        """Зона открывания двери."""
+        rect = self._wall_zone(door.wall, door.x - margin,
+                               door.x + door.width + margin, margin)
+        self.burn(*rect)
+        self._add_obstacle(rect)
+
+    def add_rect(self, x0, z0, x1, z1, margin=0.0):
+        """Footprint поставленного объекта с зазором margin."""
+        rect = (x0 - margin, z0 - margin, x1 + margin, z1 + margin)
+        self.burn(*rect)
+        self._add_obstacle(rect)
+
+    def add_obb(self, cx, cz, width, depth, angle, margin=0.0):
+        """Повёрнутый footprint (поворот angle вокруг вертикали) с зазором margin."""
+        if is_axis_aligned(angle):
+            if is_quarter_turn(angle):
+                width, depth = depth, width
+            self.add_rect(cx - width / 2, cz - depth / 2, cx + width / 2, cz + depth / 2, margin)
+            return
+
+        hx, hz = width / 2 + margin, depth / 2 + margin
+        ex, ez = aabb_half_extents(hx, hz, angle)
+        self.rects.append((cx - ex, cz - ez, cx + ex, cz + ez, -np.inf,
+                           cx, cz, hx, hz, angle, 0.0))
+        self._rects_array = None
+
+    def _build_integrals(self):
+        """
+        Интегральные изображения: базовый слой плюс накопленные слои окон.
+
+        Сумма по прямоугольнику линейна, поэтому интегралы окон считаются один раз,
+        а после добавления мебели пересчитывается только базовый слой.
+        """
+        if self._window_integrals is None:
+            cumulative = [np.zeros((self.nz + 1, self.nx + 1), dtype=np.int64)]
+            for _, win_layer in self.window_layers:
+                cumulative.append(cumulative[-1] + self._integral(win_layer))
+            self._window_integrals = cumulative
+            self._window_heights = np.array([y for y, _ in self.window_layers])
+
+        if self._integrals is None:
+            self._integrals = self._integral(self.base)
+
+    @staticmethod
+    def _integral(grid):
+        integral = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int64)
+        integral[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+        return integral
+
+    def free_mask(self, centers, width, depth, height=0.0):
+        """
+        Проверка множества позиций центра footprint за один проход.
+
+        Args:
+            centers: массив (N, 2) координат (x, z)
+            width, depth: размеры footprint
+            height: высота объекта (окна мешают, только если она выше подоконника)
+
+        Returns:
+            Булев массив (N,) - footprint целиком в комнате и не пересекает препятствия
+        """
+        if self._integrals is None or self._window_integrals is None:
+            self._build_integrals()
+
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        n_windows = int(np.searchsorted(self._window_heights, height, side='left'))
+
+        c = self.cell_size
+        ix0 = np.rint((centers[:, 0] - width / 2) / c).astype(np.int64)
+        ix1 = np.rint((centers[:, 0] + width / 2) / c).astype(np.int64)
+        iz0 = np.rint((centers[:, 1] - depth / 2) / c).astype(np.int64)
+        iz1 = np.rint((centers[:, 1] + depth / 2) / c).astype(np.int64)
+
+        inside = (ix0 >= 0) & (iz0 >= 0) & (ix1 <= self.nx) & (iz1 <= self.nz)
+        ix0, ix1 = np.clip(ix0, 0, self.nx), np.clip(ix1, 0, self.nx)
+        iz0, iz1 = np.clip(iz0, 0, self.nz), np.clip(iz1, 0, self.nz)
+
+        occupied = np.zeros(len(centers), dtype=np.int64)
+        for integral in (self._integrals, self._window_integrals[n_windows]):
+            occupied += (integral[iz1, ix1] - integral[iz0, ix1]
+                         - integral[iz1, ix0] + integral[iz0, ix0])
+        return inside & (occupied == 0)
+
+    def collision_mask(self, centers, width, depth, height=0.0, angles=None):
+        """
+        Точная проверка: все позиции против всех препятствий одним broadcast.
+
+        Пары осевых прямоугольников сравниваются по интервалам, пары с поворотом -
+        по теореме о разделяющей оси (4 оси на пару). Интервалы открытые (касание
+        не считается пересечением), граница комнаты - замкнутая с отступом wall_margin.
+
+        Args:
+            angles: повороты кандидатов вокруг вертикали (N,), по умолчанию 0
+
+        Returns:
+            Булев массив (N,) - позиция запрещена
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        n = len(centers)
+        angles = np.zeros(n) if angles is None else np.broadcast_to(
+            np.asarray(angles, dtype=np.float64), (n,))
+
+        aligned = is_axis_aligned(angles)
+        swapped = aligned & is_quarter_turn(angles)
+        ew = np.where(swapped, depth, width)
+        ed = np.where(swapped, width, depth)
+        ex, ez = aabb_half_extents(width / 2, depth / 2, angles)
+        ex = np.where(aligned, ew / 2, ex)
+        ez = np.where(aligned, ed / 2, ez)
+
+        x0 = centers[:, 0:1] - ex[:, None]
+        x1 = centers[:, 0:1] + ex[:, None]
+        z0 = centers[:, 1:2] - ez[:, None]
+        z1 = centers[:, 1:2] + ez[:, None]
+
+        m = self.wall_margin
+        outside = ((x0[:, 0] < m) | (x1[:, 0] > self.room_width - m) |
+                   (z0[:, 0] < m) | (z1[:, 0] > self.room_length - m))
+
+        if not self.rects:
+            return outside
+
+        if self._rects_array is None:
+            self._rects_array = np.array(self.rects, dtype=np.float64)
+        r = self._rects_array
+
+        hits = ((x0 < r[:, 2]) & (x1 > r[:, 0]) &
+                (z0 < r[:, 3]) & (z1 > r[:, 1]) &
+                (height > r[:, 4]))
+
+        # Пары, где хотя бы один прямоугольник повёрнут: AABB-тест выше лишь
+        # отсеивает заведомо далёкие, окончательно решает SAT
+        rotated = (~aligned)[:, None] | (r[:, 10] == 0)[None, :]
+        if np.any(rotated & hits):
+            sat = obb_overlap(centers, width / 2, depth / 2, angles,
+                              r[:, 5:7], r[:, 7], r[:, 8], r[:, 9])
+            hits = np.where(rotated, hits & sat, hits)
+
+        return outside | hits.any(axis=1)
+
+    def feasible_mask(self, centers, width, depth, height=0.0, angles=None):
+        """Растровый фильтр (для осевых ориентаций), затем точная проверка."""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        n = len(centers)
+        angles = np.zeros(n) if angles is None else np.broadcast_to(
+            np.asarray(angles, dtype=np.float64), (n,))
+
+        feasible = np.ones(n, dtype=bool)
+        aligned = is_axis_aligned(angles)
+        swapped = is_quarter_turn(angles)
+        for sel, (w, d) in ((aligned & ~swapped, (width, depth)),
+                            (aligned & swapped, (depth, width))):
+            if np.any(sel):
+                feasible[sel] = self.free_mask(centers[sel], w, d, height)
+
+        idx = np.flatnonzero(feasible)
+        if len(idx):
+            feasible[idx] = ~self.collision_mask(centers[idx], width, depth, height, angles[idx])
+        return feasible
+
+    def is_free(self, x, z, width, depth, height=0.0, angle=0.0):
+        """Проверка одной позиции."""
+        return bool(self.feasible_mask([(x, z)], width, depth, height, [angle])[0])
+
+
+def is_axis_aligned(angle):
+    """Поворот кратен 90°."""
+    quarter = np.rint(np.asarray(angle) / (np.pi / 2))
+    return np.abs(np.asarray(angle) - quarter * (np.pi / 2)) < OccupancyGrid.ANGLE_EPS
+
+
+def is_quarter_turn(angle):
+    """Поворот на нечётное число четвертей (ширина и глубина меняются местами)."""
+    return np.rint(np.asarray(angle) / (np.pi / 2)).astype(np.int64) % 2 == 1
+
+
+def aabb_half_extents(hx, hz, angle):
+    """Полуразмеры осевого прямоугольника, описанного вокруг повёрнутого."""
+    c, s = np.abs(np.cos(angle)), np.abs(np.sin(angle))
+    return c * hx + s * hz, s * hx + c * hz
+
+
+def obb_overlap(centers_a, hx_a, hz_a, angles_a, centers_b, hx_b, hz_b, angles_b):
+    """
+    Пересечение повёрнутых прямоугольников в плоскости XZ (SAT), все пары сразу.
+
+    Поворот на angle вокруг Y переводит локальную ось X в (cos, -sin),
+    локальную ось Z - в (sin, cos). Касание пересечением не считается.
+
+    Returns:
+        Булев массив (N, M)
+    """
+    ca = np.asarray(centers_a, dtype=np.float64).reshape(-1, 2)
+    cb = np.asarray(centers_b, dtype=np.float64).reshape(-1, 2)
+    ta = np.broadcast_to(np.asarray(angles_a, dtype=np.float64), (len(ca),))[:, None]
+    tb = np.broadcast_to(np.asarray(angles_b, dtype=np.float64), (len(cb),))[None, :]
+    hxa = np.broadcast_to(np.asarray(hx_a, dtype=np.float64), (len(ca),))[:, None]
+    hza = np.broadcast_to(np.asarray(hz_a, dtype=np.float64), (len(ca),))[:, None]
+    hxb = np.broadcast_to(np.asarray(hx_b, dtype=np.float64), (len(cb),))[None, :]
+    hzb = np.broadcast_to(np.asarray(hz_b, dtype=np.float64), (len(cb),))[None, :]
+
+    dx = cb[None, :, 0] - ca[:, None, 0]
+    dz = cb[None, :, 1] - ca[:, None, 1]
+
+    # |cos|, |sin| относительного поворота дают проекции одного прямоугольника на оси другого
+    delta = tb - ta
+    cu, su = np.abs(np.cos(delta)), np.abs(np.sin(delta))
+
+    cos_a, sin_a = np.cos(ta), np.sin(ta)
+    cos_b, sin_b = np.cos(tb), np.sin(tb)
+    eps = OccupancyGrid.ANGLE_EPS
+
+    separated = (
+        (np.abs(dx * cos_a - dz * sin_a) >= hxa + hxb * cu + hzb * su - eps) |
+        (np.abs(dx * sin_a + dz * cos_a) >= hza + hxb * su + hzb * cu - eps) |
+        (np.abs(dx * cos_b - dz * sin_b) >= hxb + hxa * cu + hza * su - eps) |
+        (np.abs(dx * sin_b + dz * cos_b) >= hzb + hxa * su + hza * cu - eps)
+    )
+    return ~separated
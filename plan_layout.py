@@ -0,0 +1,198 @@
+import numpy as np
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+# Именованные цвета планировки (RGB 0..255, как одноимённые цвета matplotlib)
+PLAN_COLORS = {
+    'black': (0, 0, 0),
+    'white': (255, 255, 255),
+    'red': (255, 0, 0),
+    'blue': (0, 0, 255),
+    'lightblue': (173, 216, 230),
+    'lightgray': (211, 211, 211),
+    'saddlebrown': (139, 69, 19),
+    'chocolate': (210, 105, 30),
+    'goldenrod': (218, 165, 32),
+    'gold': (255, 215, 0),
+}
+
+# Наконечник размерной стрелки '<->' matplotlib: длина и полуширина в пунктах
+ARROW_HEAD = (4.0, 2.0)
+
+# Заголовок: кегль в пунктах и межстрочный интервал (в кеглях)
+TITLE_SIZE = 14
+TITLE_LINE_SPACING = 1.25
+
+Color = Tuple[int, int, int]
+
+
+@dataclass
+class PlanRect:
+    """Прямоугольник (x, y - левый нижний угол, м)."""
+    x: float
+    y: float
+    width: float
+    height: float
+    fill: Optional[Color]
+    stroke: Color
+    line_width: float  # Толщина контура в пунктах
+    alpha: float = 1.0
+    zorder: int = 1
+
+
+@dataclass
+class PlanLine:
+    """Ломаная (N, 2) в метрах: перекладины окон, дуги открывания дверей."""
+    points: np.ndarray
+    color: Color
+    line_width: float
+    alpha: float = 1.0
+    zorder: int = 2
+
+
+@dataclass
+class PlanDot:
+    """Точка-маркер (ручка двери); диаметр в пунктах."""
+    x: float
+    y: float
+    diameter: float
+    color: Color
+    zorder: int = 2
+
+
+@dataclass
+class PlanArrow:
+    """Размерная линия со стрелками на обоих концах."""
+    start: Tuple[float, float]
+    end: Tuple[float, float]
+    color: Color
+    line_width: float
+    zorder: int = 3
+
+
+@dataclass
+class PlanText:
+    """
+    Надпись. Выравнивание - по описанному прямоугольнику (после поворота),
+    как в matplotlib: anchor 'middle' или 'start' по горизонтали, valign
+    'center' или 'bottom' по вертикали.
+    """
+    x: float
+    y: float
+    text: str
+    size: float  # Кегль в пунктах
+    color: Color
+    anchor: str = 'middle'
+    valign: str = 'center'  # 'center' или 'bottom'
+    rotation: int = 0  # Поворот против часовой стрелки, кратный 90°
+    bold: bool = False
+    zorder: int = 3
+
+
+@dataclass
+class PlanLayout:
+    """
+    Планировка как набор примитивов в метрах (начало - левый нижний угол,
+    ось y вверх) - общая геометрия растрового и векторного вывода.
+    """
+    width: float  # Ширина листа с полями, м
+    height: float
+    title: List[str] = field(default_factory=list)  # Строки заголовка над планом
+    shapes: List = field(default_factory=list)
+
+    def ordered(self) -> List:
+        """Примитивы в порядке отрисовки: заливки, линии, подписи (как zorder matplotlib)."""
+        return sorted(self.shapes, key=lambda shape: shape.zorder)
+
+
+def build_layout(room_dims, windows, doors=None, wall_color: Color = PLAN_COLORS['lightgray'],
+                 margin: float = 1.0) -> PlanLayout:
+    """
+    Примитивы планировки: стены, окна, двери с дугами открывания, размеры
+    и заголовок - та же геометрия, что у рисования через matplotlib.
+
+    Args:
+        wall_color: заливка комнаты (цвет стен из фото)
+        margin: поле вокруг комнаты, м
+    """
+    W, L = room_dims.width, room_dims.length
+    layout = PlanLayout(width=W + 2 * margin, height=L + 2 * margin)
+
+    # Комната (стены)
+    layout.shapes.append(PlanRect(margin, margin, W, L, tuple(wall_color), PLAN_COLORS['black'], 3, 0.3))
+
+    for window in windows:
+        _add_window(layout, window, margin, W, L)
+    for door in doors or []:
+        _add_door(layout, door, margin, W, L)
+    _add_dimensions(layout, margin, W, L)
+
+    layout.title = ["Планировка комнаты", f"{room_dims.width}м × {room_dims.length}м = {room_dims.area}м²"]
+    if doors:
+        layout.title.append(f"Двери: {', '.join(f'{door.wall} стена' for door in doors)}")
+    return layout
+
+
+def _add_window(layout: PlanLayout, window, margin: float, W: float, L: float):
+    if window.wall == 'right':
+        x, y, width, height = margin + W - 0.15, margin + window.x, 0.3, window.width
+    elif window.wall == 'left':
+        x, y, width, height = margin - 0.15, margin + window.x, 0.3, window.width
+    elif window.wall == 'top':
+        x, y, width, height = margin + window.x, margin + L - 0.15, window.width, 0.3
+    else:  # bottom
+        x, y, width, height = margin + window.x, margin - 0.15, window.width, 0.3
+
+    layout.shapes.append(PlanRect(x, y, width, height, PLAN_COLORS['lightblue'], PLAN_COLORS['blue'], 2, 0.8))
+
+    # Перекладины (крестик)
+    cx, cy = x + width / 2, y + height / 2
+    for points in ([(x, cy), (x + width, cy)], [(cx, y), (cx, y + height)]):
+        layout.shapes.append(PlanLine(np.array(points), PLAN_COLORS['white'], 1, 0.7))
+
+
+def _add_door(layout: PlanLayout, door, margin: float, W: float, L: float):
+    thickness = 0.15  # Толщина двери на плане
+    if door.has_glass:
+        fill, stroke, alpha = PLAN_COLORS['lightblue'], PLAN_COLORS['blue'], 0.7
+    else:
+        fill, stroke, alpha = PLAN_COLORS['saddlebrown'], PLAN_COLORS['chocolate'], 0.9
+
+    quarter = np.linspace(0, np.pi / 2, 30)
+    if door.wall == 'right':
+        x, y, width, height = margin + W - thickness, margin + door.x, thickness, door.width
+        arc = np.stack([x + thickness + door.width * np.cos(quarter), y + door.width * np.sin(quarter)], axis=1)
+        handle = (x - 0.05, y + door.width / 2)
+    elif door.wall == 'left':
+        x, y, width, height = margin - thickness, margin + door.x, thickness, door.width
+        theta = quarter + np.pi / 2
+        arc = np.stack([x + thickness + door.width * np.cos(theta), y + door.width * np.sin(theta)], axis=1)
+        handle = (x + width + 0.05, y + door.width / 2)
+    elif door.wall == 'top':
+        x, y, width, height = margin + door.x, margin + L - thickness, door.width, thickness
+        arc = np.stack([x + door.width * np.cos(quarter), y + thickness + door.width * np.sin(quarter)], axis=1)
+        handle = (x + door.width / 2, y - 0.05)
+    else:  # bottom
+        x, y, width, height = margin + door.x, margin - thickness, door.width, thickness
+        arc = np.stack([x + door.width * np.cos(quarter), y + thickness + door.width * np.sin(quarter)], axis=1)
+        handle = (x + door.width / 2, y + height + 0.05)
+
+    # Дуга открывания
+    if door.is_open:
+        layout.shapes.append(PlanLine(arc, PLAN_COLORS['goldenrod'], 1.5, 0.7))
+    layout.shapes.append(PlanRect(x, y, width, height, fill, stroke, 2, alpha))
+    layout.shapes.append(PlanDot(handle[0], handle[1], 3, PLAN_COLORS['gold']))
+
+
+def _add_dimensions(layout: PlanLayout, margin: float, W: float, L: float):
+    red = PLAN_COLORS['red']
+
+    # Ширина (сверху)
+    layout.shapes.append(PlanArrow((margin, margin + L + 0.3), (margin + W, margin + L + 0.3), red, 1.5))
+    layout.shapes.append(PlanText(margin + W / 2, margin + L + 0.5, f'{W} м', 10, red, valign='bottom'))
+
+    # Длина (справа)
+    layout.shapes.append(PlanArrow((margin + W + 0.3, margin), (margin + W + 0.3, margin + L), red, 1.5))
+    layout.shapes.append(PlanText(margin + W + 0.5, margin + L / 2, f'{L} м', 10, red,
+                                  anchor='start', rotation=90))
@@ -0,0 +1,212 @@
+import importlib.util
+import os
+import numpy as np
+import cv2
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from plan_layout import (ARROW_HEAD, TITLE_LINE_SPACING, TITLE_SIZE, PlanArrow, PlanDot,
+                         PlanLayout, PlanLine, PlanRect, PlanText)
+
+
+# Дробные координаты для cv2 (shift): 4 бита - 1/16 пикселя
+SHIFT = 4
+SUBPIXEL = 1 << SHIFT
+
+# Запасная транслитерация, если TrueType-шрифт не найден (шрифты Hershey - только ASCII)
+_TRANSLIT = dict(zip("абвгдеёжзийклмнопрстуфхцчшщъыьэюя×²",
+                     "a b v g d e e zh z i y k l m n o p r s t u f kh ts ch sh sch ' y ' e yu ya x 2".split()))
+
+
+def _font_path(bold: bool) -> Optional[str]:
+    """DejaVu Sans: из данных matplotlib (без его импорта) или системный."""
+    name = 'DejaVuSans-Bold.ttf' if bold else 'DejaVuSans.ttf'
+    candidates = []
+    spec = importlib.util.find_spec('matplotlib')
+    if spec is not None and spec.submodule_search_locations:
+        candidates.append(os.path.join(spec.submodule_search_locations[0], 'mpl-data', 'fonts', 'ttf', name))
+    candidates.append(os.path.join('/usr/share/fonts/truetype/dejavu', name))
+    return next((path for path in candidates if os.path.exists(path)), None)
+
+
+@lru_cache(maxsize=16)
+def _font(bold: bool, size: int):
+    path = _font_path(bold)
+    if path is None:
+        return None
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=128)
+def _text_mask(text: str, size: int, bold: bool) -> np.ndarray:
+    """Маска надписи (H, W) 0..255 кеглем size пикселей."""
+    font = _font(bold, size)
+    if font is not None:
+        from PIL import Image, ImageDraw
+        # Высота - по метрикам шрифта, чтобы строки одного кегля выравнивались одинаково
+        x0, _, x1, _ = font.getbbox(text)
+        ascent, descent = font.getmetrics()
+        image = Image.new('L', (max(x1 - x0, 1), ascent + descent))
+        ImageDraw.Draw(image).text((-x0, 0), text, fill=255, font=font)
+        return np.asarray(image)
+
+    text = ''.join(_TRANSLIT.get(c.lower(), c) for c in text)
+    scale = size / 30.0
+    thickness = 2 if bold else 1
+    (w, h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    mask = np.zeros((h + baseline, w), dtype=np.uint8)
+    cv2.putText(mask, text, (0, h), cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness, cv2.LINE_AA)
+    return mask
+
+
+class RasterPlanRenderer:
+    """
+    Растровая планировка примитивами cv2 на заранее выделенном холсте.
+
+    Тот же чертёж, что у matplotlib (общая геометрия PlanLayout), без
+    построения фигуры: заливки и линии - cv2.fillPoly / polylines с
+    субпиксельными координатами и сглаживанием, полупрозрачность -
+    смешивание только в ограничивающем прямоугольнике примитива, надписи -
+    маски глифов TrueType (PIL) с кэшем.
+    """
+
+    def __init__(self, pixels_per_meter: float = 150, dpi: float = 150):
+        """
+        Args:
+            pixels_per_meter: масштаб плана
+            dpi: перевод пунктов (толщины, кегль) в пиксели
+        """
+        self.scale = pixels_per_meter
+        self.dpi = dpi
+        self.top = 0  # Высота полосы заголовка, пиксели
+        self.plan_height = 0.0
+
+    def points(self, value: float) -> float:
+        """Пункты -> пиксели."""
+        return value * self.dpi / 72.0
+
+    def render(self, layout: PlanLayout) -> np.ndarray:
+        """Планировка в RGB (H, W, 3)."""
+        title_size = int(round(self.points(TITLE_SIZE)))
+        line_height = int(round(title_size * TITLE_LINE_SPACING))
+        self.top = line_height * len(layout.title) + (title_size if layout.title else 0)
+        self.plan_height = layout.height * self.scale
+
+        height = self.top + int(np.ceil(self.plan_height))
+        width = int(np.ceil(layout.width * self.scale))
+        canvas = np.full((height, width, 3), 255, dtype=np.uint8)
+
+        for shape in layout.ordered():
+            if isinstance(shape, PlanRect):
+                self._rect(canvas, shape)
+            elif isinstance(shape, PlanLine):
+                self._polyline(canvas, self._pixels(shape.points), shape.color,
+                               shape.line_width, shape.alpha)
+            elif isinstance(shape, PlanDot):
+                self._dot(canvas, shape)
+            elif isinstance(shape, PlanArrow):
+                self._arrow(canvas, shape)
+            elif isinstance(shape, PlanText):
+                x, y = self._pixels(np.array([[shape.x, shape.y]]))[0]
+                self._text(canvas, shape.text, self.points(shape.size), shape.bold, shape.color,
+                           (x, y), shape.anchor, shape.valign, shape.rotation)
+
+        # Заголовок над планом
+        for i, line in enumerate(layout.title):
+            self._text(canvas, line, title_size, True, (0, 0, 0),
+                       (width / 2, title_size / 2 + (i + 0.5) * line_height), 'middle', 'center', 0)
+        return canvas
+
+    def _pixels(self, points: np.ndarray) -> np.ndarray:
+        """Метры (N, 2), y вверх -> пиксели холста (N, 2), y вниз."""
+        points = np.asarray(points, dtype=np.float64)
+        return np.stack([points[:, 0] * self.scale,
+                         self.top + self.plan_height - points[:, 1] * self.scale], axis=1)
+
+    def _thickness(self, line_width: float) -> int:
+        return max(int(round(self.points(line_width))), 1)
+
+    @staticmethod
+    def _fixed(pixels: np.ndarray) -> np.ndarray:
+        return np.round(pixels * SUBPIXEL).astype(np.int32)
+
+    def _blend(self, canvas: np.ndarray, pixels: np.ndarray, pad: float, alpha: float, draw):
+        """
+        Нарисовать draw(layer, offset) с прозрачностью alpha: слой - копия
+        ограничивающего прямоугольника, смешивание только в нём.
+        """
+        if alpha >= 1.0:
+            draw(canvas, np.zeros(2))
+            return
+        h, w = canvas.shape[:2]
+        x0, y0 = np.maximum(np.floor(pixels.min(axis=0) - pad), 0).astype(int)
+        x1, y1 = np.minimum(np.ceil(pixels.max(axis=0) + pad) + 1, [w, h]).astype(int)
+        if x1 <= x0 or y1 <= y0:
+            return
+        roi = canvas[y0:y1, x0:x1]
+        layer = roi.copy()
+        draw(layer, np.array([x0, y0], dtype=np.float64))
+        cv2.addWeighted(layer, alpha, roi, 1.0 - alpha, 0, dst=roi)
+
+    def _rect(self, canvas: np.ndarray, rect: PlanRect):
+        corners = self._pixels(np.array([[rect.x, rect.y], [rect.x + rect.width, rect.y],
+                                         [rect.x + rect.width, rect.y + rect.height],
+                                         [rect.x, rect.y + rect.height]]))
+        thickness = self._thickness(rect.line_width)
+
+        def draw(target, offset):
+            polygon = self._fixed(corners - offset)
+            if rect.fill is not None:
+                cv2.fillPoly(target, [polygon], rect.fill, cv2.LINE_AA, SHIFT)
+            cv2.polylines(target, [polygon], True, rect.stroke, thickness, cv2.LINE_AA, SHIFT)
+
+        self._blend(canvas, corners, thickness, rect.alpha, draw)
+
+    def _polyline(self, canvas: np.ndarray, pixels: np.ndarray, color, line_width: float,
+                  alpha: float = 1.0):
+        thickness = self._thickness(line_width)
+
+        def draw(target, offset):
+            cv2.polylines(target, [self._fixed(pixels - offset)], False, color, thickness, cv2.LINE_AA, SHIFT)
+
+        self._blend(canvas, pixels, thickness, alpha, draw)
+
+    def _dot(self, canvas: np.ndarray, dot: PlanDot):
+        center = self._fixed(self._pixels(np.array([[dot.x, dot.y]]))[0])
+        radius = int(round(self.points(dot.diameter) / 2 * SUBPIXEL))
+        cv2.circle(canvas, tuple(int(c) for c in center), radius, dot.color, -1, cv2.LINE_AA, SHIFT)
+
+    def _arrow(self, canvas: np.ndarray, arrow: PlanArrow):
+        start, end = self._pixels(np.array([arrow.start, arrow.end]))
+        self._polyline(canvas, np.array([start, end]), arrow.color, arrow.line_width)
+
+        direction = (end - start) / max(np.linalg.norm(end - start), 1e-9)
+        normal = np.array([-direction[1], direction[0]])
+        length, half_width = self.points(ARROW_HEAD[0]), self.points(ARROW_HEAD[1])
+        for tip, inward in ((start, direction), (end, -direction)):
+            base = tip + inward * length
+            head = np.array([base + normal * half_width, tip, base - normal * half_width])
+            self._polyline(canvas, head, arrow.color, arrow.line_width)
+
+    def _text(self, canvas: np.ndarray, text: str, size: float, bold: bool, color,
+              position: Tuple[float, float], anchor: str, valign: str, rotation: int):
+        mask = np.rot90(_text_mask(text, int(round(size)), bold), k=(rotation // 90) % 4)
+        h, w = mask.shape
+        x = position[0] - (w / 2 if anchor == 'middle' else 0)
+        y = position[1] - (h / 2 if valign == 'center' else h)
+        x0, y0 = int(round(x)), int(round(y))
+
+        # Обрезка по холсту
+        H, W = canvas.shape[:2]
+        cx0, cy0, cx1, cy1 = max(x0, 0), max(y0, 0), min(x0 + w, W), min(y0 + h, H)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        alpha = mask[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0, None].astype(np.float32) / 255.0
+        roi = canvas[cy0:cy1, cx0:cx1]
+        roi[:] = (roi * (1.0 - alpha) + np.asarray(color, dtype=np.float32) * alpha + 0.5).astype(np.uint8)
+
+
+def render_raster(layout: PlanLayout, pixels_per_meter: float = 150, dpi: float = 150) -> np.ndarray:
+    """Растр планировки (RGB) через RasterPlanRenderer."""
+    return RasterPlanRenderer(pixels_per_meter, dpi).render(layout)
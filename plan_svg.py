@@ -0,0 +1,153 @@
+import math
+import numpy as np
+from typing import List, Sequence, Tuple
+
+from plan_layout import (ARROW_HEAD, TITLE_LINE_SPACING, TITLE_SIZE, PlanArrow, PlanDot,
+                         PlanLayout, PlanLine, PlanRect, PlanText)
+
+
+FONT_FAMILY = "DejaVu Sans, Arial, sans-serif"
+
+
+def _hex(color) -> str:
+    return '#{:02x}{:02x}{:02x}'.format(*color)
+
+
+def _escape(text: str) -> str:
+    """Экранирование текста XML (xml.sax.saxutils тянет urllib при импорте)."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _num(value: float) -> str:
+    """Координата с точностью 0.1 пикселя без лишних нулей."""
+    return '%g' % round(value, 1)
+
+
+class SvgPlanRenderer:
+    """
+    Векторная планировка (SVG) сборкой строк, без графических библиотек.
+
+    Геометрия - та же PlanLayout и та же система координат, что у
+    растрового RasterPlanRenderer (пиксели при pixels_per_meter, y вниз),
+    поэтому SVG и PNG совпадают по раскладке; SVG масштабируется
+    без потерь через viewBox. Координаты считаются на числах Python -
+    для десятков примитивов это быстрее операций NumPy над мелкими массивами.
+    """
+
+    def __init__(self, pixels_per_meter: float = 150, dpi: float = 150):
+        """
+        Args:
+            pixels_per_meter: масштаб плана (единицы SVG - пиксели)
+            dpi: перевод пунктов (толщины, кегль) в единицы SVG
+        """
+        self.scale = pixels_per_meter
+        self.dpi = dpi
+        self._origin = 0.0  # y нижнего края плана (ось y SVG направлена вниз)
+
+    def points(self, value: float) -> float:
+        """Пункты -> единицы SVG."""
+        return value * self.dpi / 72.0
+
+    def render(self, layout: PlanLayout) -> str:
+        """Документ SVG."""
+        title_size = self.points(TITLE_SIZE)
+        line_height = title_size * TITLE_LINE_SPACING
+        top = line_height * len(layout.title) + (title_size if layout.title else 0)
+        width = layout.width * self.scale
+        height = top + layout.height * self.scale
+        self._origin = height
+
+        parts: List[str] = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(width)}" height="{_num(height)}" '
+            f'viewBox="0 0 {_num(width)} {_num(height)}" font-family="{FONT_FAMILY}">\n'
+            f'<rect width="100%" height="100%" fill="#ffffff"/>\n'
+        ]
+        for shape in layout.ordered():
+            if isinstance(shape, PlanRect):
+                parts.append(self._rect(shape))
+            elif isinstance(shape, PlanLine):
+                parts.append(self._polyline(self._pixels(shape.points), shape.color,
+                                            shape.line_width, shape.alpha))
+            elif isinstance(shape, PlanDot):
+                x, y = self._point(shape.x, shape.y)
+                parts.append(f'<circle cx="{_num(x)}" cy="{_num(y)}" r="{_num(self.points(shape.diameter) / 2)}" '
+                             f'fill="{_hex(shape.color)}"/>\n')
+            elif isinstance(shape, PlanArrow):
+                parts.append(self._arrow(shape))
+            elif isinstance(shape, PlanText):
+                parts.append(self._text(shape))
+
+        # Заголовок над планом
+        for i, line in enumerate(layout.title):
+            y = title_size / 2 + (i + 0.5) * line_height
+            parts.append(f'<text x="{_num(width / 2)}" y="{_num(y)}" font-size="{_num(title_size)}" '
+                         f'font-weight="bold" text-anchor="middle" dominant-baseline="central">'
+                         f'{_escape(line)}</text>\n')
+
+        parts.append('</svg>\n')
+        return ''.join(parts)
+
+    def _point(self, x: float, y: float) -> Tuple[float, float]:
+        return x * self.scale, self._origin - y * self.scale
+
+    def _pixels(self, points) -> List[Tuple[float, float]]:
+        points = points.tolist() if isinstance(points, np.ndarray) else points
+        return [self._point(x, y) for x, y in points]
+
+    @staticmethod
+    def _opacity(alpha: float) -> str:
+        return f' opacity="{alpha:g}"' if alpha < 1.0 else ''
+
+    def _rect(self, rect: PlanRect) -> str:
+        x, y = self._point(rect.x, rect.y + rect.height)
+        fill = _hex(rect.fill) if rect.fill is not None else 'none'
+        return (f'<rect x="{_num(x)}" y="{_num(y)}" width="{_num(rect.width * self.scale)}" '
+                f'height="{_num(rect.height * self.scale)}" fill="{fill}" stroke="{_hex(rect.stroke)}" '
+                f'stroke-width="{_num(self.points(rect.line_width))}"{self._opacity(rect.alpha)}/>\n')
+
+    def _polyline(self, pixels: Sequence[Tuple[float, float]], color, line_width: float,
+                  alpha: float = 1.0) -> str:
+        points = ' '.join('%g,%g' % (round(x, 1), round(y, 1)) for x, y in pixels)
+        return (f'<polyline points="{points}" fill="none" stroke="{_hex(color)}" '
+                f'stroke-width="{_num(self.points(line_width))}" stroke-linecap="round" '
+                f'stroke-linejoin="round"{self._opacity(alpha)}/>\n')
+
+    def _arrow(self, arrow: PlanArrow) -> str:
+        (x0, y0), (x1, y1) = self._pixels([arrow.start, arrow.end])
+        parts = [self._polyline([(x0, y0), (x1, y1)], arrow.color, arrow.line_width)]
+
+        norm = max(math.hypot(x1 - x0, y1 - y0), 1e-9)
+        dx, dy = (x1 - x0) / norm, (y1 - y0) / norm
+        length, half_width = self.points(ARROW_HEAD[0]), self.points(ARROW_HEAD[1])
+        for (tx, ty), sign in (((x0, y0), 1.0), ((x1, y1), -1.0)):
+            bx, by = tx + sign * dx * length, ty + sign * dy * length
+            head = [(bx - dy * half_width, by + dx * half_width), (tx, ty),
+                    (bx + dy * half_width, by - dx * half_width)]
+            parts.append(self._polyline(head, arrow.color, arrow.line_width))
+        return ''.join(parts)
+
+    def _text(self, text: PlanText) -> str:
+        x, y = self._point(text.x, text.y)
+        weight = ' font-weight="bold"' if text.bold else ''
+        if text.rotation % 360 == 90:  # Других поворотов в PlanLayout нет
+            # Повёрнутая надпись: верх строки у x, середина строки на y
+            attributes = (f'text-anchor="middle" dominant-baseline="text-before-edge" '
+                          f'transform="rotate(-90 {_num(x)} {_num(y)})"')
+        else:
+            anchor = 'middle' if text.anchor == 'middle' else 'start'
+            baseline = 'central' if text.valign == 'center' else 'text-after-edge'
+            attributes = f'text-anchor="{anchor}" dominant-baseline="{baseline}"'
+        return (f'<text x="{_num(x)}" y="{_num(y)}" font-size="{_num(self.points(text.size))}"{weight} '
+                f'fill="{_hex(text.color)}" {attributes}>{_escape(text.text)}</text>\n')
+
+
+def render_svg(layout: PlanLayout, pixels_per_meter: float = 150, dpi: float = 150) -> str:
+    """SVG планировки через SvgPlanRenderer."""
+    return SvgPlanRenderer(pixels_per_meter, dpi).render(layout)
+
+
+def write_svg(path: str, layout: PlanLayout, pixels_per_meter: float = 150, dpi: float = 150):
+    """Записать планировку в SVG."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_svg(layout, pixels_per_meter, dpi))
@@ -0,0 +1,264 @@
+import json
+import struct
+
+import numpy as np
+
+
+# Типы PLY для полей облака точек
+PLY_TYPES = {
+    np.dtype('<f4'): 'float',
+    np.dtype('<f8'): 'double',
+    np.dtype('u1'): 'uchar',
+    np.dtype('<u2'): 'ushort',
+    np.dtype('<u4'): 'uint',
+    np.dtype('<i4'): 'int',
+}
+PLY_DTYPES = {
+    'float': '<f4', 'float32': '<f4', 'double': '<f8', 'float64': '<f8',
+    'uchar': 'u1', 'uint8': 'u1', 'char': 'i1', 'int8': 'i1',
+    'ushort': '<u2', 'uint16': '<u2', 'short': '<i2', 'int16': '<i2',
+    'uint': '<u4', 'uint32': '<u4', 'int': '<i4', 'int32': '<i4',
+}
+
+PCC_MAGIC = b'PCC1'
+
+
+def point_dtype(colors=False, normals=False, track_length=False):
+    """Структурный dtype вершины облака точек."""
+    fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    if colors:
+        fields += [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+    if normals:
+        fields += [('nx', '<f4'), ('ny', '<f4'), ('nz', '<f4')]
+    if track_length:
+        fields += [('track_length', '<u2')]
+    return np.dtype(fields)
+
+
+def to_structured(points, colors=None, normals=None, track_lengths=None):
+    """Упаковка массивов в структурный массив."""
+    points = np.asarray(points)
+    dtype = point_dtype(colors is not None, normals is not None, track_lengths is not None)
+    data = np.empty(len(points), dtype=dtype)
+
+    data['x'], data['y'], data['z'] = points[:, 0], points[:, 1], points[:, 2]
+    if colors is not None:
+        colors = np.asarray(colors)
+        if colors.dtype.kind == 'f':
+            colors = np.clip(colors * 255.0, 0, 255)
+        data['red'], data['green'], data['blue'] = colors[:, 0], colors[:, 1], colors[:, 2]
+    if normals is not None:
+        normals = np.asarray(normals)
+        data['nx'], data['ny'], data['nz'] = normals[:, 0], normals[:, 1], normals[:, 2]
+    if track_lengths is not None:
+        data['track_length'] = np.minimum(track_lengths, np.iinfo(np.uint16).max)
+    return data
+
+
+def split_fields(data):
+    """Структурный массив -> словарь points / colors / normals / track_lengths."""
+    names = data.dtype.names
+    result = {'points': np.stack([data['x'], data['y'], data['z']], axis=1)}
+    if 'red' in names:
+        result['colors'] = np.stack([data['red'], data['green'], data['blue']], axis=1)
+    if 'nx' in names:
+        result['normals'] = np.stack([data['nx'], data['ny'], data['nz']], axis=1)
+    if 'track_length' in names:
+        result['track_lengths'] = np.asarray(data['track_length'])
+    return result
+
+
+def write_ply(path, points, colors=None, normals=None, track_lengths=None,
+              chunk_size=1_000_000):
+    """
+    Запись облака точек в binary little-endian PLY.
+
+    Данные пишутся блоками по chunk_size точек через tofile, поэтому в памяти
+    одновременно находится только один блок структурного массива.
+    """
+    points = np.asarray(points)
+    n = len(points)
+    dtype = point_dtype(colors is not None, normals is not None, track_lengths is not None)
+
+    header = ["ply", "format binary_little_endian 1.0",
+              "comment Generated by RoomPlanner", f"element vertex {n}"]
+    for name in dtype.names:
+        header.append(f"property {PLY_TYPES[dtype[name]]} {name}")
+    header.append("end_header")
+
+    with open(path, 'wb') as f:
+        f.write(('\n'.join(header) + '\n').encode('ascii'))
+        for start in range(0, n, chunk_size):
+            end = min(start + chunk_size, n)
+            block = to_structured(
+                points[start:end],
+                colors[start:end] if colors is not None else None,
+                normals[start:end] if normals is not None else None,
+                track_lengths[start:end] if track_lengths is not None else None,
+            )
+            block.tofile(f)
+
+    print(f"  Облако точек сохранено: {path} ({n} точек)")
+
+
+def read_ply(path, mmap=False):
+    """
+    Чтение binary little-endian PLY с одним элементом vertex.
+
+    Returns:
+        Структурный массив вершин (при mmap=True - np.memmap без копирования)
+    """
+    with open(path, 'rb') as f:
+        if f.readline().strip() != b'ply':
+            raise ValueError(f"{path}: не PLY файл")
+
+        fields = []
+        count = 0
+        fmt = None
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError(f"{path}: нет end_header")
+            parts = line.decode('ascii').split()
+            if not parts:
+                continue
+            if parts[0] == 'format':
+                fmt = parts[1]
+            elif parts[0] == 'element':
+                if parts[1] != 'vertex':
+                    raise ValueError(f"{path}: поддерживается только element vertex")
+                count = int(parts[2])
+            elif parts[0] == 'property':
+                if parts[1] == 'list':
+                    raise ValueError(f"{path}: списковые свойства не поддерживаются")
+                fields.append((parts[2], PLY_DTYPES[parts[1]]))
+            elif parts[0] == 'end_header':
+                break
+        offset = f.tell()
+
+        if fmt != 'binary_little_endian':
+            raise ValueError(f"{path}: поддерживается только binary_little_endian, получен {fmt}")
+
+        dtype = np.dtype(fields)
+        if mmap:
+            return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+        return np.fromfile(f, dtype=dtype, count=count)
+
+
+def write_chunked(path, points, colors=None, normals=None, track_lengths=None,
+                  chunk_extent=1.0, bits=16):
+    """
+    Квантованный формат с пространственными блоками.
+
+    Точки раскладываются по кубам со стороной chunk_extent; координаты внутри
+    блока хранятся как uint16 относительно границ блока. Индекс блоков лежит в
+    JSON заголовке, что позволяет читать только блоки, пересекающие нужную область.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    data = to_structured(points, colors, normals, track_lengths)
+
+    # Позиции хранятся отдельно в квантованном виде
+    extra_names = [n for n in data.dtype.names if n not in ('x', 'y', 'z')]
+    extra_dtype = np.dtype([(n, data.dtype[n]) for n in extra_names])
+    qmax = (1 << bits) - 1
+    qdtype = np.dtype('<u2') if bits <= 16 else np.dtype('<u4')
+
+    origin = points.min(axis=0) if len(points) else np.zeros(3)
+    cells = np.floor((points - origin) / chunk_extent).astype(np.int64)
+    dims = cells.max(axis=0) + 1 if len(points) else np.ones(3, dtype=np.int64)
+    cell_ids = np.ravel_multi_index(cells.T, dims) if len(points) else np.empty(0, np.int64)
+
+    order = np.argsort(cell_ids, kind='stable')
+    cell_ids = cell_ids[order]
+    starts = np.flatnonzero(np.diff(cell_ids, prepend=-1))
+    ends = np.append(starts[1:], len(cell_ids))
+
+    chunks = []
+    blobs = []
+    offset = 0
+    for s, e in zip(starts, ends):
+        idx = order[s:e]
+        pts = points[idx]
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        scale = np.where(hi > lo, (hi - lo) / qmax, 1.0)
+        q = np.rint((pts - lo) / scale).astype(qdtype)
+
+        extra = np.empty(len(idx), dtype=extra_dtype)
+        for n in extra_names:
+            extra[n] = data[n][idx]
+
+        blob = q.tobytes() + extra.tobytes()
+        chunks.append({'min': lo.tolist(), 'max': hi.tolist(), 'count': int(e - s),
+                       'offset': offset})
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps({
+        'bits': bits,
+        'fields': [[n, extra_dtype[n].str] for n in extra_names],
+        'chunks': chunks
+    }).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(PCC_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+
+    print(f"  Облако точек сохранено: {path} ({len(points)} точек, {len(chunks)} блоков)")
+
+
+def read_chunked(path, box_min=None, box_max=None):
+    """
+    Чтение квантованного облака; при заданном box_min/box_max читаются только
+    пересекающие область блоки, а точки дополнительно отсекаются по границам.
+
+    Returns:
+        Структурный массив вершин (позиции float32)
+    """
+    with open(path, 'rb') as f:
+        if f.read(4) != PCC_MAGIC:
+            raise ValueError(f"{path}: не PCC файл")
+        header_len = struct.unpack('<I', f.read(4))[0]
+        header = json.loads(f.read(header_len).decode('utf-8'))
+        data_start = f.tell()
+
+        bits = header['bits']
+        qmax = (1 << bits) - 1
+        qdtype = np.dtype('<u2') if bits <= 16 else np.dtype('<u4')
+        extra_dtype = np.dtype([(n, t) for n, t in header['fields']])
+        out_dtype = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4')] +
+                             [(n, extra_dtype[n]) for n in extra_dtype.names])
+
+        chunks = header['chunks']
+        if box_min is not None and box_max is not None:
+            box_min = np.asarray(box_min, dtype=np.float64)
+            box_max = np.asarray(box_max, dtype=np.float64)
+            chunks = [c for c in chunks
+                      if np.all(np.asarray(c['max']) >= box_min) and
+                      np.all(np.asarray(c['min']) <= box_max)]
+
+        parts = []
+        for c in chunks:
+            f.seek(data_start + c['offset'])
+            q = np.fromfile(f, dtype=qdtype, count=c['count'] * 3).reshape(-1, 3)
+            extra = np.fromfile(f, dtype=extra_dtype, count=c['count'])
+
+            lo, hi = np.asarray(c['min']), np.asarray(c['max'])
+            scale = np.where(hi > lo, (hi - lo) / qmax, 1.0)
+            pts = lo + q * scale
+
+            if box_min is not None and box_max is not None:
+                keep = np.all((pts >= box_min) & (pts <= box_max), axis=1)
+                pts, extra = pts[keep], extra[keep]
+
+            part = np.empty(len(pts), dtype=out_dtype)
+            part['x'], part['y'], part['z'] = pts[:, 0], pts[:, 1], pts[:, 2]
+            for n in extra_dtype.names:
+                part[n] = extra[n]
+            parts.append(part)
+
+    if not parts:
+        return np.empty(0, dtype=out_dtype)
+    return np.concatenate(parts)
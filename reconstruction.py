@@ -1,25 +1,84 @@
 import numpy as np
 import cv2
-from camera import Camera, estimate_pose_from_essential, triangulate_points
-from features import FeatureDetector, FeatureMatcher
+from camera import Camera, CameraRegistry, estimate_pose_from_essential, triangulate_points
+from features import FeatureDetector, FeatureMatcher, PCADescriptorReducer
+from checkpoint import CheckpointStore, stage_key, keypoints_to_array, array_to_keypoints
+from pointcloud_io import write_ply
 
 
 class RoomReconstructor:
     """Реконструкция комнаты из фотографий."""
 
-    def __init__(self, K):
+    def __init__(self, K=None, descriptor_format='float32', checkpoint_dir=None, pca=None,
+                 registry=None):
+        """
+        Args:
+            K: общая матрица камеры для всех фото; None - модель камеры
+                каждого фото определяет registry
+            pca: обученный PCADescriptorReducer для 'pca16' (при загрузке
+                реконструкции - базис, в котором сохранены дескрипторы)
+            registry: CameraRegistry - K и устранение дисторсии по модели
+                камеры каждого фото (калибровка или EXIF)
+        """
         self.K = K
-        self.detector = FeatureDetector(max_features=3000)
+        self.registry = registry if registry is not None or K is not None else CameraRegistry()
+        self.detector = FeatureDetector(max_features=3000, descriptor_format=descriptor_format, pca=pca)
         self.matcher = FeatureMatcher(ratio_threshold=0.75)
+        self.geometry_threshold = 3.0
+        self.max_depth = 50
+        self.checkpoints = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
         self.cameras = []
+        self.intrinsics = []  # Матрица K каждой камеры
         self.points_3d = []
+        self.keypoints = []
+        self.descriptors = []
+        # Наблюдения точек: строки (индекс точки, индекс фото, индекс ключевой точки)
+        self.observations = np.empty((0, 3), dtype=np.int32)
+        self.stage_keys = {}
 
-    def reconstruct(self, images):
+    def _prepare_images(self, images, image_paths=None):
+        """
+        Изображения без дисторсии и матрица K каждого из них.
+
+        С реестром камер модель берётся по фото (калибровка -> EXIF ->
+        угол обзора), дисторсия устраняется кэшированными картами remap;
+        без реестра у всех фото общая K.
+        """
+        if self.registry is None:
+            return list(images), [np.asarray(self.K, dtype=np.float64)] * len(images)
+        paths = image_paths if image_paths is not None else [None] * len(images)
+        undistorted, cameras = self.registry.prepare(paths, images)
+        return undistorted, [cam.K for cam in cameras]
+
+    def _stage_keys(self, images, intrinsics):
+        """Ключи этапов: каждый зависит от своих параметров и от предыдущего этапа."""
+        keys = {}
+        keys['features'] = stage_key(
+            [stage_key(img) for img in images],
+            self.detector.max_features, self.detector.descriptor_format
+        )
+        keys['matches'] = stage_key(keys['features'], self.matcher.ratio_threshold,
+                                    self.geometry_threshold)
+        keys['tracks'] = stage_key(keys['matches'], np.stack(intrinsics[:2]))
+        keys['poses'] = stage_key(keys['tracks'])
+        keys['points'] = stage_key(keys['poses'], self.max_depth)
+        return keys
+
+    def _checkpoint(self, stage, key, arrays, meta=None):
+        if self.checkpoints is not None:
+            self.checkpoints.save(stage, key, arrays, meta)
+
+    def reconstruct(self, images, image_paths=None):
         """
         Основной метод реконструкции.
 
+        Если задан checkpoint_dir, после каждого этапа (features, matches, tracks,
+        poses, points) пишется чекпоинт, а повторный запуск продолжает с последнего
+        действительного этапа.
+
         Args:
             images: Список изображений (numpy arrays)
+            image_paths: пути к фото - для EXIF модели камеры (с реестром камер)
 
         Returns:
             points_3d: Облако 3D точек
@@ -27,62 +86,471 @@ class RoomReconstructor:
         """
         print(f"Обработка {len(images)} изображений...")
 
+        images, intrinsics = self._prepare_images(images, image_paths)
+        self.intrinsics = intrinsics[:2]
+        K1, K2 = intrinsics[0], intrinsics[1]
+
+        keys = self._stage_keys(images, intrinsics)
+        self.stage_keys = keys
+        resume = None
+        if self.checkpoints is not None:
+            resume = self.checkpoints.last_valid_stage(keys)
+            if resume:
+                print(f"  Продолжение с чекпоинта: этап '{resume}'")
+        done = CheckpointStore.STAGES.index(resume) + 1 if resume else 0
+
+        if done >= 5:
+            return self._restore_points(), self.cameras
+
         # 1. Детекция ключевых точек на всех изображениях
-        all_keypoints = []
-        all_descriptors = []
+        if done >= 1:
+            all_keypoints, all_descriptors = self._restore_features(len(images))
+        else:
+            all_keypoints = []
+            all_descriptors = []
 
-        for i, img in enumerate(images):
-            kp, desc = self.detector.detect(img)
-            all_keypoints.append(kp)
-            all_descriptors.append(desc)
-            print(f"  Изображение {i+1}: {len(kp)} ключевых точек")
+            for i, img in enumerate(images):
+                kp, desc = self.detector.detect(img)
+                all_keypoints.append(kp)
+                all_descriptors.append(desc)
+                print(f"  Изображение {i+1}: {len(kp)} ключевых точек")
+
+            desc_bytes = sum(d.nbytes for d in all_descriptors if d is not None)
+            print(f"  Дескрипторы ({self.detector.descriptor_format}): {desc_bytes / 1024 / 1024:.1f} МБ")
+            self._save_features(keys['features'], all_keypoints, all_descriptors)
+
+        self.keypoints = all_keypoints
+        self.descriptors = all_descriptors
 
         # 2. Сопоставление между первой парой
-        print("\\nСопоставление первой пары изображений...")
-        matches = self.matcher.match(all_descriptors[0], all_descriptors[1])
-        print(f"  Найдено {len(matches)} соответствий")
+        if done >= 2:
+            arrays, _ = self.checkpoints.load('matches')
+            matches = [cv2.DMatch(int(q), int(t), float(d))
+                       for q, t, d in zip(arrays['query_idx'], arrays['train_idx'], arrays['distance'])]
+        else:
+            print("\\nСопоставление первой пары изображений...")
+            matches = self.matcher.match(all_descriptors[0], all_descriptors[1])
+            print(f"  Найдено {len(matches)} соответствий")
 
-        # Фильтрация геометрии
-        matches, F = self.matcher.filter_by_geometry(
-            all_keypoints[0], all_keypoints[1], matches, self.K
-        )
-        print(f"  После геометрической фильтрации: {len(matches)}")
+            # Фильтрация геометрии
+            matches, F = self.matcher.filter_by_geometry(
+                all_keypoints[0], all_keypoints[1], matches, K1, self.geometry_threshold
+            )
+            print(f"  После геометрической фильтрации: {len(matches)}")
+
+            self._checkpoint('matches', keys['matches'], {
+                'query_idx': np.array([m.queryIdx for m in matches], dtype=np.int32),
+                'train_idx': np.array([m.trainIdx for m in matches], dtype=np.int32),
+                'distance': np.array([m.distance for m in matches], dtype=np.float32),
+            })
 
         if len(matches) < 20:
             raise ValueError("Слишком мало соответствий для реконструкции")
 
         # 3. Оценка позы
-        pts1 = np.float32([all_keypoints[0][m.queryIdx].pt for m in matches])
-        pts2 = np.float32([all_keypoints[1][m.trainIdx].pt for m in matches])
+        if done >= 3:
+            arrays, _ = self.checkpoints.load('tracks')
+            pts1, pts2, mask = arrays['pts1'], arrays['pts2'], arrays['inlier_mask']
+            E = arrays['essential']
+        else:
+            pts1 = np.float32([all_keypoints[0][m.queryIdx].pt for m in matches])
+            pts2 = np.float32([all_keypoints[1][m.trainIdx].pt for m in matches])
 
-        # Essential matrix
-        E, mask = cv2.findEssentialMat(pts1, pts2, self.K, method=cv2.RANSAC, prob=0.999, threshold=1.0)
+            # Essential matrix по нормализованным координатам (у фото могут быть разные K)
+            E, mask = cv2.findEssentialMat(_normalize(pts1, K1), _normalize(pts2, K2), np.eye(3),
+                                           method=cv2.RANSAC, prob=0.999,
+                                           threshold=1.0 / _focal(K1, K2))
+            self._checkpoint('tracks', keys['tracks'], {
+                'pts1': pts1, 'pts2': pts2, 'inlier_mask': mask, 'essential': E
+            })
 
         # Восстановление позы
-        R, t = estimate_pose_from_essential(E, self.K, pts1, pts2)
+        if done >= 4:
+            arrays, _ = self.checkpoints.load('poses', mmap=False)
+            R, t = arrays['R'][1], arrays['t'][1]
+        else:
+            R, t = estimate_pose_from_essential(E, np.eye(3), _normalize(pts1, K1), _normalize(pts2, K2))
+            self._checkpoint('poses', keys['poses'], {
+                'R': np.stack([np.eye(3), R]),
+                't': np.stack([np.zeros((3, 1)), t.reshape(3, 1)]),
+                'K': np.stack([K1, K2])
+            })
 
         # 4. Создание камер
-        cam1 = Camera(self.K)
+        cam1 = Camera(K1)
         cam1.set_pose(np.eye(3), np.zeros(3))
 
-        cam2 = Camera(self.K)
+        cam2 = Camera(K2)
         cam2.set_pose(R, t)
 
         self.cameras = [cam1, cam2]
 
         # 5. Триангуляция точек
-        inlier_pts1 = pts1[mask.ravel() > 0]
-        inlier_pts2 = pts2[mask.ravel() > 0]
+        inliers = mask.ravel() > 0
+        inlier_pts1 = pts1[inliers]
+        inlier_pts2 = pts2[inliers]
 
         points_3d = triangulate_points(cam1, cam2, inlier_pts1, inlier_pts2)
 
         # Фильтрация выбросов по глубине
         z_values = points_3d[:, 2]
-        valid_mask = (z_values > 0) & (z_values < 50)
+        valid_mask = (z_values > 0) & (z_values < self.max_depth)
         points_3d = points_3d[valid_mask]
 
+        # Какие ключевые точки породили каждую 3D точку (нужно для PnP новых фото)
+        query_idx = np.array([m.queryIdx for m in matches], dtype=np.int32)[inliers][valid_mask]
+        train_idx = np.array([m.trainIdx for m in matches], dtype=np.int32)[inliers][valid_mask]
+        point_ids = np.arange(len(points_3d), dtype=np.int32)
+        self.observations = np.concatenate([
+            np.stack([point_ids, np.zeros_like(point_ids), query_idx], axis=1),
+            np.stack([point_ids, np.ones_like(point_ids), train_idx], axis=1),
+        ])
+
         self.points_3d = points_3d
+        self._checkpoint('points', keys['points'], {
+            'points_3d': points_3d, 'observations': self.observations
+        })
 
         print(f"\\nРеконструировано {len(points_3d)} 3D точек")
 
         return points_3d, self.cameras
+
+    def _save_features(self, key, all_keypoints, all_descriptors):
+        """Ключевые точки и дескрипторы всех фото одним блоком со смещениями."""
+        if self.checkpoints is None:
+            return
+
+        counts = [len(kp) for kp in all_keypoints]
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        descs = [d for d in all_descriptors if d is not None]
+        dim = descs[0].shape[1] if descs else 128
+        dtype = descs[0].dtype if descs else np.float32
+
+        arrays = {
+            'offsets': offsets,
+            'keypoints': np.concatenate([keypoints_to_array(kp) for kp in all_keypoints]),
+            'descriptors': (np.concatenate(descs) if descs else np.empty((0, dim), dtype)),
+        }
+        # Дескрипторы pca16 сравнимы только в своём базисе: он сохраняется вместе с ними
+        if self.detector.descriptor_format == 'pca16' and self.detector.pca.is_fitted:
+            arrays['pca_mean'] = self.detector.pca.mean
+            arrays['pca_components'] = self.detector.pca.components
+        self._checkpoint('features', key, arrays,
+                         meta={'descriptor_format': self.detector.descriptor_format})
+
+    @staticmethod
+    def _restore_pca(arrays, descriptor_format):
+        """Базис PCA из массивов этапа features (None для других форматов)."""
+        if descriptor_format != 'pca16':
+            return None
+        if 'pca_mean' not in arrays or 'pca_components' not in arrays:
+            raise ValueError("В чекпоинте нет базиса PCA для дескрипторов pca16")
+        components = np.array(arrays['pca_components'], dtype=np.float32)
+        pca = PCADescriptorReducer(n_components=components.shape[1])
+        pca.mean = np.array(arrays['pca_mean'], dtype=np.float32)
+        pca.components = components
+        return pca
+
+    def _restore_features(self, n_images=None, mmap=True):
+        arrays, meta = self.checkpoints.load('features', mmap=mmap)
+        pca = self._restore_pca(arrays, meta.get('descriptor_format', 'float32'))
+        if pca is not None:
+            self.detector.pca = pca
+        offsets = arrays['offsets']
+        if n_images is None:
+            n_images = len(offsets) - 1
+        all_keypoints = []
+        all_descriptors = []
+        for i in range(n_images):
+            a, b = int(offsets[i]), int(offsets[i + 1])
+            all_keypoints.append(array_to_keypoints(arrays['keypoints'][a:b]))
+            all_descriptors.append(arrays['descriptors'][a:b] if b > a else None)
+        return all_keypoints, all_descriptors
+
+    def _restore_points(self):
+        """Камеры и облако точек из чекпоинта (облако - memory map, без разбора)."""
+        poses, _ = self.checkpoints.load('poses', mmap=False)
+        self.intrinsics = list(_per_camera(poses['K'], len(poses['R'])))
+        self.cameras = []
+        for K, R, t in zip(self.intrinsics, poses['R'], poses['t']):
+            cam = Camera(K)
+            cam.set_pose(R, t)
+            self.cameras.append(cam)
+
+        arrays, _ = self.checkpoints.load('points')
+        self.points_3d = arrays['points_3d']
+        if 'observations' in arrays:
+            self.observations = np.asarray(arrays['observations'])
+        print(f"\\nЗагружено {len(self.points_3d)} 3D точек из чекпоинта")
+        return self.points_3d
+
+    @classmethod
+    def load(cls, checkpoint_dir, registry=None):
+        """
+        Загрузка сохранённой реконструкции из папки чекпоинтов.
+
+        Args:
+            registry: CameraRegistry для новых фото add_images; без него
+                новые фото получают K первой камеры
+        """
+        store = CheckpointStore(checkpoint_dir)
+        if not all(stage in store.manifest['stages'] for stage in ('features', 'poses', 'points')):
+            raise ValueError(f"В {checkpoint_dir} нет полной реконструкции")
+
+        poses, _ = store.load('poses', mmap=False)
+        features, meta = store.load('features')
+        descriptor_format = meta.get('descriptor_format', 'float32')
+        reconstructor = cls(_per_camera(poses['K'], len(poses['R']))[0],
+                            descriptor_format=descriptor_format,
+                            checkpoint_dir=checkpoint_dir,
+                            pca=cls._restore_pca(features, descriptor_format),
+                            registry=registry)
+        reconstructor.stage_keys = {stage: entry['key']
+                                    for stage, entry in store.manifest['stages'].items()}
+        reconstructor._restore_points()
+        return reconstructor
+
+    def add_images(self, new_images, top_k=3, min_pnp_points=12, reprojection_error=4.0,
+                   image_paths=None):
+        """
+        Добавление новых фотографий в существующую реконструкцию.
+
+        Признаки извлекаются только для новых фото, сопоставление идёт с top_k
+        наиболее похожими уже зарегистрированными видами. Новые камеры регистрируются
+        через PnP, затем выполняется локальное уточнение только затронутых камер и точек.
+        С реестром камер каждое фото получает K своей модели (image_paths - для EXIF).
+
+        Returns:
+            Индексы зарегистрированных камер
+        """
+        if len(self.cameras) == 0:
+            raise ValueError("Нет исходной реконструкции: вызовите reconstruct() или load()")
+
+        # Без memory map: _save_appended перезаписывает те же файлы чекпоинта
+        if not self.keypoints and self.checkpoints is not None:
+            self.keypoints, self.descriptors = self._restore_features(mmap=False)
+
+        print(f"Добавление {len(new_images)} изображений к реконструкции "
+              f"({len(self.cameras)} камер, {len(self.points_3d)} точек)...")
+
+        points = [np.array(self.points_3d, dtype=np.float64).reshape(-1, 3)]
+        observations = [np.array(self.observations, dtype=np.int32).reshape(-1, 3)]
+        first_new_point = len(points[0])
+        registered = []
+        new_images, new_intrinsics = self._prepare_images(new_images, image_paths)
+
+        for img, K in zip(new_images, new_intrinsics):
+            kp, desc = self.detector.detect(img)
+            if desc is None:
+                print("  Нет ключевых точек, фото пропущено")
+                continue
+
+            all_points = np.concatenate(points)
+            all_obs = np.concatenate(observations)
+            views = self._retrieve_views(desc, top_k)
+
+            # 2D-3D соответствия через уже триангулированные ключевые точки
+            view_matches = {}
+            pnp = {}  # индекс новой ключевой точки -> индекс 3D точки
+            for v in views:
+                matches = self.matcher.match(self.descriptors[v], desc)
+                matches, _ = self.matcher.filter_by_geometry(
+                    self.keypoints[v], kp, matches, K, self.geometry_threshold
+                )
+                view_matches[v] = matches
+                lookup = self._point_lookup(all_obs, v, len(self.keypoints[v]))
+                for m in matches:
+                    if lookup[m.queryIdx] >= 0:
+                        pnp.setdefault(m.trainIdx, lookup[m.queryIdx])
+
+            if len(pnp) < min_pnp_points:
+                print(f"  Мало 2D-3D соответствий ({len(pnp)}), фото пропущено")
+                continue
+
+            kp_ids = np.array(list(pnp.keys()), dtype=np.int32)
+            pt_ids = np.array(list(pnp.values()), dtype=np.int32)
+            obj = all_points[pt_ids]
+            img_pts = np.float64([kp[i].pt for i in kp_ids])
+
+            ok, rvec, tvec, inliers = cv2.solvePnPRansac(
+                obj, img_pts, K, None, reprojectionError=reprojection_error
+            )
+            if not ok or inliers is None or len(inliers) < min_pnp_points:
+                print("  PnP не сошёлся, фото пропущено")
+                continue
+
+            inliers = inliers.ravel()
+            cam = Camera(K)
+            cam.set_pose(cv2.Rodrigues(rvec)[0], tvec)
+
+            cam_idx = len(self.cameras)
+            self.cameras.append(cam)
+            self.intrinsics.append(K)
+            self.keypoints.append(kp)
+            self.descriptors.append(desc)
+            registered.append(cam_idx)
+
+            observations.append(np.stack([
+                pt_ids[inliers], np.full(len(inliers), cam_idx, dtype=np.int32), kp_ids[inliers]
+            ], axis=1))
+
+            # Новые точки из соответствий без 3D точки
+            new_pts, new_obs = self._triangulate_new(
+                cam_idx, view_matches, all_obs, set(kp_ids.tolist()), len(all_points)
+            )
+            if len(new_pts):
+                points.append(new_pts)
+                observations.append(new_obs)
+
+            print(f"  Камера {cam_idx + 1}: {len(inliers)} PnP inliers, "
+                  f"новых точек: {len(new_pts)}")
+
+        self.points_3d = np.concatenate(points)
+        self.observations = np.concatenate(observations)
+
+        if registered:
+            self._local_bundle_adjustment(registered, first_new_point)
+            self._save_appended(new_images)
+
+        print(f"\nИтого: {len(self.cameras)} камер, {len(self.points_3d)} 3D точек")
+        return registered
+
+    def _retrieve_views(self, desc, top_k, sample=500):
+        """Выбор похожих видов по числу совпадений подвыборки дескрипторов."""
+        n_views = len(self.cameras)
+        if n_views <= top_k:
+            return list(range(n_views))
+
+        step = max(1, len(desc) // sample)
+        probe = desc[::step]
+        scores = [len(self.matcher.match(probe, self.descriptors[v]))
+                  if self.descriptors[v] is not None else 0
+                  for v in range(n_views)]
+        return list(np.argsort(scores)[::-1][:top_k])
+
+    @staticmethod
+    def _point_lookup(observations, image_idx, n_keypoints):
+        """Массив: ключевая точка фото -> индекс 3D точки (-1, если нет)."""
+        lookup = np.full(n_keypoints, -1, dtype=np.int64)
+        sel = observations[:, 1] == image_idx
+        lookup[observations[sel, 2]] = observations[sel, 0]
+        return lookup
+
+    def _triangulate_new(self, cam_idx, view_matches, observations, used_keypoints, next_point):
+        """Триангуляция соответствий нового фото, у которых ещё нет 3D точки."""
+        cam = self.cameras[cam_idx]
+        kp_new = self.keypoints[cam_idx]
+        pts, obs = [], []
+
+        for v, matches in view_matches.items():
+            lookup = self._point_lookup(observations, v, len(self.keypoints[v]))
+            fresh = [m for m in matches
+                     if lookup[m.queryIdx] < 0 and m.trainIdx not in used_keypoints]
+            if not fresh:
+                continue
+
+            pts_v = np.float32([self.keypoints[v][m.queryIdx].pt for m in fresh])
+            pts_n = np.float32([kp_new[m.trainIdx].pt for m in fresh])
+            tri = triangulate_points(self.cameras[v], cam, pts_v, pts_n)
+
+            # Точка должна быть перед обеими камерами
+            depth_v = (self.cameras[v].R @ tri.T + self.cameras[v].t)[2]
+            depth_n = (cam.R @ tri.T + cam.t)[2]
+            valid = (depth_v > 0) & (depth_n > 0) & (depth_n < self.max_depth)
+
+            for m, p, ok in zip(fresh, tri, valid):
+                if not ok:
+                    continue
+                pid = next_point + len(pts)
+                pts.append(p)
+                obs.append((pid, v, m.queryIdx))
+                obs.append((pid, cam_idx, m.trainIdx))
+                used_keypoints.add(m.trainIdx)
+
+        return (np.array(pts, dtype=np.float64).reshape(-1, 3),
+                np.array(obs, dtype=np.int32).reshape(-1, 3))
+
+    def _local_bundle_adjustment(self, camera_indices, first_new_point, iterations=2):
+        """
+        Локальное уточнение: позы только новых камер (LM по репроекции) и
+        перетриангуляция только новых точек; старые камеры и точки фиксированы.
+        """
+        obs = self.observations
+        points = self.points_3d
+
+        for _ in range(iterations):
+            for idx in camera_indices:
+                sel = obs[:, 1] == idx
+                if np.count_nonzero(sel) < 6:
+                    continue
+                cam = self.cameras[idx]
+                obj = points[obs[sel, 0]]
+                img_pts = np.float64([self.keypoints[idx][k].pt for k in obs[sel, 2]])
+                rvec, tvec = cv2.solvePnPRefineLM(
+                    obj, img_pts, cam.K, None, cv2.Rodrigues(cam.R)[0], cam.t.astype(np.float64)
+                )
+                cam.set_pose(cv2.Rodrigues(rvec)[0], tvec)
+
+            # Перетриангуляция новых точек по всем их наблюдениям (DLT)
+            new_obs = obs[obs[:, 0] >= first_new_point]
+            order = np.argsort(new_obs[:, 0], kind='stable')
+            new_obs = new_obs[order]
+            starts = np.flatnonzero(np.diff(new_obs[:, 0], prepend=-1))
+            for group in np.split(new_obs, starts[1:]):
+                if len(group) < 2:
+                    continue
+                rows = []
+                for _, img_idx, kp_idx in group:
+                    P = self.cameras[img_idx].get_projection_matrix()
+                    x, y = self.keypoints[img_idx][kp_idx].pt
+                    rows.append(x * P[2] - P[0])
+                    rows.append(y * P[2] - P[1])
+                _, _, vt = np.linalg.svd(np.array(rows))
+                X = vt[-1]
+                if abs(X[3]) > 1e-12:
+                    points[group[0, 0]] = X[:3] / X[3]
+
+        self.points_3d = points
+
+    def _save_appended(self, new_images):
+        """Сохранение расширенной реконструкции в чекпоинты."""
+        if self.checkpoints is None:
+            return
+
+        base = self.stage_keys.get('points', '')
+        key = stage_key(base, [stage_key(img) for img in new_images])
+        self.stage_keys = {stage: stage_key(key, stage) for stage in CheckpointStore.STAGES}
+
+        self._save_features(self.stage_keys['features'], self.keypoints, self.descriptors)
+        # Попарные этапы относятся к исходной паре и для расширенной сцены не сохраняются
+        self.checkpoints.save('poses', self.stage_keys['poses'], {
+            'R': np.stack([cam.R for cam in self.cameras]),
+            't': np.stack([cam.t for cam in self.cameras]),
+            'K': np.stack([cam.K for cam in self.cameras])
+        })
+        self.checkpoints.save('points', self.stage_keys['points'], {
+            'points_3d': self.points_3d, 'observations': self.observations
+        })
+
+    def export_ply(self, path, colors=None, normals=None):
+        """Экспорт облака точек в binary PLY с длиной трека каждой точки."""
+        points = np.asarray(self.points_3d).reshape(-1, 3)
+        track_lengths = np.bincount(np.asarray(self.observations)[:, 0],
+                                    minlength=len(points))[:len(points)]
+        write_ply(path, points, colors=colors, normals=normals, track_lengths=track_lengths)
+
+
+def _normalize(pts, K):
+    """Пиксели (N, 2) -> нормализованные координаты камеры с матрицей K."""
+    return cv2.undistortPoints(np.asarray(pts, dtype=np.float64).reshape(-1, 1, 2), K, None).reshape(-1, 2)
+
+
+def _focal(K1, K2):
+    """Средний фокус пары камер - перевод порога в пикселях в нормализованные координаты."""
+    return (K1[0, 0] + K1[1, 1] + K2[0, 0] + K2[1, 1]) / 4
+
+
+def _per_camera(K, n_cameras):
+    """K из чекпоинта поз: (N, 3, 3) или общая (3, 3) в старых чекпоинтах."""
+    K = np.asarray(K, dtype=np.float64)
+    return K if K.ndim == 3 else np.repeat(K[None], n_cameras, axis=0)
@@ -0,0 +1,241 @@
+import numpy as np
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple
+
+from mesh import IndexedMesh
+
+
+# Зоны фото (x0, y0, x1, y1 в долях кадра) для поверхностей без поз камер -
+# те же, что при анализе цветов: левая и правая четверти - боковые стены,
+# центр - дальняя стена, нижняя и верхняя трети - пол и потолок
+PHOTO_ZONES = {
+    'left': (0.0, 1 / 3, 0.25, 2 / 3),
+    'top': (0.25, 1 / 3, 0.75, 2 / 3),
+    'right': (0.75, 1 / 3, 1.0, 2 / 3),
+    'floor': (0.0, 2 / 3, 1.0, 1.0),
+    'ceiling': (0.0, 0.0, 1.0, 1 / 3),
+}
+
+
+@dataclass
+class AtlasSurface:
+    """Прямоугольная поверхность модели и её участок на фото."""
+    material: str  # Имя материала граней в сетке (wall_2, floor ...)
+    image: np.ndarray  # Фото (BGR)
+    quad: np.ndarray  # (4, 2) пиксели фото для UV (0,0), (1,0), (1,1), (0,1)
+    size: Tuple[float, float]  # Ширина и высота поверхности, м
+
+
+def zone_quad(image_shape, zone: str, mirror: bool = False) -> np.ndarray:
+    """
+    Углы зоны PHOTO_ZONES в пикселях в порядке UV (0,0), (1,0), (1,1), (0,1):
+    низ-лево, низ-право, верх-право, верх-лево.
+
+    Args:
+        mirror: U поверхности растёт справа налево на фото
+    """
+    h, w = image_shape[:2]
+    x0, y0, x1, y1 = PHOTO_ZONES[zone]
+    quad = np.array([[x0, y1], [x1, y1], [x1, y0], [x0, y0]]) * [w, h]
+    return quad[[1, 0, 3, 2]] if mirror else quad
+
+
+@lru_cache(maxsize=64)
+def _remap_tables(quad: tuple, tile_w: int, tile_h: int, padding: int):
+    """
+    Таблицы cv2.remap тайла (с полями padding) для участка фото quad.
+
+    Гомография тайл -> фото считается один раз на участок и размер тайла;
+    повторная запекание тех же фото (другие проёмы, та же комната) берёт
+    готовые таблицы.
+    """
+    src = np.array(quad, dtype=np.float32).reshape(4, 2)
+    dst = np.array([[padding, padding + tile_h], [padding + tile_w, padding + tile_h],
+                    [padding + tile_w, padding], [padding, padding]], dtype=np.float32)
+    H = cv2.getPerspectiveTransform(dst, src)
+
+    ys, xs = np.mgrid[0:tile_h + 2 * padding, 0:tile_w + 2 * padding].astype(np.float32)
+    pixels = np.stack([xs + 0.5, ys + 0.5, np.ones_like(xs)], axis=-1) @ H.T.astype(np.float32)
+    map_x = pixels[..., 0] / pixels[..., 2] - 0.5
+    map_y = pixels[..., 1] / pixels[..., 2] - 0.5
+    return cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+
+
+class TextureAtlas:
+    """
+    Запекание участков фото на поверхности модели в одну текстуру.
+
+    Каждая поверхность получает тайл по своим размерам в метрах; тайлы
+    укладываются полками в одно изображение, участки фото переносятся в
+    тайлы через cv2.remap параллельно (OpenCV отпускает GIL). После
+    apply грани запечённых поверхностей используют один материал с UV
+    внутри своих тайлов - одна текстура на сцену вместо цвета на поверхность.
+    """
+
+    MATERIAL = "atlas"
+
+    def __init__(self, texels_per_meter: float = 128, max_tile: int = 1024,
+                 padding: int = 2, workers: Optional[int] = None):
+        """
+        Args:
+            texels_per_meter: разрешение тайла
+            max_tile: ограничение стороны тайла, пиксели
+            padding: поля вокруг тайла (продолжение фото, без швов при фильтрации)
+            workers: потоки для переноса (None - по умолчанию ThreadPoolExecutor)
+        """
+        self.texels_per_meter = texels_per_meter
+        self.max_tile = max_tile
+        self.padding = padding
+        self.workers = workers
+        self.image: Optional[np.ndarray] = None
+        # Материал -> (u0, v0, u1, v1) тайла в UV атласа (v вверх, как в OBJ)
+        self.regions: Dict[str, Tuple[float, float, float, float]] = {}
+
+    def _tile_size(self, size: Tuple[float, float]) -> Tuple[int, int]:
+        scale = self.texels_per_meter
+        longest = max(size) * scale
+        if longest > self.max_tile:
+            scale *= self.max_tile / longest
+        return (max(int(round(size[0] * scale)), 8), max(int(round(size[1] * scale)), 8))
+
+    def _pack(self, tiles: List[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], int, int]:
+        """
+        Укладка полками: тайлы по убыванию высоты слева направо, новая
+        полка при переполнении ширины атласа.
+
+        Returns:
+            позиции (x, y) тайлов с полями, ширина и высота атласа
+        """
+        cells = [(w + 2 * self.padding, h + 2 * self.padding) for w, h in tiles]
+        area = sum(w * h for w, h in cells)
+        width = max(max(w for w, _ in cells), 1 << int(np.ceil(np.log2(np.sqrt(area)))))
+
+        positions = [(0, 0)] * len(cells)
+        x = y = shelf = 0
+        for i in sorted(range(len(cells)), key=lambda k: -cells[k][1]):
+            w, h = cells[i]
+            if x + w > width:
+                x, y, shelf = 0, y + shelf, 0
+            positions[i] = (x, y)
+            x += w
+            shelf = max(shelf, h)
+        return positions, width, y + shelf
+
+    def bake(self, surfaces: Sequence[AtlasSurface]) -> np.ndarray:
+        """Атлас всех поверхностей (BGR); заполняет self.regions."""
+        self.regions = {}
+        if not surfaces:
+            self.image = None
+            return None
+
+        tiles = [self._tile_size(s.size) for s in surfaces]
+        positions, width, height = self._pack(tiles)
+        atlas = np.zeros((height, width, 3), dtype=np.uint8)
+        p = self.padding
+
+        def warp(i: int):
+            surface, (tw, th), (x, y) = surfaces[i], tiles[i], positions[i]
+            quad = tuple(np.round(np.asarray(surface.quad, dtype=np.float64), 2).ravel())
+            map1, map2 = _remap_tables(quad, tw, th, p)
+            atlas[y:y + th + 2 * p, x:x + tw + 2 * p] = cv2.remap(
+                surface.image, map1, map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(warp, range(len(surfaces))))
+
+        for surface, (tw, th), (x, y) in zip(surfaces, tiles, positions):
+            self.regions[surface.material] = ((x + p) / width, 1.0 - (y + p + th) / height,
+                                              (x + p + tw) / width, 1.0 - (y + p) / height)
+        self.image = atlas
+        return atlas
+
+    def apply(self, mesh: IndexedMesh) -> int:
+        """
+        Перевести грани запечённых поверхностей на материал атласа.
+
+        UV вершин этих граней (0..1 по поверхности) переносятся в тайл
+        поверхности. Вершины поверхностей не делятся с другими материалами
+        (add_wall, add_quads), поэтому перенос по вершинам безопасен.
+
+        Returns:
+            Число переведённых граней
+        """
+        if not self.regions:
+            return 0
+
+        face_materials = mesh.face_materials
+        atlas_id = mesh.material_id(self.MATERIAL)
+        moved = 0
+        for name, (u0, v0, u1, v1) in self.regions.items():
+            if name not in mesh.materials:
+                continue
+            faces = face_materials == mesh.materials.index(name)
+            vertices = np.unique(mesh.faces[faces])
+            uvs = mesh.uvs[vertices]
+            mesh.uvs[vertices] = np.stack([u0 + uvs[:, 0] * (u1 - u0),
+                                           v0 + uvs[:, 1] * (v1 - v0)], axis=1)
+            face_materials[faces] = atlas_id
+            moved += int(faces.sum())
+        return moved
+
+    def encode(self, ext: str = '.png', scale: float = 1.0) -> bytes:
+        """
+        Атлас как байты изображения (для встраивания в GLB).
+
+        Args:
+            scale: уменьшение для упрощённых уровней детализации; UV тайлов
+                в долях атласа при этом не меняются
+        """
+        image = self.image
+        if scale != 1.0:
+            h, w = image.shape[:2]
+            image = cv2.resize(image, (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1)),
+                               interpolation=cv2.INTER_AREA)
+        ok, data = cv2.imencode(ext, image)
+        if not ok:
+            raise ValueError("Не удалось закодировать атлас")
+        return data.tobytes()
+
+    def save(self, filename: str):
+        cv2.imwrite(filename, self.image)
+
+
+def photo_surfaces(images: List[np.ndarray], walls: Sequence[Tuple[str, str, object]],
+                   room_size: Tuple[float, float], ceiling: bool = True) -> List[AtlasSurface]:
+    """
+    Поверхности комнаты и их зоны на фото.
+
+    Каждая поверхность берёт свою зону с первого доступного фото
+    (положение камер неизвестно, как и при анализе цветов). Направление U
+    стены сверяется с направлением «вправо» для взгляда изнутри на стену
+    (нормали стен - наружу).
+
+    Args:
+        walls: (материал, имя стены left/right/top/bottom, стена с start, end, height, normal)
+        room_size: ширина и длина комнаты (пол и потолок)
+        ceiling: в модели есть потолок
+    """
+    image = next((img for img in images if img is not None), None)
+    if image is None:
+        return []
+
+    up = np.array([0.0, 1.0, 0.0])
+    surfaces = []
+    for material, wall_name, wall in walls:
+        if wall_name not in PHOTO_ZONES:
+            continue
+        direction = np.asarray(wall.end, dtype=np.float64) - np.asarray(wall.start, dtype=np.float64)
+        length = float(np.linalg.norm(direction))
+        if length < 0.01:
+            continue
+        right = np.cross(np.asarray(wall.normal, dtype=np.float64), up)
+        surfaces.append(AtlasSurface(material, image,
+                                     zone_quad(image.shape, wall_name, mirror=direction @ right < 0),
+                                     (length, float(wall.height))))
+
+    for name in ('floor', 'ceiling') if ceiling else ('floor',):
+        surfaces.append(AtlasSurface(name, image, zone_quad(image.shape, name), room_size))
+    return surfaces
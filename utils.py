@@ -12,10 +12,22 @@ def load_images(image_paths):
     return images
 
 
-def estimate_camera_matrix(image_shape, fov_degrees=60):
-    """Оценка матрицы камеры из разрешения и угла обзора."""
+# Диагональ кадра 35 мм плёнки (36×24 мм)
+FILM_35MM_DIAGONAL = 43.27
+
+
+def estimate_camera_matrix(image_shape, fov_degrees=60, focal_35mm=None):
+    """
+    Оценка матрицы камеры из разрешения и угла обзора.
+
+    Если известно фокусное расстояние в 35 мм эквиваленте (из EXIF),
+    используется оно, иначе - фиксированный угол обзора.
+    """
     h, w = image_shape[:2]
-    focal_length = max(w, h) / (2 * np.tan(np.radians(fov_degrees) / 2))
+    if focal_35mm:
+        focal_length = focal_35mm * np.hypot(w, h) / FILM_35MM_DIAGONAL
+    else:
+        focal_length = max(w, h) / (2 * np.tan(np.radians(fov_degrees) / 2))
 
     K = np.array([
         [focal_length, 0, w / 2],
@@ -1,8 +1,11 @@
 import cv2
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dataclasses import dataclass
 
+from association import DetectionAssociator
+from detections import DetectionTable, WALL_POSITIONS, FLAG_VERIFIED, nms_keep
+
 
 @dataclass
 class DetectedWindow:
@@ -26,6 +29,10 @@ class WindowDetectorCV:
             'wall_margin': 0.15
         }
 
+        # С позами камер окна сопоставляются по нижней кромке на высоте подоконника
+        self.sill_height = 0.9
+        self.associator = DetectionAssociator()
+
     def detect_windows(self, image: np.ndarray) -> List[DetectedWindow]:
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         edges = cv2.Canny(gray, 50, 150)
@@ -112,69 +119,48 @@ class WindowDetectorCV:
         if len(windows) <= 1:
             return windows
 
-        keep = []
-        for w1 in windows:
-            overlap = False
-            for w2 in keep:
-                if self._iou(w1, w2) > iou_threshold:
-                    overlap = True
-                    break
-            if not overlap:
-                keep.append(w1)
-        return keep
-
-    def _iou(self, w1, w2) -> float:
-        x1 = max(w1.x, w2.x)
-        y1 = max(w1.y, w2.y)
-        x2 = min(w1.x + w1.width, w2.x + w2.width)
-        y2 = min(w1.y + w1.height, w2.y + w2.height)
-
-        intersection = max(0, x2 - x1) * max(0, y2 - y1)
-        area1 = w1.width * w1.height
-        area2 = w2.width * w2.height
-        union = area1 + area2 - intersection
-
-        return intersection / union if union > 0 else 0
-
-    def analyze_multiple_images(self, images: List[np.ndarray]) -> List[Dict]:
-        all_candidates = []
+        boxes = np.array([(w.x, w.y, w.width, w.height) for w in windows])
+        return [windows[i] for i in nms_keep(boxes, iou_threshold)]
+
+    def analyze_table(self, images: List[np.ndarray],
+                      camera_poses: Optional[List] = None) -> DetectionTable:
+        tables = []
 
         for i, img in enumerate(images):
             detected = self.detect_windows(img)
             print(f"  Фото {i + 1}: найдено {len(detected)} кандидатов")
-
-            for win in detected:
-                all_candidates.append({
-                    'photo_idx': i,
-                    'window': win,
-                    'relative_x': (win.x + win.width / 2) / img.shape[1],
-                    'relative_y': (win.y + win.height / 2) / img.shape[0],
-                    'is_valid': win.is_valid
-                })
-
-        by_position = {'left': [], 'right': [], 'center': []}
-        for c in all_candidates:
-            if c['window'].confidence > 0.3:
-                by_position[c['window'].wall_position].append(c)
-
-        final_windows = []
-        for position, candidates in by_position.items():
-            if len(candidates) == 0:
-                continue
-
-            if len(candidates) >= 2 or candidates[0]['window'].confidence > 0.7:
-                best = max(candidates, key=lambda x: x['window'].confidence)
-                confidence_boost = 1.0 + (len(candidates) - 1) * 0.1
-
-                final_windows.append({
-                    'position': position,
-                    'confidence': min(best['window'].confidence * confidence_boost, 1.0),
-                    'aspect_ratio': best['window'].height / best['window'].width,
-                    'verified': len(candidates) >= 2
-                })
-                print(f"    ✓ Окно на {position} стене: уверенность {best['window'].confidence:.2f}")
-
-        return final_windows
+            tables.append(DetectionTable.from_detections(detected, i, img.shape, kind='window'))
+
+        candidates = DetectionTable.concat(tables, kind='window').threshold(0.3)
+        return self._aggregate(candidates, camera_poses)
+
+    def _aggregate(self, candidates: DetectionTable,
+                   camera_poses: Optional[List] = None) -> DetectionTable:
+        """
+        Объединение кандидатов одного окна: по точке на плоскости подоконника,
+        если известны позы камер, иначе по положению на фото (left / right / center).
+        """
+        keys = candidates['position']
+        if camera_poses is not None:
+            keys, _ = self.associator.associate(candidates, camera_poses, height=self.sill_height)
+        best, counts, first = candidates.group_best(keys)
+
+        keep = (counts >= 2) | (candidates['confidence'][first] > 0.7)
+        result, counts = candidates[best[keep]], counts[keep]
+
+        for row in result.data:
+            print(f"    ✓ Окно на {WALL_POSITIONS[row['position']]} стене: "
+                  f"уверенность {row['confidence']:.2f}")
+
+        confidence_boost = 1.0 + (counts - 1) * 0.1
+        result.data['confidence'] = np.minimum(result['confidence'] * confidence_boost, 1.0)
+        result.data['support'] = counts
+        result.data['flags'] |= np.where(counts >= 2, FLAG_VERIFIED, 0).astype(np.uint8)
+        return result
+
+    def analyze_multiple_images(self, images: List[np.ndarray],
+                                camera_poses: Optional[List] = None) -> List[Dict]:
+        return self.analyze_table(images, camera_poses).to_legacy()
 
 
 def map_windows_to_floorplan(detected_windows: List[Dict],